@@ -0,0 +1,50 @@
+"""Gunicorn settings for the clinic app.
+
+    gunicorn -c deployment/gunicorn.conf.py
+
+Every value can be overridden through the environment (see README).
+"""
+import multiprocessing
+import os
+
+_cpus = multiprocessing.cpu_count()
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+wsgi_app = "wsgi:app"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# Threaded workers: requests mostly wait on MySQL, so a few threads per
+# process keep the CPUs busy without one process per concurrent request.
+worker_class = "gthread"
+workers = int(os.getenv("WEB_CONCURRENCY") or _cpus * 2 + 1)
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Build the app once in the master and fork it; post_fork() gives each
+# worker its own DB pool and background threads.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes", "on")
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Each request thread holds at most one pooled connection, plus a couple for
+# background jobs; this also bounds connections per worker on the MySQL side.
+os.environ.setdefault("DB_POOL_MAX_SIZE", str(threads + 2))
+
+
+def post_fork(server, worker):
+    import wsgi
+    wsgi.post_fork()
+
+
+def worker_exit(server, worker):
+    import wsgi
+    wsgi.on_exit()
@@ -1,12 +1,18 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+import logging
+from flask import Blueprint, abort, current_app, render_template, redirect, url_for, flash, request, session
+from database import instrumentation
 from repositories.repositories_factory import RepositoryFactory
+from services import identity
+from utils.pagination import Page
+
+logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
-user_repo = RepositoryFactory.get_repository('user')
-doctor_repo = RepositoryFactory.get_repository('doctor')
-assistant_repo = RepositoryFactory.get_repository('assistant')
-audit_repo = RepositoryFactory.get_repository('admin_audit')
+user_repo = RepositoryFactory.get_scoped_repository('user')
+doctor_repo = RepositoryFactory.get_scoped_repository('doctor')
+assistant_repo = RepositoryFactory.get_scoped_repository('assistant')
+audit_repo = RepositoryFactory.get_scoped_repository('admin_audit')
 
 @admin_bp.before_request
 def enforce_admin():
@@ -45,32 +51,28 @@ def admin_home():
     if not require_admin():
         return redirect(url_for('auth.login'))
 
-    # Pagination for pending list
-    page = request.args.get('page', default=1, type=int)
-    per_page = request.args.get('per_page', default=10, type=int)
+    # Keyset pagination: ?cursor= comes from the previous page's "Next" link
+    per_page = min(max(request.args.get('per_page', default=10, type=int), 1), 100)
+    cursor = request.args.get('cursor')
+    audits_cursor = request.args.get('audits_cursor')
 
     try:
-        pending = user_repo.list_pending_users() or []
+        pending_page = user_repo.page_pending_users(cursor=cursor, limit=per_page)
         doctors = doctor_repo.list_all() or []
     except Exception:
-        pending = []
+        pending_page = Page([], None, 0)
         doctors = []
 
-    total = len(pending)
-    pending_count = total
-    # slice pending list for pagination
-    start = (page - 1) * per_page
-    end = start + per_page
-    paginated = pending[start:end]
-    total_pages = (total + per_page - 1) // per_page if per_page else 1
-
     # fetch recent audits
     try:
-        recent_audits = audit_repo.list_recent(20)
+        audits_page = audit_repo.page_entries(cursor=audits_cursor, limit=20)
     except Exception:
-        recent_audits = []
+        audits_page = Page([], None, None)
 
-    return render_template('admin/index.html', pending=paginated, pending_count=pending_count, doctors=doctors, page=page, per_page=per_page, total_pages=total_pages, recent_audits=recent_audits)
+    return render_template('admin/index.html', pending=pending_page.items, pending_count=pending_page.total,
+                           next_cursor=pending_page.next_cursor, cursor=cursor, per_page=per_page,
+                           doctors=doctors, recent_audits=audits_page.items,
+                           audits_cursor=audits_cursor, audits_next_cursor=audits_page.next_cursor)
 
 
 @admin_bp.route('/pending/<int:user_id>/approve', methods=['POST'])
@@ -101,12 +103,13 @@ def approve_user(user_id):
         cursor.execute("UPDATE assistant SET doctor_id = %s WHERE user_id = %s", (assign_doctor_id, user_id))
         assistant_repo.db.commit()
         cursor.close()
+        identity.invalidate_profile(user_id)
 
-    # Record audit entry
+    # Record audit entry (queued; written in the background)
     try:
         audit_repo.create_entry(session.get('user_id'), 'approve_user', target_user_id=user_id, target_type=user.role, details=f'assign_doctor={assign_doctor_id}' if assign_doctor_id else None)
     except Exception:
-        pass
+        logger.exception("Could not record approve_user audit entry for user %s", user_id)
 
     flash('User approved and activated.', category='success')
     return redirect(url_for('admin.admin_home'))
@@ -127,12 +130,36 @@ def reject_user(user_id):
 
     # delete user and its profile
     user_repo.delete_user(user_id)
+    identity.invalidate_profile(user_id)
 
     # audit
     try:
         audit_repo.create_entry(session.get('user_id'), 'reject_user', target_user_id=user_id, target_type=user.role, details=None)
     except Exception:
-        pass
+        logger.exception("Could not record reject_user audit entry for user %s", user_id)
 
     flash('User rejected and removed.', category='info')
     return redirect(url_for('admin.admin_home'))
+
+
+@admin_bp.route('/perf', methods=['GET', 'POST'])
+def perf():
+    """Query counts and DB time per endpoint since start-up (opt-in via PERF_PAGE_ENABLED)."""
+    if not current_app.config.get('PERF_PAGE_ENABLED'):
+        abort(404)
+    if not require_admin():
+        return redirect(url_for('auth.login'))
+
+    registry = instrumentation.get_registry()
+    if request.method == 'POST':
+        registry.clear()
+        flash('Performance counters reset.', category='info')
+        return redirect(url_for('admin.perf'))
+
+    budgets = {row['endpoint']: instrumentation.budget_for(row['endpoint'], current_app.config)
+               for row in registry.endpoints()}
+    return render_template('admin/perf.html',
+                           endpoints=registry.endpoints(),
+                           slow_statements=registry.slow_statements(),
+                           budgets=budgets,
+                           slow_query_ms=current_app.config.get('SLOW_QUERY_MS'))
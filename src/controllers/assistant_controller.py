@@ -1,16 +1,20 @@
+import logging
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for, jsonify
 from datetime import date, datetime, timedelta
 
 from repositories.repositories_factory import RepositoryFactory
+from services import identity
+
+logger = logging.getLogger(__name__)
 
 assistant_bp = Blueprint('assistant', __name__, url_prefix='/assistant')
-user_repo = RepositoryFactory.get_repository("user")
-patient_repo = RepositoryFactory.get_repository("patient")  
-assistant_repo = RepositoryFactory.get_repository("assistant")
-appointment_repo = RepositoryFactory.get_repository("appointment")
-doctor_repo = RepositoryFactory.get_repository("doctor")
-availability_repo = RepositoryFactory.get_repository("doctor_availability")
-task_repo = RepositoryFactory.get_repository("task")  # You'll need to create this repository
+user_repo = RepositoryFactory.get_scoped_repository("user")
+patient_repo = RepositoryFactory.get_scoped_repository("patient")  
+assistant_repo = RepositoryFactory.get_scoped_repository("assistant")
+appointment_repo = RepositoryFactory.get_scoped_repository("appointment")
+doctor_repo = RepositoryFactory.get_scoped_repository("doctor")
+availability_repo = RepositoryFactory.get_scoped_repository("doctor_availability")
+task_repo = RepositoryFactory.get_scoped_repository("task")  # You'll need to create this repository
 
 @assistant_bp.route('/')
 def assistant_home():
@@ -32,7 +36,7 @@ def assistant_home():
     
     # Get assistant data
     try:
-        assistant = assistant_repo.get_by_user_id(session["user_id"])
+        assistant = identity.current_profile("assistant", assistant_repo)
     except Exception as e:
         flash(f"Error loading assistant profile: {str(e)}", category="danger")
         return redirect(url_for("auth.dashboard"))
@@ -97,7 +101,7 @@ def manage_tasks():
         return redirect(url_for("auth.login"))
     
     try:
-        assistant = assistant_repo.get_by_user_id(session["user_id"])
+        assistant = identity.current_profile("assistant", assistant_repo)
         
         if request.method == 'POST':
             # Handle task creation
@@ -139,7 +143,7 @@ def view_reports():
         return redirect(url_for("auth.login"))
     
     try:
-        assistant = assistant_repo.get_by_user_id(session["user_id"])
+        assistant = identity.current_profile("assistant", assistant_repo)
         
         # Get report data
         today = date.today().strftime("%Y-%m-%d")
@@ -177,9 +181,7 @@ def schedule():
         return redirect(url_for("auth.login"))
     
     try:
-        assistant = assistant_repo.get_by_user_id(session["user_id"])
-        
-        print(f"DEBUG: Assistant ID: {assistant.id}, Doctor ID: {assistant.doctor_id}")  # ADD THIS
+        assistant = identity.current_profile("assistant", assistant_repo)
         
         # Get doctor data if assistant is assigned to a doctor
         doctor = None
@@ -187,21 +189,16 @@ def schedule():
         appointments = []
         
         if assistant.doctor_id:
-            print(f"DEBUG: Assistant is assigned to doctor {assistant.doctor_id}")  # ADD THIS
-
             # Get doctor - USE REPOSITORY
             try:
                 doctor = doctor_repo.get_by_id(assistant.doctor_id)
-                print(f"DEBUG: Doctor found: {doctor.firstName} {doctor.lastName}")  # ADD THIS
             except Exception as e:
-                print(f"DEBUG: Error loading doctor: {e}")  # ADD THIS
+                logger.exception("Error loading doctor %s for assistant %s", assistant.doctor_id, assistant.id)
                 flash(f"Error loading doctor: {str(e)}", category="danger")
                 doctor = None
 
             # Get availability
             availability = availability_repo.list_by_doctor(assistant.doctor_id)
-            print(f"DEBUG: Availability data: {availability}")  # ADD THIS
-            print(f"DEBUG: Number of availability entries: {len(availability)}")  # ADD THIS
             
             # Get appointments for next 7 days
             start_date = date.today().strftime("%Y-%m-%d")
@@ -209,10 +206,10 @@ def schedule():
             appointments = appointment_repo.get_appointments_by_date_range(
                 assistant.doctor_id, start_date, end_date
             )
-            print(f"DEBUG: Number of appointments: {len(appointments)}")  # ADD THIS
-        
+            logger.debug("Assistant %s schedule: %d availability entries, %d appointments",
+                         assistant.id, len(availability), len(appointments))
         else:
-            print(f"DEBUG: Assistant is NOT assigned to any doctor")  # ADD THIS
+            logger.debug("Assistant %s is not assigned to a doctor", assistant.id)
         
         return render_template('assistant/assistant_schedule.html',
                              assistant=assistant,
@@ -224,6 +221,9 @@ def schedule():
         flash(f"Error loading schedule: {str(e)}", category="danger")
         return redirect(url_for("assistant.assistant_home"))
 
+# Maximum number of ranked matches shown on the search page
+SEARCH_RESULT_LIMIT = 50
+
 @assistant_bp.route('/search_patient', methods=['GET', 'POST'])
 def search_patient():
     if not session.get("user_id") or session.get("role") not in ["assistant", "doctor"]:
@@ -238,10 +238,12 @@ def search_patient():
         
         if query:
             # Search using repository
-            results = patient_repo.search_patients(query)
+            results = patient_repo.search_patients(query, limit=SEARCH_RESULT_LIMIT)
             
             if not results:
                 flash(f"No patients found for '{query}'", category="warning")
+            elif len(results) >= SEARCH_RESULT_LIMIT:
+                flash(f"Showing the best {len(results)} matches; refine your search to narrow them down", category="info")
             else:
                 flash(f"Found {len(results)} patient(s)", category="success")
         else:
@@ -304,7 +306,7 @@ def add_appointment():
     
     try:
         # Get Assistant ID using repository
-        assistant = assistant_repo.get_by_user_id(session.get("user_id"))
+        assistant = identity.current_profile("assistant", assistant_repo)
         if not assistant:
             flash("Assistant not found.", category="danger")
             return redirect(url_for("auth.login"))
@@ -342,7 +344,7 @@ def cancel_appointment(appointment_id):
     
     try:
         # Get assistant info
-        assistant = assistant_repo.get_by_user_id(session["user_id"])
+        assistant = identity.current_profile("assistant", assistant_repo)
         if not assistant:
             flash("Assistant profile not found.", category="danger")
             return redirect(request.referrer or url_for("assistant.assistant_home"))
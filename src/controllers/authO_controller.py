@@ -1,17 +1,21 @@
+import logging
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for
 from werkzeug.security import check_password_hash, generate_password_hash
 import secrets
 
 from repositories.repositories_factory import RepositoryFactory
+from services import identity, metrics
+
+logger = logging.getLogger(__name__)
 
 authO_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
 # Initialize all repositories at module level
-user_repo = RepositoryFactory.get_repository("user")
-patient_repo = RepositoryFactory.get_repository("patient")
-doctor_repo = RepositoryFactory.get_repository("doctor")
-assistant_repo = RepositoryFactory.get_repository("assistant")
-doctorAvailability_repo = RepositoryFactory.get_repository("doctor_availability")
+user_repo = RepositoryFactory.get_scoped_repository("user")
+patient_repo = RepositoryFactory.get_scoped_repository("patient")
+doctor_repo = RepositoryFactory.get_scoped_repository("doctor")
+assistant_repo = RepositoryFactory.get_scoped_repository("assistant")
+doctorAvailability_repo = RepositoryFactory.get_scoped_repository("doctor_availability")
 
 
 @authO_bp.route("/signup", methods=['GET', 'POST'])
@@ -56,12 +60,9 @@ def signup():
             # Patients created active immediately
             if role_choice == "patient":
 
-                print(f"DEBUG: Creating patient user with email: {email}")
                 user = user_repo.create_user(email, hashed_pw, role="patient", status="active")
 
                 if user:
-                    print(f"DEBUG: User created successfully with ID: {user.id}")
-                    print(f"DEBUG: Attempting to create patient with phone: {phone}")
                     # Try different phone formats
                     phone_formats_to_try = [
                         f"+{phone}",           # +201234567890
@@ -75,7 +76,6 @@ def signup():
                     
                     for phone_format in phone_formats_to_try:
                         try:
-                            print(f"DEBUG: Trying phone format: {phone_format}")
                             patient = patient_repo.create_patient(
                                 first_name=first_name, 
                                 last_name=last_name, 
@@ -86,11 +86,12 @@ def signup():
                                 address=None
                             )
                             if patient:
-                                print(f"DEBUG: Patient created successfully with phone: {phone_format}")
+                                logger.info("Patient signup completed for user %s", user.id)
                                 break
                         except Exception as format_error:
                             last_error = format_error
-                            print(f"DEBUG: Failed with format {phone_format}: {format_error}")
+                            logger.debug("Patient profile insert failed for user %s: %s",
+                                         user.id, type(format_error).__name__)
                             continue
                     
                     if patient:
@@ -98,15 +99,14 @@ def signup():
                         return redirect(url_for("auth.login"))
                     else:
                         # Rollback user creation if patient creation fails
-                        print(f"DEBUG: Patient creation failed, rolling back user {user.id}")
-                        print(f"DEBUG: Last error: {last_error}")
+                        logger.warning("Patient profile creation failed for user %s (%s); removing user",
+                                       user.id, type(last_error).__name__ if last_error else "no profile")
                         
                         # Try to delete the user
                         try:
-                            delete_result = user_repo.delete_user(user.id)
-                            print(f"DEBUG: User deletion result: {delete_result}")
-                        except Exception as delete_error:
-                            print(f"DEBUG: Error deleting user: {delete_error}")
+                            user_repo.delete_user(user.id)
+                        except Exception:
+                            logger.exception("Error deleting user %s after failed signup", user.id)
                         
                         # Show specific error message
                         error_msg = "Failed to create patient profile. "
@@ -167,8 +167,8 @@ def signup():
                 else:
                     flash("Unable to create account. Please try again.", category="danger")
                     
-        except Exception as e:
-            print(f"Signup error: {e}")
+        except Exception:
+            logger.exception("Signup error")
             flash("An error occurred during registration. Please try again.", category="danger")
             
     return render_template("signup.html")
@@ -199,23 +199,28 @@ def login():
             flash("Your account is pending approval. Please wait for admin approval.", category="warning")
             return redirect(url_for("auth.login"))
         
+        # Fresh session id on login; the server-side store drops the old one
+        session.clear()
+        if hasattr(session, "regenerate"):
+            session.regenerate()
+        
         # Set session variables
         session["user_id"] = user.id
         session["username"] = user.username
         session["role"] = user.role
         session["status"] = user.status
         
-        # Get user's name based on role
+        # Get user's name based on role, and cache the profile ids for later pages
         if user.role == "patient":
-            patient = patient_repo.get_by_user_id(user.id)
+            patient = identity.remember_profile("patient", patient_repo.get_by_user_id(user.id))
             if patient:
                 session["name"] = f"{patient.firstName} {patient.lastName}"
         elif user.role == "doctor":
-            doctor = doctor_repo.get_by_user_id(user.id)
+            doctor = identity.remember_profile("doctor", doctor_repo.get_by_user_id(user.id))
             if doctor:
                 session["name"] = f"Dr. {doctor.firstName} {doctor.lastName}"
         elif user.role == "assistant":
-            assistant = assistant_repo.get_by_user_id(user.id)
+            assistant = identity.remember_profile("assistant", assistant_repo.get_by_user_id(user.id))
             if assistant:
                 session["name"] = f"{assistant.firstName} {assistant.lastName}"
         
@@ -242,6 +247,8 @@ def login():
 @authO_bp.route("/logout")
 def logout():
     session.clear()
+    if hasattr(session, "regenerate"):
+        session.regenerate()
     flash("Logged out successfully!", category="success")
     return redirect(url_for("auth.login"))
 
@@ -253,58 +260,31 @@ def dashboard():
         flash("You must log in first.", category="error")
         return redirect(url_for("auth.login"))
 
-    # Populate dynamic metrics
+    # Populate dynamic metrics (aggregate queries, memoized per user for a few seconds)
     data = {}
+    user_id = session.get("user_id")
     try:
-        appointment_repo = RepositoryFactory.get_repository('appointment')
+        appointment_repo = RepositoryFactory.get_scoped_repository('appointment')
         
         if role == 'patient':
-            patient = patient_repo.get_by_user_id(session.get('user_id'))
-            appts = appointment_repo.get_by_patient_id(patient.id) if patient else []
-            data = {
-                'patient_appointments': len(appts),
-                'upcoming_appointments': sum(1 for a in appts if getattr(a, 'status', '').upper() in ['BOOKED', 'PENDING'])
-            }
+            patient = identity.current_profile('patient', patient_repo)
+            if patient:
+                data = metrics.cached(user_id, role, metrics.patient_metrics,
+                                      patient.id, appointment_repo, patient_repo)
         elif role == 'doctor':
-            doc = doctor_repo.get_by_user_id(session.get('user_id'))
-            today = None
-            try:
-                from datetime import date
-                today = date.today().isoformat()
-            except Exception:
-                pass
-            todays = appointment_repo.get_by_doctor_id(doc.id, today) if doc and today else []
-            pending = appointment_repo.list_pending_by_doctor(doc.id) if doc else []
-            data = {
-                'doctor_patients': len(set(getattr(a, 'patient_id', None) for a in todays)) if todays else 0,
-                'today_appointments': len(todays) if todays else 0,
-                'total_appointments': len(appointment_repo.get_by_doctor_id(doc.id) or []) if doc else 0,
-                'pending_tasks': len(pending) if pending else 0
-            }
+            doc = identity.current_profile('doctor', doctor_repo)
+            if doc:
+                data = metrics.cached(user_id, role, metrics.doctor_metrics, doc.id, appointment_repo)
         elif role == 'assistant':
-            assistant = assistant_repo.get_by_user_id(session.get('user_id'))
+            assistant = identity.current_profile('assistant', assistant_repo)
             if assistant:
-                doc_id = assistant.doctor_id
-                todays = appointment_repo.get_by_doctor_id(doc_id) or [] if doc_id else []
-                data = {
-                    'total_patients': 0,
-                    'today_appointments': len(todays),
-                    'assigned_doctor': doc_id
-                }
+                data = metrics.cached(user_id, role, metrics.assistant_metrics, assistant.doctor_id,
+                                      appointment_repo, patient_repo, doctor_repo)
         elif role == 'admin':
-            pending = user_repo.list_pending_users() or []
-            audit_repo = RepositoryFactory.get_repository('admin_audit')
-            recent = []
-            try:
-                recent = audit_repo.list_recent(5)
-            except Exception:
-                recent = []
-            data = {
-                'pending_users': len(pending),
-                'recent_audits': recent
-            }
-    except Exception as e:
-        print(f"Dashboard error: {e}")
+            audit_repo = RepositoryFactory.get_scoped_repository('admin_audit')
+            data = metrics.cached(user_id, role, metrics.admin_metrics, user_repo, audit_repo)
+    except Exception:
+        logger.exception("Dashboard error")
         # Fallback to simple placeholders
         if role == 'patient':
             data = {'patient_appointments': 0, 'upcoming_appointments': 0}
@@ -388,6 +368,7 @@ def profile():
                 session["gender"] = gender
                 session["birth_date"] = birth_date
                 session["address"] = address
+                identity.invalidate_profile(user.id)
                 flash("Profile updated successfully!", category="success")
 
             elif session.get("role") == "doctor" and doctor:
@@ -396,6 +377,7 @@ def profile():
                 session["name"] = name
                 session["phone"] = phone
                 session["specialization"] = specialization
+                identity.invalidate_profile(user.id)
                 flash("Profile updated successfully!", category="success")
 
             elif session.get("role") == "assistant" and assistant:
@@ -409,6 +391,7 @@ def profile():
                 cursor.close()
                 session["name"] = name
                 session["phone"] = phone
+                identity.invalidate_profile(user.id)
                 flash("Profile updated successfully!", category="success")
         
         return redirect(url_for("auth.profile"))
@@ -470,6 +453,7 @@ def delete_account():
     
     # Delete user (cascade will handle patient/doctor/assistant records)
     user_repo.delete_user(user.id)
+    identity.invalidate_profile(user.id)
     
     session.clear()
     flash("Your account has been deleted successfully.", category="success")
@@ -1,21 +1,24 @@
+import logging
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for, current_app
 import os
 from datetime import date, datetime, timedelta
-from werkzeug.utils import secure_filename
 
 from repositories.repositories_factory import RepositoryFactory
+from services import identity, upload_storage
+
+logger = logging.getLogger(__name__)
 
 doctor_bp = Blueprint('doctor', __name__, url_prefix='/doctor')
     
-user_repo = RepositoryFactory.get_repository("user")
-doctor_repo = RepositoryFactory.get_repository("doctor")
-appointment_repo = RepositoryFactory.get_repository("appointment")
-medical_repo = RepositoryFactory.get_repository("medical_record")
-uploaded_repo = RepositoryFactory.get_repository("uploaded_file")
-patient_repo = RepositoryFactory.get_repository("patient")
-availability_repo = RepositoryFactory.get_repository("doctor_availability")
+user_repo = RepositoryFactory.get_scoped_repository("user")
+doctor_repo = RepositoryFactory.get_scoped_repository("doctor")
+appointment_repo = RepositoryFactory.get_scoped_repository("appointment")
+medical_repo = RepositoryFactory.get_scoped_repository("medical_record")
+uploaded_repo = RepositoryFactory.get_scoped_repository("uploaded_file")
+patient_repo = RepositoryFactory.get_scoped_repository("patient")
+availability_repo = RepositoryFactory.get_scoped_repository("doctor_availability")
 # Audit repository for recording approvals/rejections
-audit_repo = RepositoryFactory.get_repository("admin_audit")
+audit_repo = RepositoryFactory.get_scoped_repository("admin_audit")
 
 @doctor_bp.route('/')
 def doctor_home():
@@ -27,36 +30,45 @@ def doctor_home():
         flash("Access denied. Doctor access required.", category="danger")
         return redirect(url_for("auth.dashboard"))
     
-    doctor = doctor_repo.get_by_user_id(session.get("user_id"))
+    doctor = identity.current_profile("doctor", doctor_repo)
     if not doctor:
         flash("Doctor profile not found.", category="warning")
         return redirect(url_for("auth.dashboard"))
     
-    session['doctor_name'] = f"{doctor.firstName} {doctor.lastName}"
+    # Only write when it changes so the stored session isn't rewritten on every visit
+    doctor_name = f"{doctor.firstName} {doctor.lastName}"
+    if session.get('doctor_name') != doctor_name:
+        session['doctor_name'] = doctor_name
 
     # Get today's appointments
     today = date.today().isoformat()
-    raw_appointments = appointment_repo.get_by_doctor_id(doctor.id, today)
+    # Patient names come joined in, so this is one query however busy the day is
+    raw_appointments = appointment_repo.get_doctor_day_appointments(doctor.id, today)
     pending = appointment_repo.list_pending_by_doctor(doctor.id)
-    
+
     # Transform appointments to include patient info for template
     appointments = []
     for apt in raw_appointments:
-        patient = patient_repo.get_by_id(apt.patient_id) if apt.patient_id else None
-        patient_name = f"{patient.firstName} {patient.lastName}" if patient else "Unknown"
-        
         appointments.append({
-            'id': apt.id,
-            'patient_id': apt.patient_id,
-            'patient': patient_name,
-            'time': apt.appointment_time,
-            'status': apt.status,
-            'date': apt.date
+            'id': apt['id'],
+            'patient_id': apt['patient_id'],
+            'patient': apt['patient_name'] or "Unknown",
+            'time': apt['appointment_time'],
+            'status': apt['status'],
+            'date': apt['date']
         })
     
     return render_template('doctor/doctor_home.html', doctor=doctor, appointments=appointments, pending=pending)
 
 
+def _audit(action, appointment_id):
+    """Record an appointment decision in the audit trail (queued; written in the background)."""
+    try:
+        audit_repo.create_entry(session.get('user_id'), action, target_user_id=appointment_id, target_type='appointment')
+    except Exception:
+        logger.exception("Could not record %s audit entry for appointment %s", action, appointment_id)
+
+
 @doctor_bp.route('/appointment/<int:appointment_id>/approve', methods=['POST'])
 def approve_appointment(appointment_id):
     if not session.get('user_id') or session.get('role') != 'doctor':
@@ -64,7 +76,7 @@ def approve_appointment(appointment_id):
         return redirect(url_for('auth.login'))
 
     # Get the current doctor
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     if not doctor:
         flash('Doctor profile not found.', category='warning')
         return redirect(url_for('auth.dashboard'))
@@ -74,6 +86,7 @@ def approve_appointment(appointment_id):
     
     if success:
         flash('Appointment approved successfully!', category='success')
+        _audit('approve_appointment', appointment_id)
         
         # Optional: Send notification to patient
         try:
@@ -97,7 +110,7 @@ def reject_appointment(appointment_id):
         return redirect(url_for('auth.login'))
 
     # Get the current doctor
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     if not doctor:
         flash('Doctor profile not found.', category='warning')
         return redirect(url_for('auth.dashboard'))
@@ -107,6 +120,7 @@ def reject_appointment(appointment_id):
     
     if success:
         flash('Appointment rejected.', category='warning')
+        _audit('reject_appointment', appointment_id)
     else:
         flash('Failed to reject appointment.', category='danger')
     
@@ -121,7 +135,7 @@ def cancel_appointment(appointment_id):
         return redirect(url_for('auth.login'))
 
     # Get the current doctor
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     if not doctor:
         flash('Doctor profile not found.', category='warning')
         return redirect(url_for('auth.dashboard'))
@@ -145,7 +159,7 @@ def complete_appointment(appointment_id):
         return redirect(url_for('auth.login'))
 
     # Get the current doctor
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     if not doctor:
         flash('Doctor profile not found.', category='warning')
         return redirect(url_for('auth.dashboard'))
@@ -166,7 +180,7 @@ def prescriptions():
         flash("Access denied.", category="danger")
         return redirect(url_for("auth.login"))
     
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     
     return render_template('doctor/prescriptions.html', doctor=doctor)
     
@@ -186,7 +200,7 @@ def medical_file(pid):
         return redirect(url_for("doctor.doctor_home"))
 
     # Get doctor's appointments with this patient
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     patient_appointments = []
     if doctor:
         # Get appointments for this patient with the current doctor
@@ -207,56 +221,33 @@ def medical_file(pid):
             except Exception:
                 patient_appointments = []
 
-    records = medical_repo.get_records_by_patient(pid)
+    records = medical_repo.get_patient_chart(pid)
     diagnosis_list = []
     
-    print(f"\n=== DEBUG: Processing patient {pid} medical records ===")
-    
     for r in records:
-        doc = doctor_repo.get_by_id(r.doctor_id) if r.doctor_id else None
-        files = uploaded_repo.get_files_by_record(r.id) if r.id else []
-        
-        print(f"\nRecord ID: {r.id}")
-        print(f"  Number of files: {len(files)}")
-        
         files_data = []
-        for f in files:
+        for f in r.files:
             if f.file_path:
                 # Clean path for web
                 file_path = f.file_path.replace('\\', '/')
-                
-                # Get filename from the UploadedFile object
-                filename = f.filename if hasattr(f, 'filename') and f.filename else os.path.basename(file_path)
-                
-                # Check if file exists
-                full_path = os.path.join(current_app.static_folder, file_path)
-                file_exists = os.path.exists(full_path)
-                
-                print(f"  - File: {filename}")
-                print(f"    Path: {file_path}")
-                print(f"    Exists: {file_exists}")
-                
                 files_data.append({
-                    "filename": filename,
+                    "filename": f.original_name or os.path.basename(file_path),
                     "file_path": file_path,
-                    "exists": file_exists
+                    "url": url_for('files.download', file_id=f.id),
+                    "thumbnail_url": url_for('files.preview', file_id=f.id, kind='thumbnail') if f.thumbnail_path else None,
+                    "preview_url": url_for('files.preview', file_id=f.id, kind='preview') if f.preview_path else None,
                 })
         
         diagnosis_list.append({
             "id": r.id,
             "date": r.upload_date,
-            "doctor_name": f"{doc.firstName} {doc.lastName}" if doc else "Unknown",
+            "doctor_name": r.doctor_name or "Unknown",
             "text": r.diagnosis,
             "treatment": r.treatment,
             "followup": r.follow_up_date,
             "files": files_data,
         })
 
-    print(f"\n=== DEBUG: Summary ===")
-    print(f"Total records: {len(diagnosis_list)}")
-    total_files = sum(len(d['files']) for d in diagnosis_list)
-    print(f"Total files: {total_files}")
-
     return render_template('doctor/medical_file.html', 
                          patient=patient, 
                          diagnosis=diagnosis_list,
@@ -277,8 +268,6 @@ def add_patient():
     address = request.form.get('address', '').strip() or None
     notes = request.form.get('notes', '').strip() or None
     
-    print(f"DEBUG add_patient: firstName={first_name}, lastName={last_name}, gender={gender}, phone={phone}")
-    
     # Validate required fields
     if not all([first_name, last_name, gender, phone]):
         flash('Please fill all required fields (First Name, Last Name, Gender, Phone)', category='danger')
@@ -307,7 +296,6 @@ def add_patient():
         return phone_str
     
     phone_formatted = format_phone(phone)
-    print(f"DEBUG: Original phone: {phone}, Formatted: {phone_formatted}")
     
     # Check if phone already exists BEFORE trying to create
     try:
@@ -319,8 +307,8 @@ def add_patient():
         if existing_patient:
             flash(f'Phone number {phone_formatted} is already registered to patient #{existing_patient["id"]} ({existing_patient["firstName"]} {existing_patient["lastName"]}). Please use a different phone number.', category='danger')
             return redirect(url_for('doctor.manage_patients'))
-    except Exception as e:
-        print(f"Error checking phone existence: {e}")
+    except Exception:
+        logger.exception("Error checking phone existence")
         # Continue anyway, the create_patient will catch it
     
     # Add patient to database
@@ -335,14 +323,12 @@ def add_patient():
             user_id=None
         )
         
-        print(f"DEBUG: Patient creation result: {patient}")
-        
         if patient:
-            print(f"DEBUG: Patient created successfully with ID: {patient.id}")
+            logger.info("Doctor user %s added patient %s", session.get('user_id'), patient.id)
             
             # If there are notes, create a medical record
             if notes:
-                doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+                doctor = identity.current_profile('doctor', doctor_repo)
                 if doctor:
                     try:
                         medical_repo.create_record(
@@ -354,9 +340,9 @@ def add_patient():
                             appointment_id=None,
                             uploaded_by_user_id=session.get('user_id')
                         )
-                        print(f"DEBUG: Medical record created for patient {patient.id}")
-                    except Exception as e:
-                        print(f"Error creating medical record: {e}")
+                        logger.debug("Initial medical record created for patient %s", patient.id)
+                    except Exception:
+                        logger.exception("Error creating medical record")
                         # Don't fail the whole operation
             
             flash(f'Patient {first_name} {last_name} added successfully! (ID: #{patient.id})', category='success')
@@ -364,11 +350,14 @@ def add_patient():
             flash('Failed to add patient. The phone number might already exist or there was a database error.', category='danger')
     
     except Exception as e:
-        print(f"Error in add_patient: {e}")
+        logger.exception("Error in add_patient")
         flash(f'Failed to create patient profile. Error: {str(e)}', category='danger')
     
     return redirect(url_for('doctor.manage_patients'))
 
+# Patients per page of search results
+SEARCH_PAGE_SIZE = 25
+
 @doctor_bp.route('/search_patient')
 def search_patient():
     """Allow doctors to search for patients."""
@@ -383,34 +372,34 @@ def search_patient():
     search_query = request.args.get('search', '').strip()
     
     # Get doctor info
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     
     # Initialize patients list
     patients = []
+    page = max(1, request.args.get('page', 1, type=int))
+    has_next = False
     
     # If there's a search query, search for patients
     if search_query:
-        # Use the repository search method
-        patients = patient_repo.search_patients(search_query)
+        # Use the repository search method (one extra row tells us if there is a next page)
+        patients = patient_repo.search_patients(
+            search_query, limit=SEARCH_PAGE_SIZE + 1, offset=(page - 1) * SEARCH_PAGE_SIZE
+        )
+        has_next = len(patients) > SEARCH_PAGE_SIZE
+        patients = patients[:SEARCH_PAGE_SIZE]
         
         if not patients:
             flash(f'No patients found for "{search_query}"', category='info')
     
     # Also get medical record counts for each patient
-    patient_records_count = {}
-    patient_last_visits = {}
-    
-    for patient in patients:
-        records_count = medical_repo.get_patient_records_count(patient.id)
-        patient_records_count[patient.id] = records_count
-        
-        last_visit = medical_repo.get_last_visit(patient.id)
-        patient_last_visits[patient.id] = last_visit
+    stats = medical_repo.get_stats_for_patients([p.id for p in patients]) if patients else {}
+    patient_records_count = {pid: s['records_count'] for pid, s in stats.items()}
+    patient_last_visits = {pid: s['last_visit'] for pid, s in stats.items()}
     
     # Get recent patients for the "initial state" section
     recent_patients = []
     if not search_query:  # Only get recent patients when not searching
-        recent_patients = patient_repo.get_all_patients()[:5] if hasattr(patient_repo, 'get_all_patients') else []
+        recent_patients = patient_repo.list_patients_page(page=1, per_page=5)
     
     return render_template('doctor/search_patient.html', 
                          search_query=search_query, 
@@ -418,7 +407,9 @@ def search_patient():
                          doctor=doctor,
                          patient_records_count=patient_records_count,
                          patient_last_visits=patient_last_visits,
-                         recent_patients=recent_patients)  # Add this
+                         recent_patients=recent_patients,
+                         page=page,
+                         has_next=has_next)
 
 @doctor_bp.route('/patients')
 def manage_patients():
@@ -426,11 +417,17 @@ def manage_patients():
         flash("Access denied.", category="danger")
         return redirect(url_for("auth.login"))
     
-    # Get all patients from repository
-    all_patients = patient_repo.get_all_patients()
-    
-    # Get statistics using repository methods
-    total_patients = len(all_patients) if all_patients else 0
+    # Paginate and sort in SQL instead of loading every patient
+    page = max(1, request.args.get('page', default=1, type=int))
+    per_page = min(max(1, request.args.get('per_page', default=25, type=int)), 100)
+    sort = request.args.get('sort', 'created')
+    if sort not in patient_repo.PAGE_SORTS:
+        sort = 'created'
+    direction = 'asc' if request.args.get('dir') == 'asc' else 'desc'
+
+    patients = patient_repo.list_patients_page(page, per_page, sort, direction)
+    total_patients = patient_repo.count_patients()
+    total_pages = max(1, (total_patients + per_page - 1) // per_page)
     
     # Get new patients this month using repository method
     new_this_month = patient_repo.get_new_patients_this_month()
@@ -440,7 +437,7 @@ def manage_patients():
     today_str = today.isoformat()
     
     # Get doctor info
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     
     # Get appointments for today
     appointments_today = []
@@ -457,23 +454,19 @@ def manage_patients():
                     appointment_ids_today.add(app.patient_id)
             active_today = len(appointment_ids_today)
     
-    # Get medical records data for each patient using repository methods
-    patient_records_count = {}
-    patient_last_visits = {}
-    
-    if all_patients:
-        for patient in all_patients:
-            # Get medical records count using repository method
-            records_count = medical_repo.get_patient_records_count(patient.id)
-            patient_records_count[patient.id] = records_count
-            
-            # Get last visit date using repository method
-            last_visit = medical_repo.get_last_visit(patient.id)
-            patient_last_visits[patient.id] = last_visit
-    
+    # Record count and last visit for the whole page in one GROUP BY query
+    stats = medical_repo.get_stats_for_patients([p.id for p in patients]) if patients else {}
+    patient_records_count = {pid: s['records_count'] for pid, s in stats.items()}
+    patient_last_visits = {pid: s['last_visit'] for pid, s in stats.items()}
+
     return render_template('doctor/manage_patients.html', 
-                         patients=all_patients,
+                         patients=patients,
                          total_patients=total_patients,
+                         page=page,
+                         per_page=per_page,
+                         total_pages=total_pages,
+                         sort=sort,
+                         direction=direction,
                          active_today=active_today,
                          appointments_count=appointments_count,
                          new_this_month=new_this_month,
@@ -497,7 +490,7 @@ def add_availability():
         flash('All fields are required.', category='danger')
         return redirect(url_for('doctor.schedule'))
 
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     av = availability_repo.create_availability(doctor.id, date, start_time, end_time)
     if av:
         flash('Availability added.', category='success')
@@ -526,7 +519,7 @@ def schedule():
         flash("Access denied.", category="danger")
         return redirect(url_for("auth.login"))
 
-    doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+    doctor = identity.current_profile('doctor', doctor_repo)
     if not doctor:
         flash('Doctor profile not found.', category='warning')
         return redirect(url_for('auth.dashboard'))
@@ -568,49 +561,50 @@ def schedule():
         })
 
     # -----------------------------
-    # Data
+    # Data (bounded to the visible week, or the filtered day)
     # -----------------------------
-    availability = availability_repo.list_by_doctor(doctor.id) or []
-    all_appointments = appointment_repo.get_by_doctor_id(doctor.id, None)
+    availability = availability_repo.list_by_doctor(
+        doctor.id, week_start_date.isoformat(), week_end_date.isoformat()
+    ) or []
+    week_appointments = appointment_repo.get_appointments_by_date_range(
+        doctor.id, week_start_date.isoformat(), week_end_date.isoformat()
+    ) or []
+    if filter_date:
+        listed_appointments = appointment_repo.get_appointments_by_date_range(
+            doctor.id, filter_date.isoformat(), filter_date.isoformat()
+        ) or []
+    else:
+        listed_appointments = week_appointments
 
     # -----------------------------
     # Filter appointments
     # -----------------------------
     appointments = []
-    for appointment in all_appointments:
+    for appointment in listed_appointments:
+        status = appointment.get('status')
         # Case-insensitive status filter
-        if status_filter != 'all' and appointment.status and appointment.status.lower() != status_filter.lower():
-            continue
-        if filter_date and appointment.date != filter_date:
+        if status_filter != 'all' and status and status.lower() != status_filter.lower():
             continue
 
-        patient = patient_repo.get_by_id(appointment.patient_id) if appointment.patient_id else None
-
+        has_patient = appointment.get('patient_first_name') is not None
         appointments.append({
-            'id': appointment.id,
-            'date': appointment.date,
-            'time': getattr(appointment, 'appointment_time', None),
-            'patient_id': appointment.patient_id,
+            'id': appointment['id'],
+            'date': appointment['date'],
+            'time': appointment.get('appointment_time'),
+            'patient_id': appointment.get('patient_id'),
             'patient': {
-                'firstName': patient.firstName,
-                'lastName': patient.lastName,
-                'phone': patient.phone
-            } if patient else None,
-            'type': getattr(appointment, 'type', 'regular'),
-            'status': appointment.status
+                'firstName': appointment.get('patient_first_name'),
+                'lastName': appointment.get('patient_last_name'),
+                'phone': appointment.get('patient_phone')
+            } if has_patient else None,
+            'type': appointment.get('type', 'regular'),
+            'status': status
         })
 
     # -----------------------------
     # Statistics
     # -----------------------------
-    today_appointments_count = sum(
-        1 for a in all_appointments if a.date == today
-    )
-
-    week_appointments_count = sum(
-        1 for a in all_appointments
-        if week_start_date <= a.date <= week_end_date
-    )
+    counts = appointment_repo.get_schedule_counts(doctor.id, today, week_start_date, week_end_date)
 
     # -----------------------------
     # Time slots
@@ -653,38 +647,26 @@ def schedule():
     # -----------------------------
     # Appointments on schedule (exclude cancelled/rejected - they should show as available)
     # -----------------------------
-    for appointment in all_appointments:
+    for appointment in week_appointments:
+        status = appointment.get('status')
         # Skip cancelled/rejected appointments - slot should be available again
-        if appointment.status and appointment.status.upper() in ['CANCELLED', 'REJECTED']:
+        if status and status.upper() in ['CANCELLED', 'REJECTED']:
             continue
-        
+
         # Convert date to ISO string format to match week_days keys
-        app_date = appointment.date.isoformat() if hasattr(appointment.date, 'isoformat') else str(appointment.date)
+        app_date = appointment['date'].isoformat() if hasattr(appointment['date'], 'isoformat') else str(appointment['date'])
         weekly_schedule.setdefault(app_date, {})
 
-        app_time = getattr(appointment, 'appointment_time', None)
+        # Already normalized to HH:MM by the repository
+        app_time = appointment.get('appointment_time')
         if app_time:
-            # Ensure time is in HH:MM format to match time_slots
-            if hasattr(app_time, 'strftime'):
-                app_time = app_time.strftime('%H:%M')
-            elif isinstance(app_time, str) and len(app_time) > 5:
-                # Trim seconds if present (HH:MM:SS -> HH:MM)
-                app_time = app_time[:5]
-            
-            patient = patient_repo.get_by_id(appointment.patient_id) if appointment.patient_id else None
-            patient_name = f"{patient.firstName} {patient.lastName}" if patient else "Unknown"
-
             weekly_schedule[app_date][app_time] = {
                 'type': 'appointment',
-                'appointment_id': appointment.id,
-                'patient_name': patient_name,
-                'status': appointment.status
+                'appointment_id': appointment['id'],
+                'patient_name': appointment.get('patient_name') or "Unknown",
+                'status': status
             }
 
-    pending_appointments_count = sum(
-        1 for a in all_appointments if a.status and a.status.upper() == 'PENDING'
-    )
-
     return render_template(
         'doctor/schedule.html',
         doctor=doctor,
@@ -692,15 +674,16 @@ def schedule():
         appointments=appointments,
         today=today.isoformat(),
         week_start=week_start_date.isoformat(),
+        week_end=week_end_date.isoformat(),
         week_days=week_days,
         time_slots=time_slots,
         weekly_schedule=weekly_schedule,
         filter_date=filter_date.isoformat() if filter_date else None,
         status_filter=status_filter,
-        today_appointments_count=today_appointments_count,
-        week_appointments_count=week_appointments_count,
+        today_appointments_count=counts['today'],
+        week_appointments_count=counts['week'],
         available_slots_count=len(availability),
-        pending_appointments_count=pending_appointments_count
+        pending_appointments_count=counts['pending']
     )
 
 @doctor_bp.app_template_filter('get_day_name')
@@ -748,12 +731,22 @@ def diagnose(pid):
 
     # Resolve doctor ID
     if session.get('role') == 'assistant':
-        assistant = RepositoryFactory.get_repository('assistant').get_by_user_id(session.get('user_id'))
+        assistant = identity.current_profile('assistant', RepositoryFactory.get_scoped_repository('assistant'))
         doctor_id = assistant.doctor_id if assistant else None
     else:
-        doctor = doctor_repo.get_by_user_id(session.get('user_id'))
+        doctor = identity.current_profile('doctor', doctor_repo)
         doctor_id = doctor.id if doctor else None
 
+    # Store the attachment first so a rejected upload doesn't leave a half-saved record
+    stored = None
+    file = request.files.get('file')
+    if file and file.filename:
+        try:
+            stored = upload_storage.get_storage().save(file.stream, file.filename, file.mimetype)
+        except upload_storage.UploadError as e:
+            flash(f"File not uploaded: {e}", category="danger")
+            return redirect(url_for('doctor.medical_file', pid=pid))
+
     # CREATE RECORD WITH OPTIONAL APPOINTMENT_ID
     record = medical_repo.create_record(
         patient_id=pid,
@@ -765,29 +758,17 @@ def diagnose(pid):
         uploaded_by_user_id=session.get('user_id')
     )
 
-    if record and 'file' in request.files:
-        file = request.files['file']
-        if file and file.filename:
-            filename = secure_filename(file.filename)
-            uploads_dir = os.path.join(current_app.static_folder, 'uploads')
-            os.makedirs(uploads_dir, exist_ok=True)
-            
-            # Use forward slashes for URL compatibility
-            filepath = os.path.join(uploads_dir, filename)
-            # Save the file
-            file.save(filepath)
-            
-            # Use forward slash for the relative path
-            rel_path = 'uploads/' + filename  # Use forward slash
-            
-            uploaded_repo.save_file(
-                filename, 
-                rel_path,  # Now uses forward slash
-                session.get('user_id'), 
-                record_id=record.id, 
-                patient_id=pid, 
-                file_type=file.mimetype
-            )
+    if record and stored:
+        uploaded_repo.save_file(
+            stored.original_name[:255],
+            stored.path,
+            session.get('user_id'), 
+            record_id=record.id, 
+            patient_id=pid, 
+            file_type=stored.mime_type,
+            sha256=stored.sha256,
+            size_bytes=stored.size_bytes
+        )
 
     if record:
         flash("Diagnosis saved successfully.", category="success")
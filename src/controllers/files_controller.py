@@ -0,0 +1,145 @@
+import os
+import unicodedata
+from urllib.parse import quote
+
+from flask import Blueprint, abort, current_app, flash, redirect, request, send_file, session, url_for
+
+from repositories.repositories_factory import RepositoryFactory
+from services import identity, upload_storage
+
+files_bp = Blueprint("files", __name__, url_prefix="/files")
+
+uploaded_repo = RepositoryFactory.get_scoped_repository("uploaded_file")
+patient_repo = RepositoryFactory.get_scoped_repository("patient")
+medical_repo = RepositoryFactory.get_scoped_repository("medical_record")
+
+# Clinic staff may open any patient's files; patients only their own
+STAFF_ROLES = ("doctor", "assistant", "admin")
+
+# Content-addressed files never change, so browsers may keep them privately
+PRIVATE_MAX_AGE = 3600
+
+
+@files_bp.before_app_request
+def block_static_uploads():
+    """Uploads are only served through download(), never as public static files."""
+    if request.endpoint == "static" and (request.view_args or {}).get("filename", "").startswith("uploads/"):
+        abort(404)
+
+
+def _can_access(uploaded):
+    role = session.get("role")
+    if role in STAFF_ROLES:
+        return True
+    if role != "patient":
+        return False
+    patient = identity.current_profile("patient", patient_repo)
+    if not patient:
+        return False
+    patient_id = uploaded.patient_id
+    if patient_id is None and uploaded.record_id:
+        record = medical_repo.get_by_id(uploaded.record_id)
+        patient_id = record.patient_id if record else None
+    return patient_id == patient.id
+
+
+def _load_accessible(file_id):
+    """The UploadedFile the current user may open, or abort with 404."""
+    uploaded = uploaded_repo.get_by_id(file_id)
+    if not uploaded or not _can_access(uploaded):
+        abort(404)
+    return uploaded
+
+
+def _login_redirect():
+    flash("Please log in first.", category="info")
+    return redirect(url_for("auth.login"))
+
+
+@files_bp.route("/<int:file_id>")
+def download(file_id):
+    """Serve an uploaded file with Range, ETag and conditional GET support.
+
+    With FILES_OFFLOAD=x-accel the response only carries an X-Accel-Redirect
+    header and nginx streams the bytes; x-sendfile does the same for
+    Apache/lighttpd.
+    """
+    if not session.get("user_id"):
+        return _login_redirect()
+
+    uploaded = _load_accessible(file_id)
+    return _send_stored(
+        uploaded.file_path,
+        etag=uploaded.sha256,
+        download_name=uploaded.original_name,
+        mimetype=uploaded.file_type or None,
+        as_attachment=request.args.get("download") == "1",
+    )
+
+
+@files_bp.route("/<int:file_id>/thumbnail", defaults={"kind": "thumbnail"})
+@files_bp.route("/<int:file_id>/preview", defaults={"kind": "preview"})
+def preview(file_id, kind):
+    """Serve the small JPEG rendered by services/thumbnails.py."""
+    if not session.get("user_id"):
+        return _login_redirect()
+
+    uploaded = _load_accessible(file_id)
+    stored_path = uploaded.thumbnail_path if kind == "thumbnail" else uploaded.preview_path
+    if not stored_path:
+        abort(404)
+    return _send_stored(
+        stored_path,
+        etag=f"{uploaded.sha256}-{kind}" if uploaded.sha256 else None,
+        mimetype="image/jpeg",
+    )
+
+
+def _send_stored(stored_path, etag=None, download_name=None, mimetype=None, as_attachment=False):
+    storage = upload_storage.get_storage()
+    path = storage.locate(stored_path)
+    if not path:
+        abort(404)
+
+    download_name = download_name or os.path.basename(path)
+
+    if current_app.config.get("FILES_OFFLOAD") == "x-accel" and path.startswith(storage.root + os.sep):
+        response = _accel_redirect(storage, path, etag, download_name, mimetype, as_attachment)
+    else:
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            as_attachment=as_attachment,
+            download_name=download_name,
+            conditional=True,
+            etag=etag or True,
+            max_age=None,
+        )
+
+    if etag:
+        response.cache_control.no_cache = None
+        response.cache_control.private = True
+        response.cache_control.max_age = PRIVATE_MAX_AGE
+    else:
+        response.cache_control.private = True
+    return response
+
+
+def _accel_redirect(storage, path, etag, download_name, mimetype, as_attachment):
+    """Hand the transfer to nginx; it serves Range requests from the internal location."""
+    response = current_app.response_class(mimetype=mimetype or "application/octet-stream")
+    if etag:
+        response.set_etag(etag)
+        if request.if_none_match.contains(etag):
+            response.status_code = 304
+            return response
+    rel_path = os.path.relpath(path, storage.root).replace(os.sep, "/")
+    response.headers["X-Accel-Redirect"] = current_app.config["FILES_ACCEL_PREFIX"].rstrip("/") + "/" + rel_path
+    disposition = {"filename": download_name}
+    try:
+        download_name.encode("ascii")
+    except UnicodeEncodeError:
+        ascii_name = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        disposition = {"filename": ascii_name or "download", "filename*": f"UTF-8''{quote(download_name, safe='')}"}
+    response.headers.set("Content-Disposition", "attachment" if as_attachment else "inline", **disposition)
+    return response
@@ -1,17 +1,21 @@
+import logging
 from flask import Blueprint, flash, redirect, render_template, request, session, url_for, jsonify
+import math
 import os
-from datetime import datetime
-import requests
+from datetime import datetime, timedelta
 import json
 
 from repositories.repositories_factory import RepositoryFactory
+from services import chat as chat_service, identity
+
+logger = logging.getLogger(__name__)
 
 patient_bp = Blueprint("patient", __name__, url_prefix="/patient")
 
-user_repo = RepositoryFactory.get_repository("user")
-patient_repo = RepositoryFactory.get_repository("patient")
-appointment_repo = RepositoryFactory.get_repository("appointment")
-doctor_repo = RepositoryFactory.get_repository("doctor")
+user_repo = RepositoryFactory.get_scoped_repository("user")
+patient_repo = RepositoryFactory.get_scoped_repository("patient")
+appointment_repo = RepositoryFactory.get_scoped_repository("appointment")
+doctor_repo = RepositoryFactory.get_scoped_repository("doctor")
 
 
 @patient_bp.route("/")
@@ -20,7 +24,7 @@ def patient_home():
         flash("Please log in to access the patient area.", category="info")
         return redirect(url_for("auth.login"))
     
-    patient = patient_repo.get_by_user_id(session.get("user_id"))
+    patient = identity.current_profile("patient", patient_repo)
     if not patient:
         flash("Patient profile not found.", category="warning")
         return redirect(url_for("auth.dashboard"))
@@ -35,10 +39,9 @@ def patient_home():
     # Get medical history/records
     medical_history = []  # For now, empty list
     
-    # Debug: Print appointment statuses
-    print(f"DEBUG: Found {len(all_appointments) if all_appointments else 0} total appointments")
-    print(f"DEBUG: Found {len(upcoming_appointments)} upcoming appointments")
-    print(f"DEBUG: Found {len(completed_appointments)} completed appointments")
+    logger.debug("Patient %s home: %d appointments, %d upcoming, %d completed",
+                 patient.id, len(all_appointments or []), len(upcoming_appointments or []),
+                 len(completed_appointments or []))
     
     return render_template("patient/patient_home.html", 
                          patient=patient, 
@@ -53,7 +56,7 @@ def appointments():
         flash("Please log in to access appointments.", category="info")
         return redirect(url_for("auth.login"))
     
-    patient = patient_repo.get_by_user_id(session.get("user_id"))
+    patient = identity.current_profile("patient", patient_repo)
     if not patient:
         flash("Patient profile not found.", category="warning")
         return redirect(url_for("auth.dashboard"))
@@ -165,68 +168,87 @@ def doctor_slots_api(doctor_id):
         slots = []
     return jsonify({'slots': slots})
 
+# Bounds for the slot search API
+SLOT_SEARCH_MAX_DAYS = 31
+SLOT_SEARCH_MAX_DOCTORS = 50
+
+@patient_bp.route('/api/slots/search')
+def slot_search_api():
+    """Free slots for several doctors (or a specialization) across a date range.
+
+    Query args: doctor_id (repeatable or comma-separated), specialization,
+    start/end (YYYY-MM-DD, default today + 14 days) and limit for the N
+    earliest slots.
+    """
+    if not session.get("user_id"):
+        return jsonify({"error": "Not authenticated"}), 401
+
+    doctor_ids = set()
+    for value in request.args.getlist('doctor_id'):
+        for part in value.split(','):
+            if part.strip().isdigit():
+                doctor_ids.add(int(part))
+    specialization = request.args.get('specialization')
+    if specialization:
+        doctor_ids.update(d.id for d in doctor_repo.list_by_specialization(specialization))
+    if not doctor_ids:
+        return jsonify({'error': 'doctor_id or specialization parameter required'}), 400
+    if len(doctor_ids) > SLOT_SEARCH_MAX_DOCTORS:
+        return jsonify({'error': f'at most {SLOT_SEARCH_MAX_DOCTORS} doctors per search'}), 400
+
+    today = datetime.now().date()
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else today
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else start + timedelta(days=13)
+    except ValueError:
+        return jsonify({'error': 'dates must be YYYY-MM-DD'}), 400
+    start = max(start, today)
+    end = min(end, start + timedelta(days=SLOT_SEARCH_MAX_DAYS - 1))
+    if end < start:
+        return jsonify({'slots': [], 'start': start.isoformat(), 'end': end.isoformat()})
+
+    limit = request.args.get('limit', type=int)
+    slots = appointment_repo.find_free_slots(
+        sorted(doctor_ids), start.isoformat(), end.isoformat(),
+        limit=limit if limit and limit > 0 else None,
+        not_before=datetime.now(),
+    )
+    return jsonify({'slots': slots, 'start': start.isoformat(), 'end': end.isoformat()})
+
 @patient_bp.route("/diagnosis")
 def diagnosis():
     if not session.get("user_id"):
         flash("Please log in to access medical history.", category="info")
         return redirect(url_for("auth.login"))
     
-    patient = patient_repo.get_by_user_id(session.get("user_id"))
+    patient = identity.current_profile("patient", patient_repo)
     if not patient:
         flash("Patient profile not found.", category="warning")
         return redirect(url_for("auth.dashboard"))
     
-    # Load medical records
-    medical_repo = RepositoryFactory.get_repository("medical_record")
-    uploaded_repo = RepositoryFactory.get_repository("uploaded_file")
-    doctor_repo = RepositoryFactory.get_repository("doctor")
+    # Load medical records with doctor names and files in one go
+    medical_repo = RepositoryFactory.get_scoped_repository("medical_record")
 
-    records = medical_repo.get_records_by_patient(patient.id)
+    records = medical_repo.get_patient_chart(patient.id)
     diagnosis_list = []
     
     for r in records:
-        doc = doctor_repo.get_by_id(r.doctor_id) if r.doctor_id else None
-        
-        # Get files for this record
-        files = []
-        if r.id:
-            try:
-                files = uploaded_repo.get_files_by_record(r.id) or []
-            except Exception as e:
-                print(f"Error getting files for record {r.id}: {e}")
-        
-        # Get diagnosis text
-        diagnosis_text = r.diagnosis if hasattr(r, 'diagnosis') else "No diagnosis provided"
-        
-        # Get upload date
-        if hasattr(r, 'upload_date'):
-            upload_date = r.upload_date
-        elif hasattr(r, 'created_at'):
-            upload_date = r.created_at
-        else:
-            upload_date = "Unknown date"
-        
-        # Prepare file data - FIXED HERE
         files_data = []
-        for f in files:
-            if hasattr(f, 'file_path'):
-                # Extract filename from path
-                filename = os.path.basename(f.file_path)
-                # Always use static URL for files
-                file_url = url_for('static', filename='uploads/' + filename)
-                
+        for f in r.files:
+            if f.file_path:
                 files_data.append({
-                    "filename": filename,
-                    "file_path": file_url  # This will be /static/uploads/filename.jpg
+                    "filename": f.original_name or os.path.basename(f.file_path.replace('\\', '/')),
+                    "file_path": url_for('files.download', file_id=f.id),
+                    "thumbnail_url": url_for('files.preview', file_id=f.id, kind='thumbnail') if f.thumbnail_path else None,
                 })
         
         diagnosis_list.append({
-            "id": r.id if hasattr(r, 'id') else None,
-            "date": upload_date,
-            "doctor_name": f"Dr. {doc.firstName} {doc.lastName}" if doc else "Unknown Doctor",
-            "text": diagnosis_text,
-            "treatment": r.treatment if hasattr(r, 'treatment') else "",
-            "followup": r.follow_up_date if hasattr(r, 'follow_up_date') else None,
+            "id": r.id,
+            "date": r.upload_date or r.created_at or "Unknown date",
+            "doctor_name": f"Dr. {r.doctor_name}" if r.doctor_name else "Unknown Doctor",
+            "text": r.diagnosis or "No diagnosis provided",
+            "treatment": r.treatment or "",
+            "followup": r.follow_up_date,
             "files": files_data,
         })
     
@@ -240,6 +262,7 @@ def profile():
         flash("Please log in to access profile.", category="info")
         return redirect(url_for("auth.login"))
     
+    # Full profile row: the cached identity only has the id and name
     patient = patient_repo.get_by_user_id(session.get("user_id"))
     if not patient:
         flash("Patient profile not found.", category="warning")
@@ -265,7 +288,7 @@ def cancel_appointment(id):
         flash("Please log in.", category="info")
         return redirect(url_for("auth.login"))
     
-    patient = patient_repo.get_by_user_id(session.get("user_id"))
+    patient = identity.current_profile("patient", patient_repo)
     if not patient:
         flash("Patient profile not found.", category="warning")
         return redirect(url_for("auth.dashboard"))
@@ -279,131 +302,26 @@ def cancel_appointment(id):
 
 @patient_bp.route("/api/chat", methods=["POST"])
 def chat():
-    """AI-powered chat endpoint using Hugging Face's free API"""
+    """Chat assistant: cached, rate-limited, falls back to local answers (see services/chat.py)"""
     if not session.get("user_id"):
         return jsonify({"error": "Unauthorized"}), 401
     
-    try:
-        data = request.get_json()
-        user_message = data.get("message", "").strip()
-        
-        if not user_message:
-            return jsonify({"error": "Message is required"}), 400
-        
-        # Hugging Face Inference API (free tier)
-        # Using a smaller, faster model for medical assistance
-        API_URL = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-medium"
-        
-        # Alternative models you can use (all free):
-        # "facebook/blenderbot-400M-distill" - Good for conversations
-        # "microsoft/DialoGPT-medium" - Dialogue model
-        # "google/flan-t5-base" - General Q&A
-        
-        # You can get a free token from huggingface.co (optional but recommended)
-        # For now, we'll use the public API (limited rate but functional)
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
-        # Add medical context to make responses more relevant
-        context = f"""You are a helpful medical assistant chatbot for a clinic management system. 
-        You can help patients with:
-        - Booking appointments
-        - Understanding medical terms
-        - General health information
-        - Clinic hours and services
-        
-        Patient question: {user_message}
-        
-        Provide a helpful, concise response:"""
-        
-        payload = {
-            "inputs": context,
-            "parameters": {
-                "max_length": 150,
-                "temperature": 0.7,
-                "return_full_text": False
-            }
-        }
-        
-        # Make request to Hugging Face API
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            # Extract the response text
-            if isinstance(result, list) and len(result) > 0:
-                bot_response = result[0].get("generated_text", "")
-            else:
-                bot_response = result.get("generated_text", "")
-            
-            # Fallback responses if API doesn't return valid text
-            if not bot_response or len(bot_response.strip()) < 5:
-                bot_response = get_fallback_response(user_message)
-            
-            return jsonify({
-                "response": bot_response,
-                "timestamp": datetime.now().isoformat()
-            })
-        
-        elif response.status_code == 503:
-            # Model is loading - provide fallback
-            return jsonify({
-                "response": get_fallback_response(user_message),
-                "timestamp": datetime.now().isoformat(),
-                "note": "AI model is loading, using fallback response"
-            })
-        
-        else:
-            # API error - use fallback
-            return jsonify({
-                "response": get_fallback_response(user_message),
-                "timestamp": datetime.now().isoformat()
-            })
-            
-    except requests.exceptions.Timeout:
-        return jsonify({
-            "response": get_fallback_response(user_message),
-            "timestamp": datetime.now().isoformat()
-        })
-    
-    except Exception as e:
-        print(f"Chat error: {str(e)}")
-        return jsonify({
-            "response": get_fallback_response(user_message),
-            "timestamp": datetime.now().isoformat()
-        }), 200
-
-
-def get_fallback_response(message):
-    """Provide intelligent fallback responses when AI is unavailable"""
-    message_lower = message.lower()
-    
-    # Appointment related
-    if any(word in message_lower for word in ["appointment", "book", "schedule"]):
-        return "To book an appointment, please click on 'Book Appointment' button above or visit the Appointments page. You can choose your preferred doctor and time slot."
-    
-    # Hours and contact
-    elif any(word in message_lower for word in ["hour", "time", "open", "close", "contact"]):
-        return "Our clinic is open Monday-Friday: 8:00 AM - 8:00 PM. For urgent inquiries, call us at +123 456 7890 or email support@medicareclinic.com"
+    data = request.get_json(silent=True) or {}
+    user_message = str(data.get("message") or "").strip()
+    if not user_message:
+        return jsonify({"error": "Message is required"}), 400
     
-    # Medical records
-    elif any(word in message_lower for word in ["record", "history", "document"]):
-        return "You can view your medical records and history by visiting the 'Medical History' section from the sidebar menu."
-    
-    # Profile
-    elif any(word in message_lower for word in ["profile", "update", "information"]):
-        return "To update your profile information, please go to the 'Profile' section from the sidebar menu."
-    
-    # Doctors
-    elif any(word in message_lower for word in ["doctor", "specialist", "physician"]):
-        return "You can view all available doctors and their specialties when booking an appointment. Each doctor's profile includes their specialization and available time slots."
-    
-    # General greeting
-    elif any(word in message_lower for word in ["hello", "hi", "hey", "help"]):
-        return "Hello! I'm here to help you with appointments, medical records, and general clinic information. How can I assist you today?"
+    try:
+        reply = chat_service.get_service().reply(session["user_id"], user_message)
+    except chat_service.RateLimited as e:
+        response = jsonify({"error": "You're sending messages too quickly. Please wait a moment."})
+        response.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after)))
+        return response, 429
     
-    # Default response
-    else:
-        return "I'm here to help! You can ask me about booking appointments, clinic hours, medical records, or any general questions about our services. What would you like to know?"
\ No newline at end of file
+    body = {
+        "response": reply.text,
+        "timestamp": datetime.now().isoformat()
+    }
+    if reply.note:
+        body["note"] = reply.note
+    return jsonify(body)
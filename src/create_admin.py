@@ -1,4 +1,5 @@
 from werkzeug.security import generate_password_hash
+from database.db_singleton import DatabaseConnection
 from repositories.repositories_factory import RepositoryFactory
 user_repo = RepositoryFactory.get_repository("user")
 
@@ -39,6 +40,9 @@ def create_admin_user():
 
     except Exception as e:
         print(f"❌ ERROR: {e}")
+    finally:
+        # Outside a request the repository's connection is pinned to this thread
+        DatabaseConnection().release_thread_connection()
 
 if __name__ == "__main__":
     create_admin_user()
\ No newline at end of file
@@ -3,13 +3,11 @@ import os
 from dotenv import load_dotenv
 from flask import Flask
 
-from controllers.assistant_controller import assistant_bp
-from controllers.authO_controller import authO_bp
-from controllers.doctor_controller import doctor_bp
-from controllers.patient_controller import patient_bp
-from controllers.admin_controller import admin_bp
-from database.db_singleton import DatabaseConnection
+from database import instrumentation
 from repositories.repositories_factory import RepositoryFactory
+from repositories import unit_of_work
+from services import audit_log, chat, doctor_directory, session_store, thumbnails, upload_storage
+from utils import logging_config
 
 def create_app(config_name=None):
     """
@@ -33,21 +31,76 @@ def create_app(config_name=None):
     else:
         # Default configuration
         app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "dev-secret-key")
-        app.config['DEBUG'] = os.getenv("FLASK_DEBUG", "True").lower() == "true"
+        app.config['DEBUG'] = os.getenv("FLASK_DEBUG", "False").lower() == "true"
     
-    # 3. Initialize database connection
-    db_conn = DatabaseConnection()
-    # Only ensure schema in non-testing environments
-    if config_name != 'testing':
-        # db_conn.ensure_schema()  # Uncomment if needed
-        pass
+    # Sessions live server-side; the cookie only holds a random id. "memory",
+    # "sqlite" (shared by all workers on a host), "redis" or "cookie" (Flask default)
+    app.config['SESSION_BACKEND'] = os.getenv("SESSION_BACKEND", "memory" if app.testing else "sqlite").lower()
+    app.config['SESSION_SQLITE_PATH'] = (os.getenv("SESSION_SQLITE_PATH")
+                                         or os.path.join(app.instance_path, 'sessions.sqlite3'))
+    app.config['SESSION_REDIS_URL'] = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+    session_store.init_app(app)
+    
+    # Leveled JSON logs written from a background thread (LOG_LEVEL, LOG_FORMAT)
+    logging_config.init_app(app)
+    
+    # Uploaded medical files: content-addressed in a private folder, size-capped and
+    # only served through /files/<id> (see controllers/files_controller.py)
+    app.config['UPLOAD_ROOT'] = os.getenv("UPLOAD_ROOT") or os.path.join(app.root_path, 'uploads')
+    app.config['UPLOAD_LEGACY_ROOTS'] = (os.path.join(app.static_folder, 'uploads'),)
+    app.config['UPLOAD_MAX_BYTES'] = int(os.getenv("UPLOAD_MAX_BYTES", upload_storage.DEFAULT_MAX_BYTES))
+    # Reject oversized requests before the body is read (1 MB of slack for the form fields)
+    app.config['MAX_CONTENT_LENGTH'] = app.config['UPLOAD_MAX_BYTES'] + 1024 * 1024
+    upload_storage.init_app(app)
+    # "" (Flask streams the file), "x-accel" (nginx) or "x-sendfile" (Apache/lighttpd)
+    app.config['FILES_OFFLOAD'] = os.getenv("FILES_OFFLOAD", "").lower()
+    app.config['FILES_ACCEL_PREFIX'] = os.getenv("FILES_ACCEL_PREFIX", "/protected-uploads/")
+    app.config['USE_X_SENDFILE'] = app.config['FILES_OFFLOAD'] == "x-sendfile"
+    # Background threads rendering upload thumbnails/previews (0 disables them)
+    app.config['THUMBNAIL_WORKERS'] = int(os.getenv("THUMBNAIL_WORKERS", thumbnails.DEFAULT_WORKERS))
+    thumbnails.init_app(app)
+    
+    # Audit entries queue up and a background thread writes them in batches
+    # (AUDIT_QUEUE_SIZE=0 writes each one inline)
+    app.config['AUDIT_QUEUE_SIZE'] = int(os.getenv("AUDIT_QUEUE_SIZE", audit_log.DEFAULT_QUEUE_SIZE))
+    app.config['AUDIT_BATCH_SIZE'] = int(os.getenv("AUDIT_BATCH_SIZE", audit_log.DEFAULT_BATCH_SIZE))
+    audit_log.init_app(app)
+    
+    # Cached doctor list/specializations; templates get doctor_directory_version
+    doctor_directory.init_app(app)
+    
+    # Patient chat assistant: upstream inference API behind a response cache, a
+    # per-user rate limit and a circuit breaker; "local" answers offline
+    app.config['CHAT_BACKEND'] = os.getenv("CHAT_BACKEND", "local" if app.testing else "huggingface").lower()
+    app.config['CHAT_API_URL'] = os.getenv("CHAT_API_URL", chat.DEFAULT_API_URL)
+    app.config['CHAT_API_TOKEN'] = os.getenv("CHAT_API_TOKEN", "")
+    app.config['CHAT_TIMEOUT'] = (float(os.getenv("CHAT_CONNECT_TIMEOUT", "3.05")),
+                                  float(os.getenv("CHAT_READ_TIMEOUT", "8")))
+    app.config['CHAT_MAX_INFLIGHT'] = int(os.getenv("CHAT_MAX_INFLIGHT", "4"))
+    app.config['CHAT_CACHE_TTL'] = float(os.getenv("CHAT_CACHE_TTL", "3600"))
+    app.config['CHAT_CACHE_SIZE'] = int(os.getenv("CHAT_CACHE_SIZE", "1024"))
+    app.config['CHAT_RATE_PER_MINUTE'] = float(os.getenv("CHAT_RATE_PER_MINUTE", "10"))
+    app.config['CHAT_BURST'] = int(os.getenv("CHAT_BURST", "5"))
+    app.config['CHAT_BREAKER_FAILURES'] = int(os.getenv("CHAT_BREAKER_FAILURES", "3"))
+    app.config['CHAT_BREAKER_RESET'] = float(os.getenv("CHAT_BREAKER_RESET", "30"))
+    chat.init_app(app)
+    
+    # Query counts/latency per request: Server-Timing header, logs, /admin/perf and budgets
+    app.config['PERF_INSTRUMENTATION'] = os.getenv("PERF_INSTRUMENTATION", "1").lower() in ("1", "true", "yes", "on")
+    app.config['PERF_PAGE_ENABLED'] = os.getenv("PERF_PAGE_ENABLED", "0").lower() in ("1", "true", "yes", "on")
+    app.config['SLOW_QUERY_MS'] = float(os.getenv("SLOW_QUERY_MS", "100"))
+    app.config['QUERY_BUDGET_DEFAULT'] = int(os.getenv("QUERY_BUDGET_DEFAULT", "0"))
+    app.config['QUERY_BUDGETS'] = instrumentation.parse_budgets(os.getenv("QUERY_BUDGETS", ""))
+    # Tests fail loudly when a page blows its budget; production only logs it
+    app.config['QUERY_BUDGET_STRICT'] = app.config.get('TESTING', False)
+    instrumentation.init_app(app)
+
+    # 3. Database: nothing connects here. One pooled connection + transaction
+    # per request is checked out on first use and finished on teardown.
+    unit_of_work.init_app(app)
     
     # 4. Register blueprints
-    app.register_blueprint(authO_bp)
-    app.register_blueprint(patient_bp)
-    app.register_blueprint(doctor_bp)
-    app.register_blueprint(assistant_bp)
-    app.register_blueprint(admin_bp)
+    register_blueprints(app)
     
     # 5. Register routes
     from flask import render_template, request, flash, redirect, url_for
@@ -64,7 +117,7 @@ def create_app(config_name=None):
     def contact():
         """Contact page"""
         if request.method == 'POST':
-            contact_repo = RepositoryFactory.get_repository('contact')
+            contact_repo = RepositoryFactory.get_scoped_repository('contact')
             
             name = request.form.get('name', '').strip()
             email = request.form.get('email', '').strip()
@@ -80,4 +133,25 @@ def create_app(config_name=None):
         return render_template('home/contact.html')
     
     # 6. Return the configured application
-    return app
\ No newline at end of file
+    return app
+
+
+def register_blueprints(app):
+    """Import and register the controllers.
+
+    Imported here rather than at module level so importing this module stays
+    cheap; controller modules only define routes and lazy repository handles.
+    """
+    from controllers.admin_controller import admin_bp
+    from controllers.assistant_controller import assistant_bp
+    from controllers.authO_controller import authO_bp
+    from controllers.doctor_controller import doctor_bp
+    from controllers.files_controller import files_bp
+    from controllers.patient_controller import patient_bp
+
+    app.register_blueprint(authO_bp)
+    app.register_blueprint(patient_bp)
+    app.register_blueprint(doctor_bp)
+    app.register_blueprint(assistant_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(files_bp)
@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of database connections.
+
+    Connections are created on demand up to ``max_size``, handed out LIFO so
+    the warmest socket is reused first, health-checked on borrow and recycled
+    once they are older than ``max_lifetime`` seconds.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=5.0,
+                 max_lifetime=1800, health_check=True):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+
+        self._cond = threading.Condition()
+        self._idle = deque()          # (connection, created_at)
+        self._created_at = {}         # id(connection) -> created_at
+        self._size = 0                # idle + checked out
+        self._closed = False
+        self._warmed = False
+
+    # ------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------
+    def acquire(self, timeout=None):
+        """Borrow a connection, waiting up to ``timeout`` seconds for one."""
+        self._warm_up()
+        wait = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait
+
+        while True:
+            conn = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No database connection available after {wait:.1f}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+            if conn is None:
+                return self._open()
+
+            if self._is_expired(conn) or not self._is_healthy(conn):
+                self._discard(conn)
+                continue
+            return conn
+
+    def release(self, conn):
+        """Return a borrowed connection to the pool."""
+        if conn is None:
+            return
+
+        try:
+            if getattr(conn, "in_transaction", False):
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        if self._closed or self._is_expired(conn):
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, self._created_at.get(id(conn), time.monotonic())))
+            self._cond.notify()
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _open(self):
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _is_expired(self, conn):
+        if not self.max_lifetime:
+            return False
+        created = self._created_at.get(id(conn))
+        return created is not None and time.monotonic() - created > self.max_lifetime
+
+    def _is_healthy(self, conn):
+        if not self.health_check:
+            return True
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    def _warm_up(self):
+        """Open ``min_size`` connections the first time the pool is used."""
+        if self._warmed:
+            return
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+
+        for _ in range(missing):
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                continue
+            self._created_at[id(conn)] = time.monotonic()
+            with self._cond:
+                self._idle.append((conn, self._created_at[id(conn)]))
+                self._cond.notify()
@@ -1,16 +1,36 @@
+import logging
 import os
+import threading
 import time
-import mysql.connector
+from contextlib import contextmanager
+
 from dotenv import load_dotenv
-from mysql.connector import Error
+from flask import g, has_app_context
+
+from database.connection_pool import ConnectionPool, PoolTimeoutError
+from database.instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
 
 
 class DatabaseConnection:
-    """Singleton MySQL connection used across the application."""
+    """Process-wide entry point to MySQL.
+
+    In pool mode (the default, ``DB_POOL_ENABLED=1``) every request checks a
+    connection out of a shared :class:`ConnectionPool` and hands it back on
+    app-context teardown. With the pool disabled the legacy behaviour of one
+    shared connection is kept.
+    """
 
     _instance = None
     _connection = None
     _initialized = False
+    _pool = None
+    _pool_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -25,53 +45,158 @@ class DatabaseConnection:
 
         self._config = {
             "host": os.getenv("DB_HOST"),
-            "port": int(os.getenv("DB_PORT")),
+            "port": int(os.getenv("DB_PORT", "3306")),
             "user": os.getenv("DB_USER"),
             "password": os.getenv("DB_PASSWORD"),
             "database": os.getenv("DB_NAME"),
         }
 
+        # Pool settings
+        self._pool_enabled = _env_flag("DB_POOL_ENABLED", "1")
+        self._pool_config = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            "health_check": _env_flag("DB_POOL_PRE_PING", "1"),
+        }
+
+        # Connections borrowed outside a request (scripts, CLI) stay bound to
+        # the calling thread until release_thread_connection() is called.
+        self._local = threading.local()
+
         # If running tests, avoid attempting a real DB connection
         self._testing = os.getenv('TESTING') == '1'
-        
+
         DatabaseConnection._initialized = True
-        
+
         # DO NOT CONNECT HERE! Let it be lazy-loaded
 
+    # ------------------------------------------------------------------
+    # Pool mode
+    # ------------------------------------------------------------------
+    def _open_connection(self):
+        """Open a single connection; used as the pool's connection factory."""
+        import mysql.connector
+
+        timeout = max(1, int(self._pool_config["timeout"]))
+        return mysql.connector.connect(**self._config, connection_timeout=timeout)
+
+    def get_pool(self):
+        """Create the shared pool on first use."""
+        if DatabaseConnection._pool is None:
+            with DatabaseConnection._pool_lock:
+                if DatabaseConnection._pool is None:
+                    DatabaseConnection._pool = ConnectionPool(self._open_connection, **self._pool_config)
+        return DatabaseConnection._pool
+
+    def acquire(self):
+        """Check a connection out of the pool (caller must release it)."""
+        return self.get_pool().acquire()
+
+    def release(self, conn):
+        """Return a connection obtained with acquire()."""
+        if conn is not None and DatabaseConnection._pool is not None:
+            DatabaseConnection._pool.release(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of a ``with`` block.
+
+        Intended for code that runs outside a request, such as background
+        threads, which must never share the request's connection.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def _request_connection(self):
+        """Connection bound to the current app context, checked out lazily."""
+        conn = g.get('_db_connection')
+        if conn is None:
+            conn = self.acquire()
+            g._db_connection = conn
+        return conn
+
+    def _thread_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.acquire()
+            self._local.conn = conn
+        return conn
+
+    def release_request_connection(self, exc=None):
+        """Teardown hook: give the request's connection back to the pool."""
+        conn = g.pop('_db_connection', None)
+        if conn is not None:
+            self.release(conn)
+
+    def release_thread_connection(self):
+        """Give back the connection get_connection() pinned to this thread, if any.
+
+        Scripts that use repositories outside a request call this when done.
+        """
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        self.release(conn)
+
+    # ------------------------------------------------------------------
+    # Legacy single-connection mode
+    # ------------------------------------------------------------------
     def _connect_with_retry(self, max_retries=5, retry_delay=5):
         """Attempt to connect with retries"""
+        import mysql.connector
+        from mysql.connector import Error
+
         for attempt in range(max_retries):
             try:
                 DatabaseConnection._connection = mysql.connector.connect(**self._config)
-                print(f"✅ Database connected successfully (attempt {attempt + 1}/{max_retries})")
+                logger.info("Database connected (attempt %d/%d)", attempt + 1, max_retries)
                 return True
             except Error as e:
-                print(f"⚠️  Database connection attempt {attempt + 1}/{max_retries} failed: {e}")
+                logger.warning("Database connection attempt %d/%d failed: %s", attempt + 1, max_retries, e)
                 if attempt < max_retries - 1:
-                    print(f"⏳ Retrying in {retry_delay} seconds...")
                     time.sleep(retry_delay)
                 else:
-                    print(f"❌ Failed to connect after {max_retries} attempts")
+                    logger.error("Failed to connect to the database after %d attempts", max_retries)
                     return False
         return False
 
     def get_connection(self, max_retries=5, retry_delay=5):
-        """Lazy-load connection with retry logic"""
+        """Return the connection the caller should use right now.
+
+        Pool mode: the connection checked out for the current request (or
+        the current thread when called outside a request). Legacy mode: the
+        shared connection, lazily (re)connected with retry logic.
+        """
         # During tests, return None
         if self._testing:
             return None
-            
+
+        if self._pool_enabled:
+            from mysql.connector import Error
+
+            try:
+                if has_app_context():
+                    return instrument(self._request_connection())
+                return self._thread_connection()
+            except (Error, PoolTimeoutError) as e:
+                logger.error("Database connection unavailable: %s", e)
+                return None
+
         # If already connected, return connection
-        if (DatabaseConnection._connection is not None and 
+        if (DatabaseConnection._connection is not None and
             DatabaseConnection._connection.is_connected()):
-            return DatabaseConnection._connection
-        
+            return instrument(DatabaseConnection._connection)
+
         # Try to connect
         if self._connect_with_retry(max_retries, retry_delay):
-            return DatabaseConnection._connection
-        
+            return instrument(DatabaseConnection._connection)
+
         # Connection failed - return None but don't crash
-        print("⚠️  Database connection unavailable, but continuing...")
+        logger.error("Database connection unavailable, continuing without one")
         return None
 
     def get_cursor(self, dictionary=False):
@@ -83,9 +208,26 @@ class DatabaseConnection:
             # Return a dummy cursor or raise a more specific error
             raise RuntimeError("Database connection not available")
 
+    @classmethod
+    def reset_after_fork(cls):
+        """Forget connections inherited from the parent process.
+
+        Called in each forked server worker. The inherited sockets are left
+        alone rather than closed (closing them would also end the parent's
+        sessions); the worker lazily opens a pool of its own.
+        """
+        cls._pool = None
+        cls._connection = None
+        cls._pool_lock = threading.Lock()
+        if cls._instance is not None and cls._initialized:
+            cls._instance._local = threading.local()
+
     def close(self):
-        """Close database connection"""
-        if (DatabaseConnection._connection and 
+        """Close the shared connection and every pooled connection"""
+        if DatabaseConnection._pool is not None:
+            DatabaseConnection._pool.close()
+            DatabaseConnection._pool = None
+        if (DatabaseConnection._connection and
             DatabaseConnection._connection.is_connected()):
             DatabaseConnection._connection.close()
             DatabaseConnection._connection = None
@@ -94,5 +236,7 @@ class DatabaseConnection:
         """Check if database is connected"""
         if self._testing:
             return True  # Assume connected for tests
-        return (DatabaseConnection._connection is not None and 
-                DatabaseConnection._connection.is_connected())
\ No newline at end of file
+        if self._pool_enabled:
+            return DatabaseConnection._pool is not None and DatabaseConnection._pool.stats()["size"] > 0
+        return (DatabaseConnection._connection is not None and
+                DatabaseConnection._connection.is_connected())
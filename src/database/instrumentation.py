@@ -0,0 +1,294 @@
+"""Per-request SQL instrumentation.
+
+The connection handed to repositories during a request is wrapped in an
+:class:`InstrumentedConnection`; every cursor it opens times its statements
+and counts the rows they return. At the end of the request the totals are
+
+* sent to the browser as a ``Server-Timing`` header (visible in devtools),
+* logged as one structured ``request perf`` record,
+* folded into per-endpoint aggregates shown on ``/admin/perf``, and
+* checked against the endpoint's query budget.
+
+Settings (read by :func:`init_app`):
+
+``PERF_INSTRUMENTATION``  wrap connections and emit the header (default on)
+``PERF_PAGE_ENABLED``     expose ``/admin/perf`` (default off)
+``SLOW_QUERY_MS``         statements slower than this are logged and kept
+``QUERY_BUDGET_DEFAULT``  max statements per request for any endpoint (0 = none)
+``QUERY_BUDGETS``         per-endpoint overrides, e.g. ``{"doctor.schedule": 8}``
+``QUERY_BUDGET_STRICT``   raise :class:`QueryBudgetExceeded` instead of logging
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+from flask import current_app, g, has_app_context, request
+
+logger = logging.getLogger(__name__)
+
+# Statements kept per request for the "slowest" list; the counters stay exact
+MAX_RECORDED_STATEMENTS = 200
+SLOWEST_PER_REQUEST = 5
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """A request issued more SQL statements than its endpoint allows."""
+
+
+def normalize_sql(sql, limit=300):
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    sql = _WHITESPACE_RE.sub(" ", str(sql)).strip()
+    return sql if len(sql) <= limit else sql[:limit] + "…"
+
+
+class QueryStats:
+    """Statements issued during one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.statements = []
+        self.started = time.perf_counter()
+
+    def record(self, sql, seconds):
+        """Count one statement; returns the entry rows/fetch time are added to."""
+        self.count += 1
+        self.seconds += seconds
+        entry = [sql, seconds, 0]
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append(entry)
+        return entry
+
+    def add(self, entry, seconds=0.0, rows=0):
+        self.seconds += seconds
+        self.rows += rows
+        if entry is not None:
+            entry[1] += seconds
+            entry[2] += rows
+
+    @property
+    def db_ms(self):
+        return self.seconds * 1000
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def slowest(self, n=SLOWEST_PER_REQUEST):
+        ranked = sorted(self.statements, key=lambda entry: entry[1], reverse=True)[:n]
+        return [{"sql": normalize_sql(sql), "ms": round(seconds * 1000, 2), "rows": rows}
+                for sql, seconds, rows in ranked]
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times execute/fetch calls."""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._entry = None
+
+    def _timed_execute(self, method, operation, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            self._entry = self._stats.record(operation, time.perf_counter() - start)
+            rowcount = getattr(self._cursor, "rowcount", -1)
+            # Writes report affected rows right away; SELECT rows are counted as fetched
+            if isinstance(rowcount, int) and rowcount > 0 and not _is_read(operation):
+                self._stats.add(self._entry, rows=rowcount)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed_execute(self._cursor.execute, operation, args, kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed_execute(self._cursor.executemany, operation, args, kwargs)
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        result = method(*args)
+        if result is None:
+            rows = 0
+        elif isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 1
+        self._stats.add(self._entry, time.perf_counter() - start, rows)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(self._cursor.fetchmany, *args)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors report to a :class:`QueryStats`."""
+
+    def __init__(self, connection, stats):
+        self.wrapped = connection
+        self._stats = stats
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.wrapped.cursor(*args, **kwargs), self._stats)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+def _is_read(operation):
+    head = operation.lstrip()[:6].upper() if isinstance(operation, str) else ""
+    return head in ("SELECT", "EXPLAI", "SHOW")
+
+
+def unwrap(connection):
+    return getattr(connection, "wrapped", connection)
+
+
+def current_stats():
+    """Stats of the request being served, or None (no request / disabled)."""
+    if not has_app_context():
+        return None
+    return g.get("_query_stats")
+
+
+def instrument(connection):
+    """Wrap ``connection`` for the current request; returned unchanged otherwise."""
+    stats = current_stats()
+    if connection is None or stats is None or isinstance(connection, InstrumentedConnection):
+        return connection
+    return InstrumentedConnection(connection, stats)
+
+
+class PerfRegistry:
+    """Per-endpoint aggregates and recent slow statements for ``/admin/perf``."""
+
+    def __init__(self, recent=50):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._slow = deque(maxlen=recent)
+
+    def add(self, endpoint, stats, slow_statements, over_budget):
+        with self._lock:
+            agg = self._endpoints.get(endpoint)
+            if agg is None:
+                agg = self._endpoints[endpoint] = {
+                    "endpoint": endpoint, "requests": 0, "queries": 0, "db_ms": 0.0,
+                    "max_queries": 0, "max_db_ms": 0.0, "over_budget": 0,
+                }
+            agg["requests"] += 1
+            agg["queries"] += stats.count
+            agg["db_ms"] += stats.db_ms
+            agg["max_queries"] = max(agg["max_queries"], stats.count)
+            agg["max_db_ms"] = max(agg["max_db_ms"], stats.db_ms)
+            agg["over_budget"] += int(over_budget)
+            for statement in slow_statements:
+                self._slow.appendleft(dict(statement, endpoint=endpoint))
+
+    def endpoints(self):
+        with self._lock:
+            rows = [dict(agg) for agg in self._endpoints.values()]
+        for row in rows:
+            row["avg_queries"] = row["queries"] / row["requests"]
+            row["avg_db_ms"] = row["db_ms"] / row["requests"]
+        return sorted(rows, key=lambda row: row["db_ms"], reverse=True)
+
+    def slow_statements(self):
+        with self._lock:
+            return list(self._slow)
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+            self._slow.clear()
+
+
+def get_registry(app=None):
+    return (app or current_app).extensions["perf"]
+
+
+def budget_for(endpoint, config):
+    budgets = config.get("QUERY_BUDGETS") or {}
+    if endpoint in budgets:
+        return budgets[endpoint]
+    return config.get("QUERY_BUDGET_DEFAULT") or None
+
+
+def parse_budgets(value):
+    """``"doctor.schedule=8,patient.dashboard=6"`` -> ``{"doctor.schedule": 8, ...}``"""
+    budgets = {}
+    for item in (value or "").split(","):
+        endpoint, sep, limit = item.partition("=")
+        if sep and endpoint.strip() and limit.strip().isdigit():
+            budgets[endpoint.strip()] = int(limit)
+    return budgets
+
+
+def start_request():
+    if current_app.config.get("PERF_INSTRUMENTATION"):
+        g._query_stats = QueryStats()
+
+
+def finish_request(response):
+    stats = g.pop("_query_stats", None)
+    if stats is None or request.endpoint == "static":
+        return response
+
+    config = current_app.config
+    endpoint = request.endpoint or "<unmatched>"
+    elapsed_ms = stats.elapsed_ms
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={stats.db_ms:.1f};desc="{stats.count} queries, {stats.rows} rows", app;dur={elapsed_ms:.1f}',
+    )
+
+    slow_ms = config.get("SLOW_QUERY_MS", 100)
+    slow_statements = [s for s in stats.slowest() if s["ms"] >= slow_ms]
+    budget = budget_for(endpoint, config)
+    over_budget = budget is not None and stats.count > budget
+
+    logger.info("request perf", extra={"perf": {
+        "endpoint": endpoint,
+        "method": request.method,
+        "status": response.status_code,
+        "queries": stats.count,
+        "rows": stats.rows,
+        "db_ms": round(stats.db_ms, 2),
+        "elapsed_ms": round(elapsed_ms, 2),
+        "slowest": stats.slowest(3),
+    }})
+    for statement in slow_statements:
+        logger.warning("slow query on %s: %.1f ms, %d rows: %s",
+                       endpoint, statement["ms"], statement["rows"], statement["sql"])
+
+    get_registry().add(endpoint, stats, slow_statements, over_budget)
+
+    if over_budget:
+        message = f"{endpoint} issued {stats.count} queries (budget {budget})"
+        if config.get("QUERY_BUDGET_STRICT"):
+            raise QueryBudgetExceeded(message)
+        logger.warning("query budget exceeded: %s", message)
+    return response
+
+
+def init_app(app):
+    app.extensions["perf"] = PerfRegistry()
+    app.before_request(start_request)
+    app.after_request(finish_request)
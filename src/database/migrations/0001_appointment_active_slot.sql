@@ -0,0 +1,12 @@
+-- One live booking per doctor/date/time (see Appointment.active_slot in schema.sql).
+-- If this fails with a duplicate-key error, resolve the existing double bookings first:
+--   SELECT doctor_id, date, appointment_time, COUNT(*) FROM Appointment
+--   WHERE UPPER(status) NOT IN ('CANCELLED', 'REJECTED')
+--   GROUP BY doctor_id, date, appointment_time HAVING COUNT(*) > 1;
+
+ALTER TABLE Appointment
+    ADD COLUMN active_slot tinyint
+    GENERATED ALWAYS AS (IF(UPPER(status) IN ('CANCELLED', 'REJECTED'), NULL, 1)) STORED;
+
+ALTER TABLE Appointment
+    ADD UNIQUE KEY uq_appointment_active_slot (doctor_id, date, appointment_time, active_slot);
@@ -0,0 +1,12 @@
+-- Secondary indexes for the filters used by the repositories' hot queries.
+-- doctor_availability(doctor_id, date) is already covered by availability_unique.
+
+CREATE INDEX idx_appointment_doctor_date ON Appointment (doctor_id, date, appointment_time, status);
+
+CREATE INDEX idx_appointment_patient_date ON Appointment (patient_id, date);
+
+CREATE INDEX idx_medicalrecord_patient_date ON MedicalRecord (patient_id, upload_date);
+
+CREATE INDEX idx_uploadedfile_record ON UploadedFile (record_id);
+
+CREATE INDEX idx_user_status_role ON user (status, role);
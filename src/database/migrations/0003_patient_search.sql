@@ -0,0 +1,15 @@
+-- Indexed patient search: normalized phone digits, name prefixes and an
+-- ngram FULLTEXT index so substring name search does not scan the table.
+
+ALTER TABLE patient
+    ADD COLUMN phone_digits varchar(15) GENERATED ALWAYS AS (
+        REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(phone, '+', ''), ' ', ''), '-', ''), '(', ''), ')', '')
+    ) STORED;
+
+CREATE INDEX idx_patient_phone_digits ON patient (phone_digits);
+
+CREATE INDEX idx_patient_last_first ON patient (lastName, firstName);
+
+CREATE INDEX idx_patient_first ON patient (firstName);
+
+CREATE FULLTEXT INDEX ft_patient_name ON patient (firstName, lastName) WITH PARSER ngram;
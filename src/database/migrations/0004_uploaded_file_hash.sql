@@ -0,0 +1,10 @@
+-- Content hash, size and original name for uploads stored by services/upload_storage.py.
+-- Rows uploaded before this migration keep NULLs.
+
+ALTER TABLE UploadedFile ADD COLUMN sha256 CHAR(64) NULL;
+
+ALTER TABLE UploadedFile ADD COLUMN size_bytes BIGINT NULL;
+
+ALTER TABLE UploadedFile ADD COLUMN original_name VARCHAR(255) NULL;
+
+CREATE INDEX idx_uploadedfile_sha256 ON UploadedFile (sha256);
@@ -0,0 +1,6 @@
+-- Thumbnail and preview images rendered in the background by services/thumbnails.py.
+-- NULL until the job has run (or when the file type has no preview).
+
+ALTER TABLE UploadedFile ADD COLUMN thumbnail_path VARCHAR(500) NULL;
+
+ALTER TABLE UploadedFile ADD COLUMN preview_path VARCHAR(500) NULL;
@@ -0,0 +1,19 @@
+-- Indexes matching the admin listings' keyset pagination (ORDER BY create_at, id).
+-- InnoDB secondary indexes already end in the primary key; id is listed to make
+-- the seek order explicit.
+--
+-- A NULL create_at has no place in that order (a cursor cannot point past it),
+-- so user.create_at becomes NOT NULL. Rows missing it take their update_at, or
+-- else a date that sorts first and is a valid TIMESTAMP in every session time
+-- zone. update_at is assigned to itself so ON UPDATE does not bump it.
+
+UPDATE user SET create_at = COALESCE(update_at, '1970-01-02 00:00:00'), update_at = update_at
+WHERE create_at IS NULL;
+
+ALTER TABLE user MODIFY create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX idx_user_status_created ON user (status, create_at, id);
+
+CREATE INDEX idx_user_created ON user (create_at, id);
+
+CREATE INDEX idx_admin_audit_created ON admin_audit (create_at, id);
@@ -0,0 +1,38 @@
+-- Partition admin_audit by month so browsing recent entries and archiving old
+-- months (ALTER TABLE ... DROP PARTITION) never touch the whole trail.
+-- Everything up to October 2026 lands in p202610; `python migrate.py up` (and
+-- `python migrate.py partitions`, e.g. from a monthly cron) then splits
+-- p_future into one partition per month ahead of time.
+--
+-- MySQL requires the partitioning column in every unique key, so the primary
+-- key becomes (id, create_at), and partitioned tables cannot have foreign keys:
+-- admin_user_id keeps the acting admin's id even after that user is deleted.
+
+-- The foreign key's name is generated by MySQL, so look it up (and skip the
+-- drop when it is already gone) instead of assuming admin_audit_ibfk_1.
+SET @drop_audit_fks = (
+    SELECT IFNULL(CONCAT('ALTER TABLE admin_audit ',
+                         GROUP_CONCAT(CONCAT('DROP FOREIGN KEY `', CONSTRAINT_NAME, '`') SEPARATOR ', ')),
+                  'DO 0')
+    FROM information_schema.TABLE_CONSTRAINTS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'admin_audit' AND CONSTRAINT_TYPE = 'FOREIGN KEY'
+);
+
+PREPARE drop_audit_fks FROM @drop_audit_fks;
+
+EXECUTE drop_audit_fks;
+
+DEALLOCATE PREPARE drop_audit_fks;
+
+-- Entries without a time would block NOT NULL; the value is within the
+-- TIMESTAMP range in every session time zone.
+UPDATE admin_audit SET create_at = '1970-01-02 00:00:00' WHERE create_at IS NULL;
+
+ALTER TABLE admin_audit MODIFY create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE admin_audit DROP PRIMARY KEY, ADD PRIMARY KEY (id, create_at);
+
+ALTER TABLE admin_audit PARTITION BY RANGE (UNIX_TIMESTAMP(create_at)) (
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
@@ -0,0 +1,4 @@
+-- Pending-appointment counts and lists per doctor read only the doctor's
+-- PENDING entries instead of walking their whole history by date.
+
+CREATE INDEX idx_appointment_doctor_status ON Appointment (doctor_id, status);
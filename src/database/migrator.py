@@ -0,0 +1,238 @@
+"""Versioned schema migrations.
+
+Migrations are numbered SQL files in ``database/migrations`` named
+``NNNN_description.sql``. Applied versions are recorded in the
+``schema_version`` table; ``schema.sql`` creates the latest schema and marks
+every migration it already contains as applied.
+"""
+import os
+import re
+from collections import namedtuple
+from datetime import date
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+Migration = namedtuple("Migration", "version name path")
+
+_FILENAME_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# MySQL errors that mean a statement was already applied (duplicate column /
+# duplicate key name / key already dropped); tolerated so a half-applied
+# migration can be re-run.
+_ALREADY_APPLIED_ERRNOS = {1060, 1061, 1091}
+
+VERSION_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Queries the app runs on every page load. ``check_hot_queries`` EXPLAINs each
+# one and reports any table it would read with a full scan.
+HOT_QUERIES = [
+    ("doctor day appointments",
+     "SELECT id, appointment_time, status FROM appointment WHERE doctor_id = %s AND date = %s",
+     (1, "2025-01-01")),
+    ("booked times",
+     "SELECT appointment_time FROM appointment WHERE doctor_id = %s AND date = %s "
+     "AND status NOT IN ('CANCELLED', 'REJECTED')",
+     (1, "2025-01-01")),
+    ("doctor week appointments",
+     "SELECT id FROM appointment WHERE doctor_id = %s AND date BETWEEN %s AND %s",
+     (1, "2025-01-01", "2025-01-07")),
+    ("patient appointments",
+     "SELECT id FROM appointment WHERE patient_id = %s ORDER BY date DESC",
+     (1,)),
+    ("doctor availability",
+     "SELECT start_time, end_time FROM doctor_availability WHERE doctor_id = %s AND date = %s",
+     (1, "2025-01-01")),
+    ("patient medical records",
+     "SELECT id FROM MedicalRecord WHERE patient_id = %s ORDER BY upload_date DESC",
+     (1,)),
+    ("record files",
+     "SELECT id, file_path FROM UploadedFile WHERE record_id = %s",
+     (1,)),
+    ("patient phone search",
+     "SELECT id FROM patient WHERE phone_digits LIKE %s ORDER BY phone_digits LIMIT 50",
+     ("2010%",)),
+    ("patient name search",
+     "SELECT id FROM patient WHERE MATCH(firstName, lastName) AGAINST (%s IN BOOLEAN MODE) LIMIT 50",
+     ('+"ahmed"',)),
+    ("patient name prefix search",
+     "SELECT id FROM patient WHERE lastName LIKE %s ORDER BY lastName LIMIT 50",
+     ("a%",)),
+    ("pending users",
+     "SELECT id FROM user WHERE status = 'pending' AND role = %s",
+     ("doctor",)),
+    ("doctor pending appointments",
+     "SELECT COUNT(*) FROM appointment WHERE doctor_id = %s AND status = 'PENDING'",
+     (1,)),
+    ("pending users page",
+     "SELECT id FROM user WHERE status = 'pending' AND (create_at > %s OR (create_at = %s AND id > %s)) "
+     "ORDER BY create_at, id LIMIT 26",
+     ("2025-01-01", "2025-01-01", 1)),
+    ("admin audit page",
+     "SELECT id FROM admin_audit WHERE (create_at < %s OR (create_at = %s AND id < %s)) "
+     "ORDER BY create_at DESC, id DESC LIMIT 21",
+     ("2025-01-01", "2025-01-01", 1)),
+]
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Return the available migrations ordered by version."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME_RE.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2),
+                                        os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version in %s" % directory)
+    return migrations
+
+
+def split_statements(sql):
+    """Split a migration file into statements, dropping ``--`` comment lines."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+def ensure_version_table(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(VERSION_TABLE_DDL)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def applied_versions(conn):
+    ensure_version_table(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version FROM schema_version")
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def pending(conn, directory=MIGRATIONS_DIR):
+    done = applied_versions(conn)
+    return [m for m in discover(directory) if m.version not in done]
+
+
+def apply(conn, migration):
+    """Run one migration and record it in ``schema_version``."""
+    with open(migration.path, encoding="utf-8") as fh:
+        statements = split_statements(fh.read())
+    cursor = conn.cursor()
+    try:
+        for statement in statements:
+            try:
+                cursor.execute(statement)
+            except Exception as e:
+                if getattr(e, "errno", None) not in _ALREADY_APPLIED_ERRNOS:
+                    raise
+        cursor.execute(
+            "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+            (migration.version, migration.name),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def migrate(conn, target=None, directory=MIGRATIONS_DIR):
+    """Apply pending migrations up to ``target`` (inclusive). Returns those applied."""
+    applied = []
+    for migration in pending(conn, directory):
+        if target is not None and migration.version > target:
+            break
+        apply(conn, migration)
+        applied.append(migration)
+    return applied
+
+
+def check_hot_queries(conn, queries=None, max_scan_rows=0):
+    """EXPLAIN each hot query and describe any full table scan.
+
+    Every plan step of type ALL is reported, whether or not the table has an
+    index the optimizer passed over. ``max_scan_rows`` tolerates scans whose
+    row estimate is at most that many rows (lookup tables, a near-empty dev
+    database); the default of 0 flags them all.
+    """
+    problems = []
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for name, sql, params in (queries or HOT_QUERIES):
+            cursor.execute("EXPLAIN " + sql, params)
+            for row in cursor.fetchall():
+                if row.get("type") != "ALL":
+                    continue
+                rows = row.get("rows")
+                if rows is not None and int(rows) <= max_scan_rows:
+                    continue
+                problems.append(f"{name}: full scan of {row.get('table')} (~{rows} rows)")
+    finally:
+        cursor.close()
+    return problems
+
+
+AUDIT_PARTITIONS_QUERY = """
+    SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'admin_audit' AND PARTITION_NAME IS NOT NULL
+"""
+
+_MONTH_PARTITION_RE = re.compile(r"^p(\d{4})(\d{2})$")
+
+
+def _next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def ensure_audit_partitions(conn, today=None, months_ahead=3):
+    """Give admin_audit a partition for every month up to ``months_ahead`` from now.
+
+    Monthly partitions are named ``pYYYYMM``; new ones are split off the
+    (empty, if this runs regularly) ``p_future`` catch-all. Returns the names
+    added -- none when the table is not partitioned.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(AUDIT_PARTITIONS_QUERY)
+        names = [row[0] for row in cursor.fetchall()]
+        months = sorted(tuple(int(g) for g in m.groups())
+                        for m in map(_MONTH_PARTITION_RE.match, names) if m)
+        if "p_future" not in names or not months:
+            return []
+
+        today = today or date.today()
+        last_wanted = (today.year, today.month)
+        for _ in range(months_ahead):
+            last_wanted = _next_month(*last_wanted)
+
+        added = []
+        month = _next_month(*months[-1])
+        while month <= last_wanted:
+            added.append(month)
+            month = _next_month(*month)
+        if not added:
+            return []
+
+        parts = []
+        for year, month in added:
+            bound_year, bound_month = _next_month(year, month)
+            parts.append(f"PARTITION p{year:04d}{month:02d} VALUES LESS THAN "
+                         f"(UNIX_TIMESTAMP('{bound_year:04d}-{bound_month:02d}-01 00:00:00'))")
+        parts.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+        cursor.execute("ALTER TABLE admin_audit REORGANIZE PARTITION p_future INTO (%s)" % ", ".join(parts))
+        return [f"p{year:04d}{month:02d}" for year, month in added]
+    finally:
+        cursor.close()
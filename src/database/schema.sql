@@ -1,19 +1,29 @@
 -- Clinic Management System Database Schema
 -- This script creates the database and all required tables
--- Safe to run multiple times (uses IF NOT EXISTS)
+-- Safe to run multiple times (uses IF NOT EXISTS); migrations are only recorded
+-- as applied when this run created the tables, so an existing database still
+-- has to be upgraded with `python migrate.py up` (see database/migrations)
 
 CREATE DATABASE IF NOT EXISTS clinic;
 USE clinic;
 
+SET @fresh_install = (
+    SELECT COUNT(*) = 0 FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user'
+);
+
 -- User table
 CREATE TABLE IF NOT EXISTS user(
     id int auto_increment primary key,
     username varchar(150) NOT NULL unique,
     password varchar(255) NOT NULL,
     update_at  Timestamp DEFAULT  CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    create_at  Timestamp DEFAULT  CURRENT_TIMESTAMP,
+    create_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     role varchar(15) NOT NULL,
-    status varchar(15) NOT NULL DEFAULT 'active'
+    status varchar(15) NOT NULL DEFAULT 'active',
+    INDEX idx_user_status_role (status, role),
+    INDEX idx_user_status_created (status, create_at, id),
+    INDEX idx_user_created (create_at, id)
 );
 
 -- Patient table
@@ -27,6 +37,14 @@ CREATE TABLE IF NOT EXISTS patient(
     address VARCHAR(255) NULL,
     user_id int NULL unique,
     create_at  Timestamp DEFAULT  CURRENT_TIMESTAMP,
+    -- phone without '+', spaces, dashes or brackets, for indexed prefix search
+    phone_digits varchar(15) GENERATED ALWAYS AS (
+        REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(phone, '+', ''), ' ', ''), '-', ''), '(', ''), ')', '')
+    ) STORED,
+    INDEX idx_patient_phone_digits (phone_digits),
+    INDEX idx_patient_last_first (lastName, firstName),
+    INDEX idx_patient_first (firstName),
+    FULLTEXT INDEX ft_patient_name (firstName, lastName) WITH PARSER ngram,
     foreign key (user_id) references user(id) ON DELETE CASCADE
 );
 
@@ -91,9 +109,16 @@ CREATE TABLE IF NOT EXISTS Appointment(
     doctor_id int NULL,
     patient_id int NULL,
     note varchar(1000) NULL,
+    -- 1 while the appointment holds its slot, NULL once cancelled/rejected
+    -- (NULLs never collide in a unique key, so freed slots can be rebooked)
+    active_slot tinyint GENERATED ALWAYS AS (IF(UPPER(status) IN ('CANCELLED', 'REJECTED'), NULL, 1)) STORED,
+    UNIQUE KEY uq_appointment_active_slot (doctor_id, date, appointment_time, active_slot),
+    INDEX idx_appointment_doctor_date (doctor_id, date, appointment_time, status),
+    INDEX idx_appointment_doctor_status (doctor_id, status),
+    INDEX idx_appointment_patient_date (patient_id, date),
     foreign key (doctor_id) references doctor(id) ON DELETE CASCADE,
     foreign key (patient_id) references patient(id) ON DELETE CASCADE,
-    foreign key (assistant_id) references assistant(id) ON DELETE SET NULL,
+    foreign key (assistant_id) references assistant(id) ON DELETE SET NULL
 );
 
 -- Medical Record table
@@ -108,6 +133,7 @@ CREATE TABLE IF NOT EXISTS MedicalRecord(
     doctor_id int NULL,
     patient_id int NOT NULL,
     appointment_id int NOT NULL ,
+    INDEX idx_medicalrecord_patient_date (patient_id, upload_date),
     foreign key (doctor_id) references doctor(id) ON DELETE SET NULL,
     foreign key (patient_id) references patient(id) ON DELETE CASCADE,
     foreign key (appointment_id) references Appointment(id) ON DELETE CASCADE,
@@ -125,6 +151,13 @@ CREATE TABLE IF NOT EXISTS UploadedFile(
     record_id int NULL,
     patient_id int NULL,
     appointment_id int NULL,
+    sha256 CHAR(64) NULL,
+    size_bytes BIGINT NULL,
+    original_name VARCHAR(255) NULL,
+    thumbnail_path VARCHAR(500) NULL,
+    preview_path VARCHAR(500) NULL,
+    INDEX idx_uploadedfile_record (record_id),
+    INDEX idx_uploadedfile_sha256 (sha256),
     foreign key(record_id) references MedicalRecord(id) ON DELETE CASCADE,
     foreign key (patient_id) references patient(id) ON DELETE CASCADE,
     foreign key (appointment_id) references Appointment(id) ON DELETE CASCADE,
@@ -139,16 +172,23 @@ CREATE Table IF NOT EXISTS Contact(
     create_at Timestamp DEFAULT CURRENT_TIMESTAMP
 );
 
--- Admin audit trail table
+-- Admin audit trail table, one partition per month (see migration 0007;
+-- `python migrate.py partitions` adds the upcoming months). Partitioned tables
+-- cannot have foreign keys, so admin_user_id is not one.
 CREATE TABLE IF NOT EXISTS admin_audit (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     admin_user_id INT NULL,
     action VARCHAR(100) NOT NULL,
     target_user_id INT NULL,
     target_type VARCHAR(50) NULL,
     details VARCHAR(500) NULL,
-    create_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (admin_user_id) REFERENCES user(id) ON DELETE SET NULL
+    create_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, create_at),
+    INDEX idx_admin_audit_created (create_at, id)
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(create_at)) (
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
 );
 
 CREATE TABLE IF NOT EXISTS tasks (
@@ -169,4 +209,30 @@ CREATE TABLE IF NOT EXISTS tasks (
     INDEX idx_priority (priority),
     INDEX idx_due_date (due_date),
     INDEX idx_assigned_to (assigned_to)
-);
\ No newline at end of file
+);
+
+-- Migrations already included above (keep in sync with database/migrations).
+-- Recorded only on a fresh install: on an existing database the tables above
+-- were left as they were, so `migrate.py up` must still apply them.
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TEMPORARY TABLE shipped_migrations (version INT PRIMARY KEY, name VARCHAR(255) NOT NULL);
+
+INSERT INTO shipped_migrations (version, name) VALUES
+    (1, 'appointment_active_slot'),
+    (2, 'hot_query_indexes'),
+    (3, 'patient_search'),
+    (4, 'uploaded_file_hash'),
+    (5, 'uploaded_file_previews'),
+    (6, 'listing_keyset_indexes'),
+    (7, 'admin_audit_partitions'),
+    (8, 'appointment_doctor_status');
+
+INSERT IGNORE INTO schema_version (version, name)
+    SELECT version, name FROM shipped_migrations WHERE @fresh_install;
+
+DROP TEMPORARY TABLE shipped_migrations;
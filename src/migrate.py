@@ -0,0 +1,75 @@
+"""Database migration CLI.
+
+    python migrate.py status      # list applied and pending migrations
+    python migrate.py up [--to N] # apply pending migrations
+    python migrate.py check       # fail if a hot query needs a full table scan
+    python migrate.py partitions  # add the next months' admin_audit partitions (run monthly)
+"""
+import argparse
+import sys
+
+from database import migrator
+from database.db_singleton import DatabaseConnection
+
+
+def status(conn):
+    done = migrator.applied_versions(conn)
+    for migration in migrator.discover():
+        mark = "applied" if migration.version in done else "pending"
+        print(f"{migration.version:04d} {migration.name:<40} {mark}")
+    return 0
+
+
+def up(conn, target=None):
+    applied = migrator.migrate(conn, target=target)
+    for migration in applied:
+        print(f"Applied {migration.version:04d} {migration.name}")
+    if not applied:
+        print("Schema is up to date.")
+    return partitions(conn)
+
+
+def partitions(conn, months_ahead=3):
+    for name in migrator.ensure_audit_partitions(conn, months_ahead=months_ahead):
+        print(f"Added admin_audit partition {name}")
+    return 0
+
+
+def check(conn, max_scan_rows=0):
+    problems = migrator.check_hot_queries(conn, max_scan_rows=max_scan_rows)
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        return 1
+    print("✅ All hot queries use an index.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the clinic database schema")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="show applied and pending migrations")
+    up_parser = sub.add_parser("up", help="apply pending migrations")
+    up_parser.add_argument("--to", type=int, default=None, help="stop after this version")
+    check_parser = sub.add_parser("check", help="EXPLAIN hot queries and fail on full table scans")
+    check_parser.add_argument("--max-scan-rows", type=int, default=0,
+                              help="tolerate full scans of tables estimated at this many rows or fewer")
+    sub.add_parser("partitions", help="add upcoming monthly admin_audit partitions")
+    args = parser.parse_args(argv)
+
+    try:
+        with DatabaseConnection().connection() as conn:
+            if args.command == "status":
+                return status(conn)
+            if args.command == "up":
+                return up(conn, args.to)
+            if args.command == "partitions":
+                return partitions(conn)
+            return check(conn, args.max_scan_rows)
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
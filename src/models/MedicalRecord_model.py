@@ -1,7 +1,10 @@
 class MedicalRecord:
+    __slots__ = ("id", "patient_id", "doctor_id", "diagnosis", "treatment", "uploaded_by_user_id", "upload_date", "follow_up_date", "appointment_id", "created_at", "doctor_name", "files")
+
     def __init__(self, id=None, patient_id=None, doctor_id=None, diagnosis=None, 
                  treatment=None, uploaded_by_user_id=None, upload_date=None, 
-                 follow_up_date=None, appointment_id=None, created_at=None):
+                 follow_up_date=None, appointment_id=None, created_at=None,
+                 doctor_name=None, files=None):
         self.id = id
         self.patient_id = patient_id
         self.doctor_id = doctor_id
@@ -11,4 +14,7 @@ class MedicalRecord:
         self.upload_date = upload_date
         self.follow_up_date = follow_up_date
         self.appointment_id = appointment_id
-        self.created_at = created_at
\ No newline at end of file
+        self.created_at = created_at
+        # Filled in by MedicalRecordRepository.get_patient_chart
+        self.doctor_name = doctor_name
+        self.files = files if files is not None else []
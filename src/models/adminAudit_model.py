@@ -1,4 +1,6 @@
 class AdminAudit:
+    __slots__ = ("id", "admin_user_id", "action", "target_user_id", "target_type", "details", "created_at")
+
     def __init__(self, id, admin_user_id, action, target_user_id, target_type, details, created_at):
         self.id = id
         self.admin_user_id = admin_user_id
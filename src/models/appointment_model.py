@@ -1,4 +1,6 @@
 class Appointment:
+    __slots__ = ("id", "patient_id", "doctor_id", "date", "appointment_time", "status", "follow_up_date", "assistant_id", "created_at", "doctor_name", "doctor_specialization")
+
     def __init__(self, id, patient_id, doctor_id, date, appointment_time, status, follow_up_date=None, assistant_id=None, created_at=None):
         self.id = id
         self.patient_id = patient_id
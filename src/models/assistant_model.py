@@ -1,4 +1,6 @@
 class Assistant:
+    __slots__ = ("id", "firstName", "lastName", "phone", "user_id", "doctor_id", "created_at", "doctor_name", "doctor_specialization", "patient_name", "patient_phone")
+
     def __init__(self,id,firstName,lastName,phone,user_id,doctor_id,created_at):
         self.id=id
         self.firstName=firstName
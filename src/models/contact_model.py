@@ -1,4 +1,6 @@
 class Contact:
+    __slots__ = ("id", "name", "email", "message", "created_at")
+
     def __init__(self, id, name, email, message, created_at):
         self.id = id
         self.name = name
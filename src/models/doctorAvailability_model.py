@@ -1,4 +1,6 @@
 class DoctorAvailability:
+    __slots__ = ("id", "doctor_id", "date", "start_time", "end_time", "create_at")
+
     def __init__(self, id, doctor_id, date, start_time, end_time, create_at):
         self.id = id
         self.doctor_id = doctor_id
@@ -1,4 +1,6 @@
 class DoctorSchedule:
+    __slots__ = ("id", "day_of_week", "startTime", "endTime", "doctor_id", "create_at")
+
     def __init__(self, id, day_of_week, startTime, endTime, doctor_id, create_at):
         self.id = id
         self.day_of_week = day_of_week
@@ -1,4 +1,6 @@
 class Doctor:
+    __slots__ = ("id", "firstName", "lastName", "phone", "schedule", "user_id", "specialization", "create_at")
+
     def __init__(self,id,firstName,lastName,phone,schedule,user_id,specialization,create_at):
         self.id=id
         self.firstName=firstName
@@ -1,4 +1,32 @@
+from datetime import date, datetime
+
+
+def age_from_birthdate(birth_date, today=None):
+    """Age in whole years for a date, datetime or 'YYYY-MM-DD' string; None if unknown."""
+    if not birth_date:
+        return None
+    try:
+        if isinstance(birth_date, str):
+            birth_date = datetime.strptime(birth_date, '%Y-%m-%d').date()
+        elif isinstance(birth_date, datetime):
+            birth_date = birth_date.date()
+        today = today or date.today()
+        age = today.year - birth_date.year
+        # Adjust if birthday hasn't occurred this year
+        if (today.month, today.day) < (birth_date.month, birth_date.day):
+            age -= 1
+        return age
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+_UNSET = object()
+
+
 class Patient:
+    __slots__ = ("id", "firstName", "lastName", "gender", "birth_date", "phone", "address", "user_id",
+                 "created_at", "_age")
+
     def __init__(self, id, firstName, lastName, gender, birth_date, phone, address, user_id, created_at):
         self.id=id
         self.firstName=firstName
@@ -9,5 +37,15 @@ class Patient:
         self.address=address
         self.user_id=user_id
         self.created_at=created_at
-        
+        self._age=_UNSET
+
+    @property
+    def age(self):
+        """Computed from birth_date the first time a page asks for it."""
+        if self._age is _UNSET:
+            self._age = age_from_birthdate(self.birth_date)
+        return self._age
 
+    @age.setter
+    def age(self, value):
+        self._age = value
@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import Optional
 
 class Task:
+    __slots__ = ("id", "title", "description", "status", "priority", "category", "due_date", "assigned_to", "created_by", "created_at")
+
     def __init__(self, id: int, title: str, description: Optional[str], 
                  status: str, priority: str, category: Optional[str], 
                  due_date: Optional[str], assigned_to: Optional[int], 
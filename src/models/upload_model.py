@@ -1,5 +1,8 @@
 class UploadedFile:
-    def __init__(self,id,file_path,file_type,uploaded_by_user_id,upload_date,record_id,patient_id,appointment_id,created_at):
+    __slots__ = ("id", "file_path", "file_type", "uploaded_by_user_id", "upload_date", "record_id", "patient_id", "appointment_id", "created_by", "sha256", "size_bytes", "original_name", "thumbnail_path", "preview_path")
+
+    def __init__(self,id,file_path,file_type,uploaded_by_user_id,upload_date,record_id,patient_id,appointment_id,created_at,
+                 sha256=None,size_bytes=None,original_name=None,thumbnail_path=None,preview_path=None):
         self.id=id
         self.file_path=file_path
         self.file_type=file_type
@@ -9,3 +12,8 @@ class UploadedFile:
         self.patient_id=patient_id
         self.appointment_id=appointment_id
         self.created_by=created_at
+        self.sha256=sha256
+        self.size_bytes=size_bytes
+        self.original_name=original_name
+        self.thumbnail_path=thumbnail_path
+        self.preview_path=preview_path
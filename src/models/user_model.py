@@ -1,4 +1,6 @@
 class User:
+    __slots__ = ("id", "username", "password", "role", "status", "updated_at", "created_at")
+
     def __init__(self, id,username,password,role,status,updated_at,created_at):
         self.id=id
         self.username=username
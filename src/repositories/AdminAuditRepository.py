@@ -1,8 +1,16 @@
+import logging
 from typing import Optional, List
 from models.adminAudit_model import AdminAudit
 from repositories.BaseRepository import BaseRepository
+from services import audit_log
+from utils.pagination import Page
+
+logger = logging.getLogger(__name__)
 
 class AdminAuditRepository(BaseRepository):
+    # SELECT list in AdminAudit() argument order, for the tuple-cursor readers
+    COLUMNS = "id, admin_user_id, action, target_user_id, target_type, details, create_at AS created_at"
+
     def create_entry(
         self, 
         admin_user_id: int, 
@@ -10,44 +18,31 @@ class AdminAuditRepository(BaseRepository):
         target_user_id: Optional[int] = None, 
         target_type: Optional[str] = None, 
         details: Optional[str] = None
-    ):
+    ) -> audit_log.AuditEntry:
+        """Add an entry to the audit trail; it is written in the background (services/audit_log.py)."""
+        return audit_log.record(admin_user_id, action, target_user_id, target_type, details)
+
+    def insert_many(self, entries: List[audit_log.AuditEntry]) -> int:
+        """Write AuditEntry tuples with one multi-row INSERT and one commit."""
         cursor = self.db.cursor()
         try:
-            cursor.execute(
-                "INSERT INTO admin_audit (admin_user_id, action, target_user_id, target_type, details) VALUES (%s, %s, %s, %s, %s)",
-                (admin_user_id, action, target_user_id, target_type, details),
+            cursor.executemany(
+                "INSERT INTO admin_audit (admin_user_id, action, target_user_id, target_type, details, create_at) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                [tuple(entry) for entry in entries],
             )
             self.db.commit()
-            new_id = cursor.lastrowid
-            cursor.execute(
-                "SELECT id, admin_user_id, action, target_user_id, target_type, details, create_at AS created_at FROM admin_audit WHERE id = %s", 
-                (new_id,)
-            )
-            row = cursor.fetchone()
-            return row
-        except Exception as e:
+            return len(entries)
+        except Exception:
             self.db.rollback()
-            print(f"Error creating audit entry: {e}")
-            return None
+            raise
         finally:
             cursor.close()
 
     def list_recent(self, limit: int = 20):
-        cursor = self.db.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, admin_user_id, action, target_user_id, target_type, details, create_at AS created_at FROM admin_audit ORDER BY create_at DESC LIMIT %s",
-            (limit,)
-        )
-        rows = cursor.fetchall()
-        cursor.close()
-        return [
-            AdminAudit(
-                id=r.get('id'), 
-                admin_user_id=r.get('admin_user_id'), 
-                action=r.get('action'), 
-                target_user_id=r.get('target_user_id'), 
-                target_type=r.get('target_type'), 
-                details=r.get('details'), 
-                created_at=r.get('created_at')
-            ) for r in rows
-        ] if rows else []
+        return self.page_entries(limit=limit).items
+
+    def page_entries(self, cursor: Optional[str] = None, limit: int = 20, with_total: bool = False) -> Page:
+        """Newest entries first, ``limit`` at a time (see BaseRepository._fetch_page_as)."""
+        return self._fetch_page_as(AdminAudit, self.COLUMNS, "admin_audit",
+                                   cursor=cursor, limit=limit, with_total=with_total)
@@ -1,32 +1,27 @@
+import logging
 from typing import List, Optional
 from models.appointment_model import Appointment
 from repositories.BaseRepository import BaseRepository
+from services import slot_engine
 import datetime
+import mysql.connector
+from mysql.connector import errorcode
+
+logger = logging.getLogger(__name__)
 
 class AppointmentRepository(BaseRepository):
+    # SELECT list in Appointment() argument order, for the tuple-cursor readers
+    COLUMNS = """id, patient_id, doctor_id, date, appointment_time, status,
+                 follow_up_date, assistant_id, create_at AS created_at"""
+
     def create_appointment(self, patient_id: int, doctor_id: int, date: str, 
                         appointment_time: str, assistant_id: int, 
                         status: str = 'BOOKED', notes: Optional[str] = None):
+        # A single INSERT is the whole booking: the unique key on
+        # (doctor_id, date, appointment_time, active_slot) rejects a second
+        # live booking for the same slot, so there is no check-then-insert race.
         cursor = self.db.cursor(buffered=True)
         try:
-            # First check if slot is already taken
-            cursor.execute(
-                """
-                SELECT id FROM appointment 
-                WHERE doctor_id = %s 
-                AND date = %s 
-                AND TIME(appointment_time) = TIME(%s)
-                AND status NOT IN ('CANCELLED', 'REJECTED')
-                """,
-                (doctor_id, date, appointment_time)
-            )
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Slot is taken, return None
-                return None
-            
-            # Create the appointment
             cursor.execute(
                 """
                 INSERT INTO appointment 
@@ -36,11 +31,19 @@ class AppointmentRepository(BaseRepository):
                 (patient_id, doctor_id, date, appointment_time, assistant_id, status, notes),
             )
             self.db.commit()
+            slot_engine.invalidate(doctor_id, date)
             return self.get_by_id(cursor.lastrowid)
-            
-        except Exception as e:
+        except mysql.connector.IntegrityError as e:
+            self.db.rollback()
+            if e.errno != errorcode.ER_DUP_ENTRY:
+                logger.exception("Error creating appointment")
+                return None
+            # Slot already taken; whatever was cached for this day is stale
+            slot_engine.invalidate(doctor_id, date)
+            return None
+        except Exception:
             self.db.rollback()
-            print(f"Error creating appointment: {e}")
+            logger.exception("Error creating appointment")
             return None
         finally:
             cursor.close()
@@ -81,9 +84,8 @@ class AppointmentRepository(BaseRepository):
                         created_at=row.get('created_at')
                     )
                     return appointment
-                except Exception as e:
-                    print(f"Error creating Appointment object in get_by_id: {e}")
-                    print(f"Row data: {row}")
+                except Exception:
+                    logger.exception("Error creating Appointment object in get_by_id (row id %s)", row.get("id"))
                     return None
             return None
         finally:
@@ -136,17 +138,10 @@ class AppointmentRepository(BaseRepository):
                 else:
                     row['patient_name'] = None
             
-            # DEBUG: Print all appointments
-            print(f"DEBUG get_by_patient_id: Found {len(rows)} appointments for patient {patient_id}")
-            for i, row in enumerate(rows):
-                print(f"  Appointment {i+1}: ID={row['id']}, Date={row['date']}, Status='{row['status']}', Notes='{row.get('notes', 'NO NOTES')}'")
-            
             return rows  # Return dictionaries, not Appointment objects
             
-        except Exception as e:
-            print(f"Error getting appointments by patient_id: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error getting appointments by patient_id")
             return []
         finally:
             cursor.close()
@@ -159,32 +154,24 @@ class AppointmentRepository(BaseRepository):
                 (status, appointment_id)
             )
             self.db.commit()
+            self._invalidate_slots_for(appointment_id)
             return True
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error updating appointment status: {e}")
+            logger.exception("Error updating appointment status")
             return False
         finally:
             cursor.close()
 
     def get_upcoming_appointments(self, patient_id: int) -> List[Appointment]:
         """Get upcoming appointments for a patient"""
-        cursor = self.db.cursor(dictionary=True, buffered=True)
         try:
-            cursor.execute(
+            return self._fetch_all_as(
+                self._patient_appointment,
                 """
-                SELECT 
-                    a.id,
-                    a.patient_id,
-                    a.doctor_id,
-                    a.date,
-                    a.appointment_time,
-                    a.status,
-                    a.follow_up_date,
-                    a.assistant_id,
-                    a.create_at AS created_at,
-                    d.firstName as doctor_first_name,
-                    d.lastName as doctor_last_name
+                SELECT a.id, a.patient_id, a.doctor_id, a.date, a.appointment_time, a.status,
+                       a.follow_up_date, a.assistant_id, a.create_at AS created_at,
+                       d.firstName, d.lastName
                 FROM appointment a
                 LEFT JOIN doctor d ON a.doctor_id = d.id
                 WHERE a.patient_id = %s 
@@ -192,298 +179,238 @@ class AppointmentRepository(BaseRepository):
                 AND a.date >= CURDATE()
                 ORDER BY a.date ASC, a.appointment_time ASC
                 """,
-                (patient_id,)
+                (patient_id,),
             )
-            rows = cursor.fetchall()
-            
-            appointments = []
-            for row in rows:
-                try:
-                    # Convert date/time objects
-                    if row.get('date') and hasattr(row['date'], 'strftime'):
-                        row['date'] = row['date'].strftime('%Y-%m-%d')
-                    
-                    if row.get('appointment_time') and hasattr(row['appointment_time'], 'strftime'):
-                        row['appointment_time'] = row['appointment_time'].strftime('%H:%M')
-                    
-                    appointment = Appointment(
-                        id=row['id'],
-                        patient_id=row['patient_id'],
-                        doctor_id=row['doctor_id'],
-                        date=row['date'],
-                        appointment_time=row['appointment_time'],
-                        status=row['status'],
-                        follow_up_date=row.get('follow_up_date'),
-                        assistant_id=row.get('assistant_id'),
-                        created_at=row.get('created_at')
-                    )
-                    
-                    if row.get('doctor_first_name'):
-                        appointment.doctor_name = f"Dr. {row['doctor_first_name']} {row['doctor_last_name']}"
-                    
-                    appointments.append(appointment)
-                except Exception as e:
-                    print(f"Error creating Appointment in get_upcoming_appointments: {e}")
-                    continue
-            
-            return appointments
-            
-        except Exception as e:
-            print(f"Error getting upcoming appointments: {e}")
+        except Exception:
+            logger.exception("Error getting upcoming appointments")
             return []
-        finally:
-            cursor.close()
 
     def get_completed_appointments(self, patient_id: int) -> List[Appointment]:
         """Get completed appointments for a patient"""
-        cursor = self.db.cursor(dictionary=True, buffered=True)
         try:
-            cursor.execute(
+            return self._fetch_all_as(
+                self._patient_appointment,
                 """
-                SELECT 
-                    a.id,
-                    a.patient_id,
-                    a.doctor_id,
-                    a.date,
-                    a.appointment_time,
-                    a.status,
-                    a.follow_up_date,
-                    a.assistant_id,
-                    a.create_at AS created_at,
-                    d.firstName as doctor_first_name,
-                    d.lastName as doctor_last_name
+                SELECT a.id, a.patient_id, a.doctor_id, a.date, a.appointment_time, a.status,
+                       a.follow_up_date, a.assistant_id, a.create_at AS created_at,
+                       d.firstName, d.lastName
                 FROM appointment a
                 LEFT JOIN doctor d ON a.doctor_id = d.id
                 WHERE a.patient_id = %s 
                 AND a.status = 'COMPLETED'
                 ORDER BY a.date DESC, a.appointment_time DESC
                 """,
-                (patient_id,)
+                (patient_id,),
             )
-            rows = cursor.fetchall()
-            
-            appointments = []
-            for row in rows:
-                try:
-                    # Convert date/time objects
-                    if row.get('date') and hasattr(row['date'], 'strftime'):
-                        row['date'] = row['date'].strftime('%Y-%m-%d')
-                    
-                    if row.get('appointment_time') and hasattr(row['appointment_time'], 'strftime'):
-                        row['appointment_time'] = row['appointment_time'].strftime('%H:%M')
-                    
-                    appointment = Appointment(
-                        id=row['id'],
-                        patient_id=row['patient_id'],
-                        doctor_id=row['doctor_id'],
-                        date=row['date'],
-                        appointment_time=row['appointment_time'],
-                        status=row['status'],
-                        follow_up_date=row.get('follow_up_date'),
-                        assistant_id=row.get('assistant_id'),
-                        created_at=row.get('created_at')
-                    )
-                    
-                    if row.get('doctor_first_name'):
-                        appointment.doctor_name = f"Dr. {row['doctor_first_name']} {row['doctor_last_name']}"
-                    
-                    appointments.append(appointment)
-                except Exception as e:
-                    print(f"Error creating Appointment in get_completed_appointments: {e}")
-                    continue
-            
-            return appointments
-            
-        except Exception as e:
-            print(f"Error getting completed appointments: {e}")
+        except Exception:
+            logger.exception("Error getting completed appointments")
             return []
-        finally:
-            cursor.close()
 
     def get_by_doctor_id(self, doctor_id: int, date: Optional[str] = None) -> List[Appointment]:
-        cursor = self.db.cursor(dictionary=True, buffered=True)
         if date:
-            cursor.execute(
-                """
-                SELECT id, patient_id, doctor_id, date, appointment_time, status, 
-                       follow_up_date, assistant_id, create_at AS created_at
+            return self._fetch_all_as(
+                self._appointment,
+                f"""
+                SELECT {self.COLUMNS}
                 FROM appointment
                 WHERE doctor_id = %s AND date = %s
                 ORDER BY appointment_time ASC
                 """,
                 (doctor_id, date),
             )
-        else:
+        return self._fetch_all_as(
+            self._appointment,
+            f"""
+            SELECT {self.COLUMNS}
+            FROM appointment
+            WHERE doctor_id = %s
+            ORDER BY date DESC, appointment_time DESC
+            """,
+            (doctor_id,),
+        )
+
+    def get_doctor_day_appointments(self, doctor_id: int, date: str) -> List[dict]:
+        """Get a doctor's appointments for one day with patient name and phone joined in."""
+        cursor = self.db.cursor(dictionary=True, buffered=True)
+        try:
             cursor.execute(
                 """
-                SELECT id, patient_id, doctor_id, date, appointment_time, status, 
-                       follow_up_date, assistant_id, create_at AS created_at
-                FROM appointment
-                WHERE doctor_id = %s
-                ORDER BY date DESC, appointment_time DESC
+                SELECT
+                    a.id,
+                    a.patient_id,
+                    a.date,
+                    a.appointment_time,
+                    a.status,
+                    CONCAT(p.firstName, ' ', p.lastName) AS patient_name,
+                    p.phone AS patient_phone
+                FROM appointment a
+                LEFT JOIN patient p ON a.patient_id = p.id
+                WHERE a.doctor_id = %s AND a.date = %s
+                ORDER BY a.appointment_time ASC
                 """,
-                (doctor_id,),
+                (doctor_id, date),
             )
-        rows = cursor.fetchall()
-        cursor.close()
-        
-        appointments = []
-        for row in rows:
-            try:
-                # Convert time objects to strings if needed
-                if row.get('appointment_time'):
-                    # If it's a time/datetime object
-                    if hasattr(row['appointment_time'], 'strftime'):
-                        row['appointment_time'] = row['appointment_time'].strftime('%H:%M')
-                    # If MySQL returns TIME as datetime.timedelta
-                    elif isinstance(row['appointment_time'], datetime.timedelta):
-                        total_seconds = int(row['appointment_time'].total_seconds())
-                        hours = (total_seconds // 3600) % 24
-                        minutes = (total_seconds % 3600) // 60
-                        row['appointment_time'] = f"{hours:02d}:{minutes:02d}"
-                    # If it's a string with seconds (HH:MM:SS)
-                    elif isinstance(row['appointment_time'], str) and len(row['appointment_time']) >= 5:
-                        row['appointment_time'] = row['appointment_time'][:5]
-                
-                appointments.append(Appointment(**row))
-            except Exception as e:
-                print(f"Error creating Appointment object: {e}")
-                continue
-        return appointments
+            rows = cursor.fetchall()
+            for row in rows:
+                row['appointment_time'] = self._format_time(row.get('appointment_time'))
+            return rows
+        except Exception:
+            logger.exception("Error getting doctor day appointments")
+            return []
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _format_time(value) -> Optional[str]:
+        """Normalize a TIME value (time, timedelta or string) to HH:MM."""
+        if value is None:
+            return None
+        if hasattr(value, 'strftime'):
+            return value.strftime('%H:%M')
+        if isinstance(value, datetime.timedelta):
+            total_seconds = int(value.total_seconds())
+            hours = (total_seconds // 3600) % 24
+            minutes = (total_seconds % 3600) // 60
+            return f"{hours:02d}:{minutes:02d}"
+        return str(value)[:5]
+
+    @classmethod
+    def _appointment(cls, id, patient_id, doctor_id, date, appointment_time, *rest):
+        """Row factory for COLUMNS: Appointment with the time as HH:MM."""
+        return Appointment(id, patient_id, doctor_id, date, cls._format_time(appointment_time), *rest)
+
+    @classmethod
+    def _patient_appointment(cls, *row):
+        """Row factory for COLUMNS + the doctor's names, as shown on the patient's pages."""
+        *columns, doctor_first_name, doctor_last_name = row
+        appointment = cls._appointment(*columns)
+        if hasattr(appointment.date, 'strftime'):
+            appointment.date = appointment.date.strftime('%Y-%m-%d')
+        if doctor_first_name:
+            appointment.doctor_name = f"Dr. {doctor_first_name} {doctor_last_name}"
+        return appointment
 
     def get_available_slots(self, doctor_id: int, date: str) -> List[str]:
         """Get available time slots for a doctor on a specific date."""
+        cached = slot_engine.get_cached_slots(doctor_id, date)
+        if cached is not None:
+            return cached
+
+        cursor = self.db.cursor()
         try:
-            print(f"\n🔍 DEBUG get_available_slots: doctor_id={doctor_id}, date={date}")
-            
-            cursor = self.db.cursor(buffered=True)
-            
-            # 1. Get ALL availability entries for this date
             cursor.execute(
-                "SELECT start_time, end_time FROM doctor_availability WHERE doctor_id = %s AND date = %s ORDER BY start_time",
+                "SELECT start_time, end_time FROM doctor_availability WHERE doctor_id = %s AND date = %s",
                 (doctor_id, date),
             )
-            rows = cursor.fetchall()
-            
-            if not rows:
-                print("❌ No availability found in database")
-                cursor.close()
+            windows = cursor.fetchall()
+            if not windows:
+                slots = []
+            else:
+                cursor.execute(
+                    """
+                    SELECT appointment_time FROM appointment 
+                    WHERE doctor_id = %s AND date = %s 
+                    AND status NOT IN ('CANCELLED', 'REJECTED')
+                    """,
+                    (doctor_id, date),
+                )
+                booked = [row[0] for row in cursor.fetchall()]
+                slots = slot_engine.compute_free_slots(windows, booked)
+        except Exception:
+            logger.exception("Error getting available slots")
+            return []
+        finally:
+            cursor.close()
+
+        slot_engine.cache_slots(doctor_id, date, slots)
+        return slots
+
+    def find_free_slots(self, doctor_ids: List[int], start_date, end_date,
+                        limit: Optional[int] = None, not_before=None) -> List[dict]:
+        """
+        Find free slots for several doctors across a date range
+
+        Availability windows and booked times for the whole range are loaded
+        with one query each and combined per doctor-day by the slot engine.
+
+        Args:
+            doctor_ids: Doctors to search
+            start_date: First day (inclusive)
+            end_date: Last day (inclusive)
+            limit: Return only the N earliest slots
+            not_before: Optional datetime; earlier slots are skipped
+
+        Returns:
+            List of {'doctor_id', 'date', 'time'} dicts ordered by date, time, doctor
+        """
+        doctor_ids = sorted({int(d) for d in doctor_ids})
+        if not doctor_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(doctor_ids))
+        params = tuple(doctor_ids) + (start_date, end_date)
+
+        cursor = self.db.cursor()
+        try:
+            cursor.execute(
+                f"""
+                SELECT doctor_id, date, start_time, end_time
+                FROM doctor_availability
+                WHERE doctor_id IN ({placeholders}) AND date BETWEEN %s AND %s
+                """,
+                params,
+            )
+            windows = {}
+            for doctor_id, day, start_time, end_time in cursor.fetchall():
+                windows.setdefault((doctor_id, str(day)), []).append((start_time, end_time))
+            if not windows:
                 return []
-            
-            print(f"✅ Found {len(rows)} availability entries")
-            
-            # Combine all availability windows
-            all_slots = []
-            for row in rows:
-                start_time = row[0]
-                end_time = row[1]
-                
-                print(f"   Processing availability: {start_time} to {end_time}")
-                
-                # Convert times (same conversion logic as before)
-                from datetime import time, timedelta
-                
-                # Convert start_time
-                if isinstance(start_time, timedelta):
-                    total_seconds = int(start_time.total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    start_time_obj = time(hours, minutes, 0)
-                elif isinstance(start_time, str):
-                    start_time = start_time.split('.')[0]
-                    if start_time.count(':') == 2:
-                        h, m, s = map(int, start_time.split(':'))
-                        start_time_obj = time(h, m, s)
-                    else:
-                        h, m = map(int, start_time.split(':'))
-                        start_time_obj = time(h, m, 0)
-                elif hasattr(start_time, 'hour'):
-                    start_time_obj = start_time
-                else:
-                    continue
-                
-                # Convert end_time
-                if isinstance(end_time, timedelta):
-                    total_seconds = int(end_time.total_seconds())
-                    hours = total_seconds // 3600
-                    minutes = (total_seconds % 3600) // 60
-                    end_time_obj = time(hours, minutes, 0)
-                elif isinstance(end_time, str):
-                    end_time = end_time.split('.')[0]
-                    if end_time.count(':') == 2:
-                        h, m, s = map(int, end_time.split(':'))
-                        end_time_obj = time(h, m, s)
-                    else:
-                        h, m = map(int, end_time.split(':'))
-                        end_time_obj = time(h, m, 0)
-                elif hasattr(end_time, 'hour'):
-                    end_time_obj = end_time
-                else:
-                    continue
-                
-                # Generate slots for this availability window
-                start_minutes = start_time_obj.hour * 60 + start_time_obj.minute
-                end_minutes = end_time_obj.hour * 60 + end_time_obj.minute
-                
-                current = start_minutes
-                while current < end_minutes:
-                    hour = current // 60
-                    minute = current % 60
-                    slot = f"{hour:02d}:{minute:02d}"
-                    if slot not in all_slots:  # Avoid duplicates
-                        all_slots.append(slot)
-                    current += 30
-            
-            print(f"✅ Generated {len(all_slots)} total slots from all availability windows")
-            
-            # Get booked appointments
+
             cursor.execute(
-                """
-                SELECT appointment_time FROM appointment 
-                WHERE doctor_id = %s AND date = %s 
+                f"""
+                SELECT doctor_id, date, appointment_time
+                FROM appointment
+                WHERE doctor_id IN ({placeholders}) AND date BETWEEN %s AND %s
                 AND status NOT IN ('CANCELLED', 'REJECTED')
                 """,
-                (doctor_id, date),
+                params,
             )
-            
-            booked_times = []
-            for booked_row in cursor.fetchall():
-                time_val = booked_row[0]
-                if time_val:
-                    if hasattr(time_val, 'strftime'):
-                        booked_time = time_val.strftime("%H:%M")
-                    elif isinstance(time_val, timedelta):
-                        total_seconds = int(time_val.total_seconds())
-                        hours = total_seconds // 3600
-                        minutes = (total_seconds % 3600) // 60
-                        booked_time = f"{hours:02d}:{minutes:02d}"
-                    else:
-                        time_str = str(time_val)
-                        if ':' in time_str:
-                            booked_time = time_str[:5]
-                        else:
-                            booked_time = time_str
-                    booked_times.append(booked_time)
-            
-            print(f"📅 Booked appointments: {booked_times}")
-            
-            # Filter out booked slots
-            available_slots = []
-            for slot in all_slots:
-                if slot not in booked_times:
-                    available_slots.append(slot)
-            
-            print(f"🎯 Final available slots ({len(available_slots)}): {available_slots}")
-            print(f"🔚 END DEBUG\n")
-            
-            cursor.close()
-            return available_slots
-            
-        except Exception as e:
-            print(f"💥 ERROR in get_available_slots: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            booked = {}
+            for doctor_id, day, appointment_time in cursor.fetchall():
+                booked.setdefault((doctor_id, str(day)), []).append(appointment_time)
+        except Exception:
+            logger.exception("Error finding free slots")
             return []
+        finally:
+            cursor.close()
+
+        cutoff = None
+        if not_before is not None:
+            cutoff = (not_before.date().isoformat(), not_before.strftime('%H:%M'))
+
+        results = []
+        for (doctor_id, day), day_windows in windows.items():
+            slots = slot_engine.compute_free_slots(day_windows, booked.get((doctor_id, day), []))
+            slot_engine.cache_slots(doctor_id, day, slots)
+            for slot in slots:
+                if cutoff and (day, slot) < cutoff:
+                    continue
+                results.append({'doctor_id': doctor_id, 'date': day, 'time': slot})
+
+        results.sort(key=lambda r: (r['date'], r['time'], r['doctor_id']))
+        return results[:limit] if limit else results
+
+    def _invalidate_slots_for(self, appointment_id: int) -> None:
+        """Drop cached slots for the doctor-day an appointment belongs to."""
+        cursor = self.db.cursor(buffered=True)
+        try:
+            cursor.execute("SELECT doctor_id, date FROM appointment WHERE id = %s", (appointment_id,))
+            row = cursor.fetchone()
+            if row:
+                slot_engine.invalidate(row[0], row[1])
+        except Exception:
+            logger.exception("Error invalidating slot cache")
+        finally:
+            cursor.close()
         
 #====================================Cancel Appointment============================================
     def cancel_appointment(self, appointment_id: int, patient_id: int) -> bool:
@@ -500,10 +427,12 @@ class AppointmentRepository(BaseRepository):
             self.db.commit()
             affected_rows = cursor.rowcount
             cursor.close()
+            if affected_rows > 0:
+                self._invalidate_slots_for(appointment_id)
             return affected_rows > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error cancelling appointment: {e}")
+            logger.exception("Error cancelling appointment")
             cursor.close()
             return False
         
@@ -523,7 +452,7 @@ class AppointmentRepository(BaseRepository):
             appointment = cursor.fetchone()
             
             if not appointment:
-                print(f"DEBUG: Appointment {appointment_id} not found")
+                logger.debug("Appointment %s not found", appointment_id)
                 return False
                 
             appt_doctor_id = appointment[0]
@@ -541,7 +470,8 @@ class AppointmentRepository(BaseRepository):
             assistant_assigned = cursor.fetchone()
             
             if not assistant_assigned:
-                print(f"DEBUG: Assistant {assistant_id} not assigned to doctor {appt_doctor_id}")
+                logger.warning("Assistant %s tried to cancel appointment %s of doctor %s",
+                               assistant_id, appointment_id, appt_doctor_id)
                 return False
             
             # Cancel the appointment
@@ -555,13 +485,14 @@ class AppointmentRepository(BaseRepository):
             )
             self.db.commit()
             affected_rows = cursor.rowcount
-            
-            print(f"DEBUG: Assistant {assistant_id} cancelled appointment {appointment_id}")
+            if affected_rows > 0:
+                self._invalidate_slots_for(appointment_id)
+                logger.info("Assistant %s cancelled appointment %s", assistant_id, appointment_id)
             return affected_rows > 0
             
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error cancelling appointment: {e}")
+            logger.exception("Error cancelling appointment")
             return False
         finally:
             cursor.close()
@@ -579,10 +510,12 @@ class AppointmentRepository(BaseRepository):
             self.db.commit()
             affected_rows = cursor.rowcount
             cursor.close()
+            if affected_rows > 0:
+                self._invalidate_slots_for(appointment_id)
             return affected_rows > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error rejecting appointment: {e}")
+            logger.exception("Error rejecting appointment")
             cursor.close()
             return False
 #=================================================================================================
@@ -616,75 +549,44 @@ class AppointmentRepository(BaseRepository):
             self.db.commit()
             affected_rows = cursor.rowcount
             cursor.close()
+            if affected_rows > 0:
+                self._invalidate_slots_for(appointment_id)
             return affected_rows > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error approving appointment: {e}")
+            logger.exception("Error approving appointment")
             cursor.close()
             return False
 
     def list_pending_by_doctor(self, doctor_id: int) -> List[Appointment]:
-        cursor = self.db.cursor(dictionary=True, buffered=True)
-        cursor.execute(
-            """
-            SELECT id, patient_id, doctor_id, date, appointment_time, status, 
-                   follow_up_date, assistant_id, create_at AS created_at
+        return self._fetch_all_as(
+            self._appointment,
+            f"""
+            SELECT {self.COLUMNS}
             FROM appointment 
             WHERE doctor_id = %s AND status = 'PENDING' 
             ORDER BY date ASC, appointment_time ASC
             """,
             (doctor_id,)
         )
-        rows = cursor.fetchall()
-        cursor.close()
-        
-        appointments = []
-        for row in rows:
-            try:
-                # Convert time objects to strings if needed
-                if row.get('appointment_time') and hasattr(row['appointment_time'], 'strftime'):
-                    row['appointment_time'] = row['appointment_time'].strftime('%H:%M')
-                
-                appointments.append(Appointment(**row))
-            except Exception as e:
-                print(f"Error creating Appointment object: {e}")
-                continue
-        return appointments
-    
 
     def get_appointments_by_patient_and_doctor(self, patient_id: int, doctor_id: int) -> List[Appointment]:
         """Get appointments for a specific patient with a specific doctor."""
-        cursor = self.db.cursor(dictionary=True, buffered=True)
         try:
-            cursor.execute(
-                """
-                SELECT id, patient_id, doctor_id, date, appointment_time, status, 
-                    follow_up_date, assistant_id, create_at AS created_at
+            return self._fetch_all_as(
+                self._appointment,
+                f"""
+                SELECT {self.COLUMNS}
                 FROM appointment
                 WHERE patient_id = %s AND doctor_id = %s
                 ORDER BY date DESC, appointment_time DESC
                 """,
                 (patient_id, doctor_id),
             )
-            rows = cursor.fetchall()
-            
-            appointments = []
-            for row in rows:
-                try:
-                    # Convert time objects to strings if needed
-                    if row.get('appointment_time') and hasattr(row['appointment_time'], 'strftime'):
-                        row['appointment_time'] = row['appointment_time'].strftime('%H:%M')
-                    
-                    appointments.append(Appointment(**row))
-                except Exception as e:
-                    print(f"Error creating Appointment object: {e}")
-                    continue
-            return appointments
-        except Exception as e:
-            print(f"Error getting appointments by patient and doctor: {e}")
+        except Exception:
+            logger.exception("Error getting appointments by patient and doctor")
             return []
-        finally:
-            cursor.close()
+
     def get_today_appointments(self, today_date):
         cursor = self.db.cursor(dictionary=True, buffered=True)
         try:
@@ -723,6 +625,8 @@ class AppointmentRepository(BaseRepository):
             cursor.execute("""
                 SELECT a.*, 
                     CONCAT(p.firstName, ' ', p.lastName) as patient_name,
+                    p.firstName as patient_first_name,
+                    p.lastName as patient_last_name,
                     p.phone as patient_phone
                 FROM appointment a
                 LEFT JOIN patient p ON a.patient_id = p.id
@@ -748,6 +652,128 @@ class AppointmentRepository(BaseRepository):
         finally:
             cursor.close()
 
+    def get_schedule_counts(self, doctor_id: int, today, week_start, week_end) -> dict:
+        """
+        Get the doctor's schedule counters in a single round trip
+
+        Each counter is its own index range: today and the visible week on
+        idx_appointment_doctor_date, pending on idx_appointment_doctor_status,
+        so the cost does not grow with the doctor's past appointments.
+
+        Returns:
+            Dict with 'today', 'week' and 'pending' appointment counts
+        """
+        cursor = self.db.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM appointment
+                     WHERE doctor_id = %s AND date = %s) AS today,
+                    (SELECT COUNT(*) FROM appointment
+                     WHERE doctor_id = %s AND date BETWEEN %s AND %s) AS week,
+                    (SELECT COUNT(*) FROM appointment
+                     WHERE doctor_id = %s AND status = 'PENDING') AS pending
+                """,
+                (doctor_id, today, doctor_id, week_start, week_end, doctor_id),
+            )
+            row = cursor.fetchone() or {}
+            return {
+                'today': int(row.get('today') or 0),
+                'week': int(row.get('week') or 0),
+                'pending': int(row.get('pending') or 0),
+            }
+        except Exception:
+            logger.exception("Error getting schedule counts")
+            return {'today': 0, 'week': 0, 'pending': 0}
+        finally:
+            cursor.close()
+
+    def get_patient_counts(self, patient_id: int) -> dict:
+        """
+        Count a patient's appointments in one aggregate query
+
+        Returns:
+            Dict with 'total' and 'upcoming' (BOOKED or PENDING) counts
+        """
+        cursor = self.db.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute(
+                """
+                SELECT
+                    COUNT(*) AS total,
+                    COALESCE(SUM(status IN ('BOOKED', 'PENDING')), 0) AS upcoming
+                FROM appointment
+                WHERE patient_id = %s
+                """,
+                (patient_id,),
+            )
+            row = cursor.fetchone() or {}
+            return {'total': int(row.get('total') or 0), 'upcoming': int(row.get('upcoming') or 0)}
+        except Exception:
+            logger.exception("Error getting patient appointment counts")
+            return {'total': 0, 'upcoming': 0}
+        finally:
+            cursor.close()
+
+    def get_day_counts(self, doctor_id: int, day) -> dict:
+        """
+        Count one doctor-day's appointments and distinct patients
+
+        Reads only that day's range of idx_appointment_doctor_date.
+
+        Returns:
+            Dict with 'appointments' and 'patients' counts
+        """
+        cursor = self.db.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute(
+                """
+                SELECT COUNT(*) AS appointments, COUNT(DISTINCT patient_id) AS patients
+                FROM appointment
+                WHERE doctor_id = %s AND date = %s
+                """,
+                (doctor_id, day),
+            )
+            row = cursor.fetchone() or {}
+            return {'appointments': int(row.get('appointments') or 0), 'patients': int(row.get('patients') or 0)}
+        except Exception:
+            logger.exception("Error getting day counts")
+            return {'appointments': 0, 'patients': 0}
+        finally:
+            cursor.close()
+
+    def get_doctor_totals(self, doctor_id: int, since) -> dict:
+        """
+        Count a doctor's appointments dated on or after ``since`` and the pending ones
+
+        The total is a range on idx_appointment_doctor_date and the pending
+        count a lookup on idx_appointment_doctor_status, so neither grows with
+        the doctor's history before ``since``.
+
+        Returns:
+            Dict with 'total' and 'pending' counts
+        """
+        cursor = self.db.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM appointment
+                     WHERE doctor_id = %s AND date >= %s) AS total,
+                    (SELECT COUNT(*) FROM appointment
+                     WHERE doctor_id = %s AND status = 'PENDING') AS pending
+                """,
+                (doctor_id, since, doctor_id),
+            )
+            row = cursor.fetchone() or {}
+            return {'total': int(row.get('total') or 0), 'pending': int(row.get('pending') or 0)}
+        except Exception:
+            logger.exception("Error getting doctor appointment totals")
+            return {'total': 0, 'pending': 0}
+        finally:
+            cursor.close()
+
     def update_appointment_status(self, appointment_id, status):
         cursor = self.db.cursor(buffered=True)
         try:
@@ -757,10 +783,13 @@ class AppointmentRepository(BaseRepository):
                 WHERE id = %s
             """, (status, appointment_id))
             self.db.commit()
-            return cursor.rowcount > 0
-        except Exception as e:
+            updated = cursor.rowcount > 0
+            if updated:
+                self._invalidate_slots_for(appointment_id)
+            return updated
+        except Exception:
             self.db.rollback()
-            print(f"Error updating appointment status: {e}")
+            logger.exception("Error updating appointment status")
             return False
         finally:
             cursor.close()
\ No newline at end of file
@@ -1,7 +1,10 @@
+import logging
 from typing import List, Optional, Dict, Any
 from models.assistant_model import Assistant
 from repositories.BaseRepository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
 class AssistantRepository(BaseRepository):
     def get_by_user_id(self, user_id: int) -> Optional[Assistant]:
         cursor = self.db.cursor(dictionary=True, buffered=True)
@@ -47,9 +50,9 @@ class AssistantRepository(BaseRepository):
             )
             self.db.commit()
             return self.get_by_id(cursor.lastrowid)
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error creating assistant: {e}")
+            logger.exception("Error creating assistant")
             return None
         finally:
             cursor.close()
@@ -143,9 +146,9 @@ class AssistantRepository(BaseRepository):
             )
             self.db.commit()
             return cursor.rowcount > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error updating assistant: {e}")
+            logger.exception("Error updating assistant")
             return False
         finally:
             cursor.close()
@@ -157,9 +160,9 @@ class AssistantRepository(BaseRepository):
             cursor.execute("DELETE FROM assistant WHERE id = %s", (assistant_id,))
             self.db.commit()
             return cursor.rowcount > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error deleting assistant {assistant_id}: {e}")
+            logger.exception("Error deleting assistant %s", assistant_id)
             return False
         finally:
             cursor.close()
@@ -189,8 +192,8 @@ class AssistantRepository(BaseRepository):
             cursor.execute("SELECT COUNT(*) as count FROM assistant")
             result = cursor.fetchone()
             return result[0] if result else 0
-        except Exception as e:
-            print(f"Error getting assistant count: {e}")
+        except Exception:
+            logger.exception("Error getting assistant count")
             return 0
         finally:
             cursor.close()
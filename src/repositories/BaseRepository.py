@@ -1,6 +1,75 @@
+from itertools import starmap
+
 from database.db_singleton import DatabaseConnection
+from utils import pagination
 
 class BaseRepository:# instead of repeating: db = DatabaseConnection().get_connection()
     def __init__(self, connection=None):
-        self.db = connection or DatabaseConnection().get_connection()
+        self._connection = connection
+
+    @property
+    def db(self):
+        """Injected connection, or the one checked out for the current request."""
+        if self._connection is not None:
+            return self._connection
+        return DatabaseConnection().get_connection()
+
+    @db.setter
+    def db(self, connection):
+        self._connection = connection
+
+    def _fetch_all_as(self, factory, query, params=()):
+        """Run ``query`` and build ``factory(*row)`` for every row.
+
+        Uses a plain tuple cursor, so no per-row dict is built: the SELECT list
+        must follow ``factory``'s argument order (see the repositories' COLUMNS).
+        """
+        cursor = self.db.cursor(buffered=True)
+        try:
+            cursor.execute(query, params)
+            return list(starmap(factory, cursor.fetchall()))
+        finally:
+            cursor.close()
+
+    def _fetch_one_as(self, factory, query, params=()):
+        """Like :meth:`_fetch_all_as` for the first row; None when there is none."""
+        cursor = self.db.cursor(buffered=True)
+        try:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            return factory(*row) if row else None
+        finally:
+            cursor.close()
+
+    def _fetch_page_as(self, factory, columns, table, where="", params=(), cursor=None,
+                       limit=25, newest_first=True, with_total=True):
+        """One keyset page of ``table`` ordered by ``(create_at, id)``.
+
+        ``cursor`` is the previous page's ``next_cursor``; an invalid one gives
+        the first page. ``factory`` must produce objects with ``created_at``
+        and ``id``. Returns a :class:`utils.pagination.Page`.
+        """
+        seek, seek_params = pagination.seek_clause(pagination.decode_cursor(cursor), newest_first)
+        conditions = " AND ".join(c for c in (where, seek) if c)
+        filters = f" WHERE {conditions}" if conditions else ""
+        order = "DESC" if newest_first else "ASC"
+        rows = self._fetch_all_as(
+            factory,
+            f"SELECT {columns} FROM {table}{filters} ORDER BY create_at {order}, id {order} LIMIT %s",
+            tuple(params) + seek_params + (limit + 1,),
+        )
+        items = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = pagination.encode_cursor(items[-1].created_at, items[-1].id)
 
+        total = None
+        if with_total:
+            count = self.db.cursor(buffered=True)
+            try:
+                count.execute(f"SELECT COUNT(*) FROM {table}" + (f" WHERE {where}" if where else ""), tuple(params))
+                row = count.fetchone()
+                total = row[0] if row else 0
+            finally:
+                count.close()
+        return pagination.Page(items, next_cursor, total)
@@ -1,7 +1,10 @@
+import logging
 from typing import Optional
 from models.contact_model import Contact
 from repositories.BaseRepository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
 class ContactRepository(BaseRepository):
     def save_message(self, name: str, email: str, message: str) -> Optional[Contact]:
         cursor = self.db.cursor(dictionary=True)
@@ -21,9 +24,9 @@ class ContactRepository(BaseRepository):
             )
             row = cursor.fetchone()
             return Contact(**row) if row else None
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error saving contact message: {e}")
+            logger.exception("Error saving contact message")
             return None
         finally:
             cursor.close()
\ No newline at end of file
@@ -1,6 +1,10 @@
+import logging
 from typing import List, Optional
 from models.doctorAvailability_model import DoctorAvailability
 from repositories.BaseRepository import BaseRepository
+from services import slot_engine
+
+logger = logging.getLogger(__name__)
 
 class DoctorAvailabilityRepository(BaseRepository):
     def create_availability(self, doctor_id: int, date: str, start_time: str, end_time: str) -> Optional[DoctorAvailability]:
@@ -14,10 +18,11 @@ class DoctorAvailabilityRepository(BaseRepository):
                 (doctor_id, date, start_time, end_time),
             )
             self.db.commit()
+            slot_engine.invalidate(doctor_id, date)
             return self.get_by_id(cursor.lastrowid)
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error creating availability: {e}")
+            logger.exception("Error creating availability")
             return None
         finally:
             cursor.close()
@@ -53,7 +58,6 @@ class DoctorAvailabilityRepository(BaseRepository):
                 (doctor_id,)
             )
         rows = cursor.fetchall()
-        print(f"DEBUG list_by_doctor: Found {len(rows)} entries for doctor {doctor_id}")
         cursor.close()
         
         availabilities = []
@@ -64,14 +68,18 @@ class DoctorAvailabilityRepository(BaseRepository):
         return availabilities
 
     def delete_availability(self, av_id: int) -> bool:
-        cursor = self.db.cursor()
+        cursor = self.db.cursor(buffered=True)
         try:
+            cursor.execute("SELECT doctor_id, date FROM doctor_availability WHERE id = %s", (av_id,))
+            row = cursor.fetchone()
             cursor.execute("DELETE FROM doctor_availability WHERE id = %s", (av_id,))
             self.db.commit()
+            if row:
+                slot_engine.invalidate(row[0], row[1])
             return True
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error deleting availability: {e}")
+            logger.exception("Error deleting availability")
             return False
         finally:
             cursor.close()
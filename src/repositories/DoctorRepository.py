@@ -1,68 +1,44 @@
+import logging
 from typing import List, Optional
 from models.doctor_model import Doctor
 from repositories.BaseRepository import BaseRepository
+from services import doctor_directory
+
+logger = logging.getLogger(__name__)
 
 
 #--------------------------------->>>DoctorRepository<<<---------------------------------
 class DoctorRepository(BaseRepository):
+    # SELECT list in Doctor() argument order, for the tuple-cursor readers
+    COLUMNS = "id, firstName, lastName, phone, schedule, user_id, specialization, create_at"
+
     def get_by_user_id(self, user_id: int) -> Optional[Doctor]:
-        cursor = self.db.cursor(dictionary=True, buffered=True)
-        cursor.execute(
-            """
-            SELECT id, firstName, lastName, phone, schedule, user_id, specialization, create_at AS create_at
-            FROM doctor
-            WHERE user_id = %s
-            """,
-            (user_id,),
-        )
-        row = cursor.fetchone()
-        cursor.close()
-        return Doctor(**row) if row else None
+        return self._fetch_one_as(Doctor, f"SELECT {self.COLUMNS} FROM doctor WHERE user_id = %s", (user_id,))
 
     def get_by_id(self, doctor_id: int) -> Optional[Doctor]:
-        cursor = self.db.cursor(dictionary=True, buffered=True)
-        try:
-            cursor.execute(
-                """
-                SELECT id, firstName, lastName, phone, schedule, user_id, specialization, create_at AS create_at
-                FROM doctor
-                WHERE id = %s
-                """,
-                (doctor_id,),
-            )
-            row = cursor.fetchone()
-            return Doctor(**row) if row else None
-        finally:
-            cursor.close()
+        doctor = self.directory().by_id.get(doctor_id)
+        if doctor is None:
+            # Possibly added by another worker since our snapshot was taken
+            doctor = self._fetch_by_id(doctor_id)
+            if doctor is not None:
+                doctor_directory.invalidate()
+        return doctor
+
+    def _fetch_by_id(self, doctor_id: int) -> Optional[Doctor]:
+        return self._fetch_one_as(Doctor, f"SELECT {self.COLUMNS} FROM doctor WHERE id = %s", (doctor_id,))
+
+    def directory(self) -> doctor_directory.DoctorDirectory:
+        """Cached snapshot of every doctor (see services/doctor_directory.py)."""
+        return doctor_directory.get_directory(self._fetch_all)
 
     def list_all(self) -> List[Doctor]:
-        cursor = self.db.cursor(dictionary=True, buffered=True)
-        try:
-            cursor.execute(
-                """
-                SELECT id, firstName, lastName, phone, schedule, user_id, specialization, create_at AS create_at
-                FROM doctor
-                ORDER BY lastName, firstName
-                """
-            )
-            rows = cursor.fetchall()
-            return [Doctor(**row) for row in rows] if rows else []
-        finally:
-            cursor.close()
+        return list(self.directory().doctors)
+
+    def _fetch_all(self) -> List[Doctor]:
+        return self._fetch_all_as(Doctor, f"SELECT {self.COLUMNS} FROM doctor ORDER BY lastName, firstName")
 
     def list_by_specialization(self, specialization: str) -> List[Doctor]:
-        cursor = self.db.cursor(dictionary=True, buffered=True)
-        cursor.execute(
-            """
-            SELECT id, firstName, lastName, phone, schedule, user_id, specialization, create_at AS create_at
-            FROM doctor
-            WHERE specialization = %s
-            """,
-            (specialization,),
-        )
-        rows = cursor.fetchall()
-        cursor.close()
-        return [Doctor(**row) for row in rows] if rows else []
+        return list(self.directory().by_specialization.get(specialization, ()))
 
     def update_doctor(self, doctor_id: int, first_name: str, last_name: str, phone: str, specialization: str) -> bool:
         cursor = self.db.cursor(buffered=True)
@@ -72,6 +48,7 @@ class DoctorRepository(BaseRepository):
         )
         self.db.commit()
         cursor.close()
+        doctor_directory.invalidate()
         return True
 
     def create_doctor(self, first_name: str, last_name: str, phone: str, user_id: Optional[int], specialization: str = "General", schedule: Optional[str] = None) -> Optional[Doctor]:
@@ -85,10 +62,11 @@ class DoctorRepository(BaseRepository):
                 (first_name, last_name, phone, schedule, user_id, specialization),
             )
             self.db.commit()
-            return self.get_by_id(cursor.lastrowid)
-        except Exception as e:
+            doctor_directory.invalidate()
+            return self._fetch_by_id(cursor.lastrowid)
+        except Exception:
             self.db.rollback()
-            print(f"Error creating doctor: {e}")
+            logger.exception("Error creating doctor")
             return None
         finally:
             cursor.close()
@@ -114,8 +92,8 @@ class DoctorRepository(BaseRepository):
             )
             rows = cursor.fetchall()
             return [Doctor(**row) for row in rows] if rows else []
-        except Exception as e:
-            print(f"Error searching doctors: {e}")
+        except Exception:
+            logger.exception("Error searching doctors")
             return []
         finally:
             if cursor:
@@ -129,45 +107,27 @@ class DoctorRepository(BaseRepository):
             cursor = self.db.cursor(buffered=True)
             cursor.execute("DELETE FROM doctor WHERE id = %s", (doctor_id,))
             self.db.commit()
+            doctor_directory.invalidate()
             return cursor.rowcount > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error deleting doctor {doctor_id}: {e}")
+            logger.exception("Error deleting doctor %s", doctor_id)
             return False
         finally:
             if cursor:
                 cursor.close()
     def get_total_count(self) -> int:
         """Get total number of doctors."""
-        cursor = None
         try:
-            cursor = self.db.cursor(buffered=True)
-            cursor.execute("SELECT COUNT(*) FROM doctor")
-            return cursor.fetchone()[0]
-        except Exception as e:
-            print(f"Error getting doctor count: {e}")
+            return len(self.directory().doctors)
+        except Exception:
+            logger.exception("Error getting doctor count")
             return 0
-        finally:
-            if cursor:
-                cursor.close()
 
     def get_counts_by_specialization(self) -> dict:
         """Get count of doctors by specialization."""
-        cursor = None
         try:
-            cursor = self.db.cursor(dictionary=True, buffered=True)
-            cursor.execute(
-                """
-                SELECT specialization, COUNT(*) as count
-                FROM doctor
-                GROUP BY specialization
-                ORDER BY count DESC
-                """
-            )
-            return {row['specialization']: row['count'] for row in cursor.fetchall()}
-        except Exception as e:
-            print(f"Error getting specialization counts: {e}")
+            return dict(self.directory().specialization_counts)
+        except Exception:
+            logger.exception("Error getting specialization counts")
             return {}
-        finally:
-            if cursor:
-                cursor.close()
\ No newline at end of file
@@ -1,7 +1,10 @@
+import logging
 from typing import List, Optional
 from models.doctorSchedule_model import DoctorSchedule
 from repositories.BaseRepository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
 class DoctorScheduleRepository(BaseRepository):
     def create_schedule(self, doctor_id: int, day_of_week: str, start_time: str, end_time: str) -> Optional[DoctorSchedule]:
         """Add a weekly schedule entry for a doctor"""
@@ -17,9 +20,9 @@ class DoctorScheduleRepository(BaseRepository):
             self.db.commit()
             schedule_id = cursor.lastrowid
             return self.get_by_id(schedule_id)
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error creating schedule: {e}")
+            logger.exception("Error creating schedule")
             return None
         finally:
             cursor.close()
@@ -97,9 +100,9 @@ class DoctorScheduleRepository(BaseRepository):
             cursor.execute("DELETE FROM doctor_schedule WHERE id = %s", (schedule_id,))
             self.db.commit()
             return True
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error deleting schedule: {e}")
+            logger.exception("Error deleting schedule")
             return False
         finally:
             cursor.close()
@@ -110,9 +113,9 @@ class DoctorScheduleRepository(BaseRepository):
             cursor.execute("DELETE FROM doctor_schedule WHERE doctor_id = %s", (doctor_id,))
             self.db.commit()
             return True
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error deleting doctor schedule: {e}")
+            logger.exception("Error deleting doctor schedule")
             return False
         finally:
             cursor.close()
@@ -126,9 +129,9 @@ class DoctorScheduleRepository(BaseRepository):
             )
             self.db.commit()
             return True
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error updating schedule: {e}")
+            logger.exception("Error updating schedule")
             return False
         finally:
             cursor.close()
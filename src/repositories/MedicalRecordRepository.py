@@ -1,7 +1,11 @@
-from typing import List, Optional
+import logging
+from typing import Any, Dict, List, Optional
 from models.MedicalRecord_model import MedicalRecord
+from models.upload_model import UploadedFile
 from repositories.BaseRepository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
 class MedicalRecordRepository(BaseRepository):
     def create_record(
         self, 
@@ -25,9 +29,9 @@ class MedicalRecordRepository(BaseRepository):
             self.db.commit()
             new_id = cursor.lastrowid
             return self.get_by_id(new_id)
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error creating medical record: {e}")
+            logger.exception("Error creating medical record")
             return None
         finally:
             cursor.close()
@@ -63,12 +67,67 @@ class MedicalRecordRepository(BaseRepository):
                     'created_at': row.get("created_at"),
                 }
                 records.append(MedicalRecord(**record_data))
-            except Exception as e:
-                print(f"Error creating MedicalRecord object: {e}")
-                print(f"Row data: {row}")
+            except Exception:
+                logger.exception("Error creating MedicalRecord object (row id %s)", row.get("id"))
                 continue
         return records
 
+    def get_patient_chart(self, patient_id: int) -> List[MedicalRecord]:
+        """
+        Get a patient's full chart: records with doctor names and attached files
+        
+        Uses two queries (records joined to doctor, then every file of those
+        records) and groups the files onto their records in Python.
+        
+        Args:
+            patient_id: Patient ID
+        
+        Returns:
+            List of MedicalRecord objects, newest first, with ``doctor_name``
+            and ``files`` (UploadedFile objects) set
+        """
+        cursor = self.db.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                """
+                SELECT r.id, r.patient_id, r.doctor_id, r.diagnosis, r.treatment, r.upload_date,
+                       r.follow_up_date, r.appointment_id, r.uploaded_by_user_id, r.create_at AS created_at,
+                       CONCAT(d.firstName, ' ', d.lastName) AS doctor_name
+                FROM MedicalRecord r
+                LEFT JOIN doctor d ON d.id = r.doctor_id
+                WHERE r.patient_id = %s
+                ORDER BY r.upload_date DESC, r.id DESC
+                """,
+                (patient_id,),
+            )
+            records = [MedicalRecord(**row) for row in cursor.fetchall()]
+            if not records:
+                return []
+
+            cursor.execute(
+                """
+                SELECT f.id, f.file_path, f.file_type, f.uploaded_by_user_id, f.upload_date,
+                       f.record_id, f.patient_id, f.appointment_id, f.create_at AS created_at,
+                       f.sha256, f.size_bytes, f.original_name, f.thumbnail_path, f.preview_path
+                FROM UploadedFile f
+                JOIN MedicalRecord r ON r.id = f.record_id
+                WHERE r.patient_id = %s
+                ORDER BY f.upload_date DESC, f.id DESC
+                """,
+                (patient_id,),
+            )
+            by_record = {record.id: record for record in records}
+            for row in cursor.fetchall():
+                record = by_record.get(row["record_id"])
+                if record is not None:
+                    record.files.append(UploadedFile(**row))
+            return records
+        except Exception:
+            logger.exception("Error getting patient chart")
+            return []
+        finally:
+            cursor.close()
+
     def get_by_id(self, record_id: int) -> Optional[MedicalRecord]:
         cursor = self.db.cursor(dictionary=True)
         cursor.execute(
@@ -99,9 +158,8 @@ class MedicalRecordRepository(BaseRepository):
                 'created_at': row.get("created_at"),
             }
             return MedicalRecord(**record_data)
-        except Exception as e:
-            print(f"Error creating MedicalRecord object: {e}")
-            print(f"Row data: {row}")
+        except Exception:
+            logger.exception("Error creating MedicalRecord object (row id %s)", row.get("id"))
             return None
 
     def get_patient_records_count(self, patient_id: int) -> int:
@@ -127,10 +185,56 @@ class MedicalRecordRepository(BaseRepository):
             result = cursor.fetchone()
             cursor.close()
             return result['count'] if result else 0
-        except Exception as e:
-            print(f"Error getting patient records count: {e}")
+        except Exception:
+            logger.exception("Error getting patient records count")
             return 0
 
+    def get_stats_for_patients(self, patient_ids: Optional[List[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """
+        Get record count and last visit for many patients in one GROUP BY query
+
+        Args:
+            patient_ids: Patients to include (e.g. one page); None means all patients
+
+        Returns:
+            Dict mapping patient_id to {'records_count': int, 'last_visit': 'YYYY-MM-DD' or None}.
+            Patients without records are absent from the result.
+        """
+        if patient_ids is not None and not patient_ids:
+            return {}
+
+        query = """
+            SELECT patient_id, COUNT(*) AS records_count, MAX(upload_date) AS last_visit
+            FROM MedicalRecord
+        """
+        params = ()
+        if patient_ids is not None:
+            placeholders = ", ".join(["%s"] * len(patient_ids))
+            query += f" WHERE patient_id IN ({placeholders})"
+            params = tuple(patient_ids)
+        query += " GROUP BY patient_id"
+
+        cursor = None
+        try:
+            cursor = self.db.cursor(dictionary=True)
+            cursor.execute(query, params)
+            stats = {}
+            for row in cursor.fetchall():
+                last_visit = row['last_visit']
+                if last_visit is not None and hasattr(last_visit, 'strftime'):
+                    last_visit = last_visit.strftime('%Y-%m-%d')
+                stats[row['patient_id']] = {
+                    'records_count': row['records_count'],
+                    'last_visit': str(last_visit) if last_visit is not None else None,
+                }
+            return stats
+        except Exception:
+            logger.exception("Error getting patient record stats")
+            return {}
+        finally:
+            if cursor is not None:
+                cursor.close()
+
     def get_last_visit(self, patient_id: int) -> Optional[str]:
         """
         Get the last visit date for a patient
@@ -162,6 +266,6 @@ class MedicalRecordRepository(BaseRepository):
                 else:
                     return str(last_visit)
             return None
-        except Exception as e:
-            print(f"Error getting last visit: {e}")
+        except Exception:
+            logger.exception("Error getting last visit")
             return None
\ No newline at end of file
@@ -1,9 +1,16 @@
+import logging
+import re
 from typing import List, Optional
-from models.patient_model import Patient
+from models.patient_model import Patient, age_from_birthdate
 from repositories.BaseRepository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
 #--------------------------------->>>PatientRepository<<<--------------------------------- 
 class PatientRepository(BaseRepository):
+    # SELECT list in Patient() argument order, for the tuple-cursor readers
+    COLUMNS = "id, firstName, lastName, gender, birth_date, phone, address, user_id, create_at AS created_at"
+
     def create_patient(
         self,
         first_name: str,
@@ -16,8 +23,6 @@ class PatientRepository(BaseRepository):
     ) -> Optional[Patient]:
         cursor = None
         try:
-            print(f"DEBUG create_patient: firstName={first_name}, lastName={last_name}, gender={gender}, birth_date={birth_date}, phone={phone}, address={address}, user_id={user_id}")
-            
             # Clean phone number - ensure it has + prefix
             phone_clean = phone.strip()
             if phone_clean and not phone_clean.startswith('+'):
@@ -32,8 +37,6 @@ class PatientRepository(BaseRepository):
                     elif digits:
                         phone_clean = f"+{digits}"
             
-            print(f"DEBUG: Using phone: {phone_clean}")
-            
             cursor = self.db.cursor(buffered=True)
             cursor.execute(
                 """
@@ -45,164 +48,137 @@ class PatientRepository(BaseRepository):
             self.db.commit()
             
             patient_id = cursor.lastrowid
-            print(f"DEBUG: Patient inserted with ID: {patient_id}")
+            logger.debug("Patient %s inserted (user %s)", patient_id, user_id)
             
             cursor.close()
             cursor = None
             
             # Get the created patient
             created_patient = self.get_by_id(patient_id)
-            if created_patient:
-                print(f"DEBUG: Successfully retrieved patient {patient_id}")
-            else:
-                print(f"DEBUG: Could not retrieve patient {patient_id} after creation")
+            if not created_patient:
+                logger.warning("Could not retrieve patient %s after creation", patient_id)
             
             return created_patient
             
         except Exception as e:
-            print(f"ERROR in create_patient: {type(e).__name__}: {e}")
-            import mysql.connector
-            if isinstance(e, mysql.connector.Error):
-                print(f"MySQL Error {e.errno}: {e.msg}")
-                print(f"SQL State: {e.sqlstate}")
+            # MySQL messages echo the offending values (phone numbers), so only
+            # the error code is logged
+            logger.warning("create_patient failed: %s errno=%s sqlstate=%s",
+                           type(e).__name__, getattr(e, "errno", None), getattr(e, "sqlstate", None))
             # Re-raise the exception so the calling code can handle it
             raise e
         finally:
             if cursor is not None:
                 cursor.close()
     
-    def search_patients(self, search_term: str) -> List[Patient]:
+    # Ranking weights for search_patients branches; full-text relevance scores
+    # are far below these, so exact id and phone matches always come first.
+    SEARCH_ID_SCORE = 1000.0
+    SEARCH_PHONE_SCORE = 500.0
+    SEARCH_PREFIX_SCORE = 1.0
+
+    def search_patients(self, search_term: str, limit: int = 50, offset: int = 0) -> List[Patient]:
         """
-        Search patients by name, phone, or ID
+        Search patients by name, phone, or ID using indexed lookups only
+        
+        - digits (optionally prefixed with '#' or 'PAT'): exact id match
+        - 3+ digits: phone_digits prefix match
+        - words: FULLTEXT (ngram) match on first/last name, or an indexed
+          name prefix match for single-letter terms
         
         Args:
             search_term: Search term to look for
+            limit: Maximum number of results
+            offset: Number of ranked results to skip (pagination)
         
         Returns:
-            List of Patient objects matching the search
+            List of Patient objects, best match first
         """
-        cursor = None
+        term = (search_term or "").strip()
+        if not term:
+            return []
+
+        window = offset + limit
+        branches = []
+        params = []
+
+        id_text = term.upper()
+        for prefix in ("#", "PAT"):
+            if id_text.startswith(prefix):
+                id_text = id_text[len(prefix):]
+        if id_text.isdigit():
+            branches.append(f"SELECT id, {self.SEARCH_ID_SCORE} AS score FROM patient WHERE id = %s")
+            params.append(int(id_text))
+
+        digits = ''.join(filter(str.isdigit, term))
+        if len(digits) >= 3 and len(digits) * 2 >= len(term.replace(' ', '')):
+            for prefix in self._phone_prefixes(digits):
+                branches.append(
+                    f"(SELECT id, {self.SEARCH_PHONE_SCORE} AS score FROM patient "
+                    "WHERE phone_digits LIKE %s ORDER BY phone_digits LIMIT %s)"
+                )
+                params.extend([prefix + "%", window])
+
+        words = [w for w in re.split(r"[^\w]+", term) if w and not w.isdigit()]
+        if any(len(w) >= 2 for w in words):
+            boolean_query = " ".join(f'+"{w}"' for w in words if len(w) >= 2)
+            branches.append(
+                "(SELECT id, MATCH(firstName, lastName) AGAINST (%s IN BOOLEAN MODE) AS score "
+                "FROM patient WHERE MATCH(firstName, lastName) AGAINST (%s IN BOOLEAN MODE) "
+                "ORDER BY score DESC LIMIT %s)"
+            )
+            params.extend([boolean_query, boolean_query, window])
+        elif words:
+            for column in ("firstName", "lastName"):
+                branches.append(
+                    f"(SELECT id, {self.SEARCH_PREFIX_SCORE} AS score FROM patient "
+                    f"WHERE {column} LIKE %s ORDER BY {column} LIMIT %s)"
+                )
+                params.extend([words[0] + "%", window])
+
+        if not branches:
+            return []
+
+        query = f"""
+            SELECT p.id, p.firstName, p.lastName, p.gender, p.birth_date, p.phone,
+                   p.address, p.user_id, p.create_at AS created_at
+            FROM (
+                SELECT id, MAX(score) AS score
+                FROM ({" UNION ALL ".join(branches)}) AS matches
+                GROUP BY id
+                ORDER BY score DESC, id
+                LIMIT %s OFFSET %s
+            ) AS ranked
+            JOIN patient p ON p.id = ranked.id
+            ORDER BY ranked.score DESC, p.lastName, p.firstName, p.id
+        """
+        params.extend([limit, offset])
+
         try:
-            cursor = self.db.cursor(dictionary=True, buffered=True)
-            
-            search_pattern = f"%{search_term}%"
-            
-            query = """
-                SELECT DISTINCT
-                    id,
-                    firstName,
-                    lastName,
-                    gender,
-                    phone,
-                    birth_date,
-                    address,
-                    user_id,
-                    create_at AS created_at
-                FROM patient
-                WHERE
-                    CAST(id AS CHAR) LIKE %s
-                    OR phone LIKE %s
-                    OR firstName LIKE %s
-                    OR lastName LIKE %s
-                    OR CONCAT(firstName, ' ', lastName) LIKE %s
-                    OR CONCAT(lastName, ' ', firstName) LIKE %s
-                ORDER BY firstName, lastName
-            """
-            
-            cursor.execute(query, (
-                search_pattern,
-                search_pattern,
-                search_pattern,
-                search_pattern,
-                search_pattern,
-                search_pattern,
-            ))
-            
-            rows = cursor.fetchall()
-            cursor.close()
-            cursor = None
-            
-            patients = []
-            for row in rows:
-                try:
-                    # Create patient
-                    patient = Patient(**row)
-                    # Calculate age
-                    patient.age = self.calculate_age_from_birthdate(patient.birth_date)
-                    patients.append(patient)
-                except Exception as e:
-                    print(f"Error creating Patient object from row: {e}")
-                    continue
-            
-            return patients
-            
-        except Exception as e:
-            print(f"Error searching patients: {e}")
+            return self._fetch_all_as(Patient, query, tuple(params))
+        except Exception:
+            logger.exception("Error searching patients")
             return []
-        finally:
-            if cursor is not None:
-                cursor.close()
+
+    @staticmethod
+    def _phone_prefixes(digits: str) -> List[str]:
+        """Digit prefixes to try for a phone search (stored numbers carry the +20 country code)."""
+        prefixes = [digits]
+        if digits.startswith("0"):
+            prefixes.append("20" + digits.lstrip("0"))
+        elif not digits.startswith("20"):
+            prefixes.append("20" + digits)
+        return prefixes
     
     def get_by_id(self, patient_id: int) -> Optional[Patient]:
-        cursor = None
-        try:
-            cursor = self.db.cursor(dictionary=True, buffered=True)
-            cursor.execute(
-                """
-                SELECT id, firstName, lastName, gender, phone, birth_date, address, user_id, create_at AS created_at
-                FROM patient
-                WHERE id = %s
-                """,
-                (patient_id,),
-            )
-            row = cursor.fetchone()
-            cursor.close()
-            cursor = None
-            
-            if row:
-                try:
-                    patient = Patient(**row)
-                    # Calculate age
-                    patient.age = self.calculate_age_from_birthdate(patient.birth_date)
-                    return patient
-                except Exception as e:
-                    print(f"Error creating Patient object in get_by_id: {e}")
-                    print(f"Row data: {row}")
-                    return None
-            return None
-        finally:
-            if cursor is not None:
-                cursor.close()
+        return self._fetch_one_as(
+            Patient, f"SELECT {self.COLUMNS} FROM patient WHERE id = %s", (patient_id,)
+        )
 
     def get_by_user_id(self, user_id: int) -> Optional[Patient]:
-        cursor = None
-        try:
-            cursor = self.db.cursor(dictionary=True, buffered=True)
-            cursor.execute(
-                """
-                SELECT id, firstName, lastName, gender, phone, birth_date, address, user_id, create_at AS created_at
-                FROM patient
-                WHERE user_id = %s
-                """,
-                (user_id,),
-            )
-            row = cursor.fetchone()
-            cursor.close()
-            cursor = None
-            
-            if row:
-                try:
-                    patient = Patient(**row)
-                    # Calculate age
-                    patient.age = self.calculate_age_from_birthdate(patient.birth_date)
-                    return patient
-                except Exception as e:
-                    print(f"Error creating Patient object in get_by_user_id: {e}")
-                    return None
-            return None
-        finally:
-            if cursor is not None:
-                cursor.close()
+        return self._fetch_one_as(
+            Patient, f"SELECT {self.COLUMNS} FROM patient WHERE user_id = %s", (user_id,)
+        )
 
     def update_patient(self, patient_id: int, first_name: str, last_name: str, gender: str, phone: str, birth_date: str, address: str) -> bool:
         cursor = None
@@ -216,56 +192,70 @@ class PatientRepository(BaseRepository):
             cursor.close()
             cursor = None
             return True
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error updating patient: {e}")
+            logger.exception("Error updating patient")
             return False
         finally:
             if cursor is not None:
                 cursor.close()
             
     def get_all_patients(self) -> List[Patient]:
-        cursor = None
         try:
-            cursor = self.db.cursor(dictionary=True, buffered=True)
-            cursor.execute(
-                """
-                SELECT 
-                    id, 
-                    firstName, 
-                    lastName, 
-                    gender, 
-                    phone, 
-                    birth_date, 
-                    address, 
-                    user_id, 
-                    create_at AS created_at
-                FROM patient
-                ORDER BY create_at DESC
-                """
+            return self._fetch_all_as(Patient, f"SELECT {self.COLUMNS} FROM patient ORDER BY create_at DESC")
+        except Exception:
+            logger.exception("Error getting all patients")
+            return []
+        
+    # Allowed ORDER BY clauses for list_patients_page (never interpolate user input)
+    PAGE_SORTS = {
+        "created": "create_at {dir}, id {dir}",
+        "name": "lastName {dir}, firstName {dir}, id {dir}",
+        "id": "id {dir}",
+    }
+
+    def list_patients_page(self, page: int = 1, per_page: int = 25,
+                           sort: str = "created", direction: str = "desc") -> List[Patient]:
+        """
+        Get one page of patients, sorted in SQL
+
+        Args:
+            page: 1-based page number
+            per_page: Page size
+            sort: One of PAGE_SORTS ('created', 'name', 'id')
+            direction: 'asc' or 'desc'
+
+        Returns:
+            List of Patient objects for the requested page
+        """
+        order = self.PAGE_SORTS.get(sort, self.PAGE_SORTS["created"]).format(
+            dir="ASC" if direction == "asc" else "DESC"
+        )
+        page = max(1, page)
+        try:
+            return self._fetch_all_as(
+                Patient,
+                f"SELECT {self.COLUMNS} FROM patient ORDER BY {order} LIMIT %s OFFSET %s",
+                (per_page, (page - 1) * per_page),
             )
-            rows = cursor.fetchall()
-            cursor.close()
-            cursor = None
-            
-            patients = []
-            for row in rows:
-                try:
-                    patient = Patient(**row)
-                    # Calculate age
-                    patient.age = self.calculate_age_from_birthdate(patient.birth_date)
-                    patients.append(patient)
-                except Exception as e:
-                    print(f"Error creating Patient object: {e}")
-                    continue
-            return patients
-        except Exception as e:
-            print(f"Error getting all patients: {e}")
+        except Exception:
+            logger.exception("Error listing patients page")
             return []
+
+    def count_patients(self) -> int:
+        cursor = None
+        try:
+            cursor = self.db.cursor(buffered=True)
+            cursor.execute("SELECT COUNT(*) FROM patient")
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except Exception:
+            logger.exception("Error counting patients")
+            return 0
         finally:
             if cursor is not None:
                 cursor.close()
-        
+
     def get_new_patients_this_month(self) -> int:
         """
         Get count of new patients registered in the current month
@@ -288,8 +278,8 @@ class PatientRepository(BaseRepository):
             cursor.close()
             cursor = None
             return result['count'] if result else 0
-        except Exception as e:
-            print(f"Error getting new patients this month: {e}")
+        except Exception:
+            logger.exception("Error getting new patients this month")
             return 0
         finally:
             if cursor is not None:
@@ -320,8 +310,8 @@ class PatientRepository(BaseRepository):
             cursor.close()
             cursor = None
             return result['count'] if result else 0
-        except Exception as e:
-            print(f"Error getting patient records count: {e}")
+        except Exception:
+            logger.exception("Error getting patient records count")
             return 0
         finally:
             if cursor is not None:
@@ -352,8 +342,8 @@ class PatientRepository(BaseRepository):
             cursor.close()
             cursor = None
             return result['last_visit'] if result and result['last_visit'] else None
-        except Exception as e:
-            print(f"Error getting last visit: {e}")
+        except Exception:
+            logger.exception("Error getting last visit")
             return None
         finally:
             if cursor is not None:
@@ -361,25 +351,4 @@ class PatientRepository(BaseRepository):
         
     def calculate_age_from_birthdate(self, birth_date):
         """Calculate age from birth date in Python."""
-        if not birth_date:
-            return None
-        
-        try:
-            from datetime import datetime
-            
-            if isinstance(birth_date, str):
-                # Convert string to date
-                birth_date = datetime.strptime(birth_date, '%Y-%m-%d').date()
-            elif isinstance(birth_date, datetime):
-                birth_date = birth_date.date()
-            
-            today = datetime.today().date()
-            age = today.year - birth_date.year
-            
-            # Adjust if birthday hasn't occurred this year
-            if (today.month, today.day) < (birth_date.month, birth_date.day):
-                age -= 1
-                
-            return age
-        except Exception:
-            return None
\ No newline at end of file
+        return age_from_birthdate(birth_date)
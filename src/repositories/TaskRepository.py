@@ -1,7 +1,10 @@
+import logging
 from typing import List, Optional
 from models.task_model import Task
 from repositories.BaseRepository import BaseRepository
 
+logger = logging.getLogger(__name__)
+
 class TaskRepository(BaseRepository):
     def get_by_id(self, task_id: int) -> Optional[Task]:
         cursor = self.db.cursor(dictionary=True, buffered=True)
@@ -56,9 +59,9 @@ class TaskRepository(BaseRepository):
             """, (title, description, priority, category, due_date, status, assigned_to, created_by))
             self.db.commit()
             return self.get_by_id(cursor.lastrowid)
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error creating task: {e}")
+            logger.exception("Error creating task")
             return None
         finally:
             cursor.close()
@@ -85,9 +88,9 @@ class TaskRepository(BaseRepository):
             cursor.execute(query, tuple(params))
             self.db.commit()
             return cursor.rowcount > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error updating task: {e}")
+            logger.exception("Error updating task")
             return False
         finally:
             cursor.close()
@@ -98,9 +101,9 @@ class TaskRepository(BaseRepository):
             cursor.execute("DELETE FROM tasks WHERE id = %s", (task_id,))
             self.db.commit()
             return cursor.rowcount > 0
-        except Exception as e:
+        except Exception:
             self.db.rollback()
-            print(f"Error deleting task {task_id}: {e}")
+            logger.exception("Error deleting task %s", task_id)
             return False
         finally:
             cursor.close()
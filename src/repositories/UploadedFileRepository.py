@@ -1,7 +1,15 @@
+import logging
 from typing import List, Optional
 from models.upload_model import UploadedFile
 from repositories.BaseRepository import BaseRepository
+from services import thumbnails
+
+logger = logging.getLogger(__name__)
 class UploadedFileRepository(BaseRepository):
+    COLUMNS = """id, file_path, file_type, uploaded_by_user_id, upload_date, record_id, patient_id,
+                 appointment_id, create_at AS created_at, sha256, size_bytes, original_name,
+                 thumbnail_path, preview_path"""
+
     def save_file(
         self, 
         filename: str, 
@@ -10,9 +18,15 @@ class UploadedFileRepository(BaseRepository):
         record_id: Optional[int] = None, 
         patient_id: Optional[int] = None, 
         appointment_id: Optional[int] = None, 
-        file_type: Optional[str] = None
+        file_type: Optional[str] = None,
+        sha256: Optional[str] = None,
+        size_bytes: Optional[int] = None
     ) -> Optional[UploadedFile]:
-        """Save uploaded file metadata to the DB and return UploadedFile model."""
+        """Save uploaded file metadata to the DB and return UploadedFile model.
+
+        ``filename`` is the name the file was uploaded under; ``filepath`` is
+        where the storage layer put it.
+        """
         cursor = self.db.cursor(dictionary=True)
         try:
             # Use forward slashes for URLs
@@ -20,27 +34,67 @@ class UploadedFileRepository(BaseRepository):
             
             cursor.execute(
                 """
-                INSERT INTO UploadedFile ( file_path, file_type, uploaded_by_user_id, upload_date, record_id, patient_id, appointment_id)
-                VALUES (%s, %s, %s, CURDATE(), %s, %s, %s)
+                INSERT INTO UploadedFile ( file_path, file_type, uploaded_by_user_id, upload_date, record_id, patient_id, appointment_id,
+                    sha256, size_bytes, original_name)
+                VALUES (%s, %s, %s, CURDATE(), %s, %s, %s, %s, %s, %s)
                 """,
-                (filepath_fixed, file_type or 'application/octet-stream', uploaded_by, record_id, patient_id, appointment_id),
+                (filepath_fixed, file_type or 'application/octet-stream', uploaded_by, record_id, patient_id, appointment_id,
+                 sha256, size_bytes, filename),
             )
             self.db.commit()
             new_id = cursor.lastrowid
-            return self.get_by_id(new_id)
-        except Exception as e:
+            uploaded = self.get_by_id(new_id)
+            if uploaded:
+                thumbnails.enqueue(uploaded)
+            return uploaded
+        except Exception:
             self.db.rollback()
-            print(f"Error saving file: {e}")
+            logger.exception("Error saving file")
             return None
         finally:
             cursor.close()
     
+    def get_by_id(self, file_id: int) -> Optional[UploadedFile]:
+        cursor = self.db.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"""
+                SELECT {self.COLUMNS}
+                FROM UploadedFile
+                WHERE id = %s
+                """,
+                (file_id,),
+            )
+            row = cursor.fetchone()
+            return UploadedFile(**row) if row else None
+        except Exception:
+            logger.exception("Error getting uploaded file")
+            return None
+        finally:
+            cursor.close()
+
+    def set_previews(self, file_id: int, thumbnail_path: Optional[str], preview_path: Optional[str]) -> bool:
+        """Record the rendered thumbnail and preview of an uploaded file."""
+        cursor = self.db.cursor()
+        try:
+            cursor.execute(
+                "UPDATE UploadedFile SET thumbnail_path = %s, preview_path = %s WHERE id = %s",
+                (thumbnail_path, preview_path, file_id),
+            )
+            self.db.commit()
+            return True
+        except Exception:
+            self.db.rollback()
+            logger.exception("Error saving file previews")
+            return False
+        finally:
+            cursor.close()
+
     def get_files_by_record(self, record_id: int) -> List[UploadedFile]:
         cursor = self.db.cursor(dictionary=True)
         cursor.execute(
-            """
-            SELECT id, file_path, file_type, uploaded_by_user_id, upload_date AS upload_date, 
-                record_id, patient_id, appointment_id, create_at AS created_at
+            f"""
+            SELECT {self.COLUMNS}
             FROM UploadedFile
             WHERE record_id = %s
             ORDER BY upload_date DESC
@@ -63,9 +117,14 @@ class UploadedFileRepository(BaseRepository):
                     patient_id=row.get("patient_id"),
                     appointment_id=row.get("appointment_id"),
                     created_at=row.get("created_at"),
+                    sha256=row.get("sha256"),
+                    size_bytes=row.get("size_bytes"),
+                    original_name=row.get("original_name"),
+                    thumbnail_path=row.get("thumbnail_path"),
+                    preview_path=row.get("preview_path"),
                 ))
-            except Exception as e:
-                print(f"Error creating UploadedFile object: {e}")
+            except Exception:
+                logger.exception("Error creating UploadedFile object")
                 continue
         
         return files
\ No newline at end of file
@@ -1,6 +1,11 @@
+import logging
 from typing import List, Optional
 from models.user_model import User
 from repositories.BaseRepository import BaseRepository
+from utils.pagination import Page
+from services import doctor_directory
+
+logger = logging.getLogger(__name__)
 
 class UserRepository(BaseRepository):
     def create_user(self, username: str, password_hash: str, role: str = "patient", status: str = "active") -> Optional[User]:
@@ -26,9 +31,11 @@ class UserRepository(BaseRepository):
             cursor.execute("DELETE FROM user WHERE id = %s", (user_id,))
             self.db.commit()
             cursor.close()
+            # The delete cascades to the user's doctor profile, if any
+            doctor_directory.invalidate()
             return True
-        except Exception as e:
-            print(f"Error deleting user: {e}")
+        except Exception:
+            logger.exception("Error deleting user")
             return False
 
     def get_by_username(self, username: str) -> Optional[User]:
@@ -51,29 +58,46 @@ class UserRepository(BaseRepository):
         cursor.close()
         return User(**row) if row else None
 
+    # Listings never load password hashes: User() gets None for the password
+    LIST_COLUMNS = "id, username, role, status, update_at AS updated_at, create_at AS created_at"
+
+    @staticmethod
+    def _listed_user(id, username, role, status, updated_at, created_at):
+        return User(id, username, None, role, status, updated_at, created_at)
+
     def list_users(self) -> List[User]:
-        cursor = self.db.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, username, password, role, status, update_at AS updated_at, create_at AS created_at FROM user"
-        )
-        rows = cursor.fetchall()
-        cursor.close()
-        return [User(**row) for row in rows] if rows else []
+        return self._fetch_all_as(self._listed_user, f"SELECT {self.LIST_COLUMNS} FROM user")
 
     def list_pending_users(self, role: Optional[str] = None) -> List[User]:
-        cursor = self.db.cursor(dictionary=True)
         if role:
-            cursor.execute(
-                "SELECT id, username, password, role, status, update_at AS updated_at, create_at AS created_at FROM user WHERE role = %s AND status = 'pending'",
+            return self._fetch_all_as(
+                self._listed_user,
+                f"SELECT {self.LIST_COLUMNS} FROM user WHERE role = %s AND status = 'pending'",
                 (role,)
             )
-        else:
-            cursor.execute(
-                "SELECT id, username, password, role, status, update_at AS updated_at, create_at AS created_at FROM user WHERE status = 'pending'"
-            )
-        rows = cursor.fetchall()
-        cursor.close()
-        return [User(**row) for row in rows] if rows else []
+        return self._fetch_all_as(self._listed_user, f"SELECT {self.LIST_COLUMNS} FROM user WHERE status = 'pending'")
+
+    def page_users(self, cursor: Optional[str] = None, limit: int = 25) -> Page:
+        """Newest users first, ``limit`` at a time (see BaseRepository._fetch_page_as)."""
+        return self._fetch_page_as(self._listed_user, self.LIST_COLUMNS, "user", cursor=cursor, limit=limit)
+
+    def page_pending_users(self, cursor: Optional[str] = None, limit: int = 25,
+                           role: Optional[str] = None) -> Page:
+        """Pending signups in review order (oldest first), with the total waiting."""
+        where, params = "status = 'pending'", ()
+        if role:
+            where, params = "status = 'pending' AND role = %s", (role,)
+        return self._fetch_page_as(self._listed_user, self.LIST_COLUMNS, "user", where, params,
+                                   cursor=cursor, limit=limit, newest_first=False)
+
+    def count_pending_users(self) -> int:
+        cursor = self.db.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM user WHERE status = 'pending'")
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        finally:
+            cursor.close()
 
     def update_username(self, user_id: int, new_username: str) -> bool:
         cursor = self.db.cursor()
@@ -93,8 +117,8 @@ class UserRepository(BaseRepository):
             )
             self.db.commit()
             return True
-        except Exception as e:
-            print(f"Error updating password: {e}")
+        except Exception:
+            logger.exception("Error updating password")
             return False
         finally:
             cursor.close()
\ No newline at end of file
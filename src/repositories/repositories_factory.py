@@ -1,41 +1,46 @@
-from repositories.UserRepository import UserRepository
-from repositories.PatientRepository import PatientRepository
-from repositories.DoctorRepository import DoctorRepository
-from repositories.AssistantRepository import AssistantRepository
-from repositories.AppointmentRepository import AppointmentRepository
-from repositories.ContactRepository import ContactRepository
-from repositories.MedicalRecordRepository import MedicalRecordRepository
-from repositories.UploadedFileRepository import UploadedFileRepository
-from repositories.DoctorScheduleRepository import DoctorScheduleRepository
-from repositories.DoctorAvailabilityRepository import DoctorAvailabilityRepository
-from repositories.AdminAuditRepository import AdminAuditRepository
-from repositories.TaskRepository import TaskRepository
+from importlib import import_module
+
+# entity type -> (module, class). Repository modules are imported the first
+# time their entity type is requested, so loading the app does not pull in
+# every repository (and the MySQL driver) up front.
+_REGISTRY = {
+    "user": ("repositories.UserRepository", "UserRepository"),
+    "patient": ("repositories.PatientRepository", "PatientRepository"),
+    "doctor": ("repositories.DoctorRepository", "DoctorRepository"),
+    "assistant": ("repositories.AssistantRepository", "AssistantRepository"),
+    "appointment": ("repositories.AppointmentRepository", "AppointmentRepository"),
+    "contact": ("repositories.ContactRepository", "ContactRepository"),
+    "medical_record": ("repositories.MedicalRecordRepository", "MedicalRecordRepository"),
+    "uploaded_file": ("repositories.UploadedFileRepository", "UploadedFileRepository"),
+    "doctor_schedule": ("repositories.DoctorScheduleRepository", "DoctorScheduleRepository"),
+    "doctor_availability": ("repositories.DoctorAvailabilityRepository", "DoctorAvailabilityRepository"),
+    "admin_audit": ("repositories.AdminAuditRepository", "AdminAuditRepository"),
+    "task": ("repositories.TaskRepository", "TaskRepository"),
+}
+
+_classes = {}
+
 
 class RepositoryFactory:
     @staticmethod
-    def get_repository(entity_type: str):
-        if entity_type == "user":
-            return UserRepository()
-        if entity_type == "patient":
-            return PatientRepository()
-        if entity_type == "doctor":
-            return DoctorRepository()
-        if entity_type == "assistant":
-            return AssistantRepository()
-        if entity_type == "appointment":
-            return AppointmentRepository()
-        if entity_type == "contact":
-            return ContactRepository()
-        if entity_type == "medical_record":
-            return MedicalRecordRepository()
-        if entity_type == "uploaded_file":
-            return UploadedFileRepository()
-        if entity_type == "doctor_schedule":
-            return DoctorScheduleRepository()
-        if entity_type == "doctor_availability":
-            return DoctorAvailabilityRepository()
-        if entity_type == "admin_audit":
-            return AdminAuditRepository()
-        if entity_type == "task":
-             return TaskRepository()
-        raise ValueError(f"Unknown repository type: {entity_type}")
+    def get_repository_class(entity_type: str):
+        cls = _classes.get(entity_type)
+        if cls is None:
+            try:
+                module_name, class_name = _REGISTRY[entity_type]
+            except KeyError:
+                raise ValueError(f"Unknown repository type: {entity_type}") from None
+            cls = _classes[entity_type] = getattr(import_module(module_name), class_name)
+        return cls
+
+    @staticmethod
+    def get_repository(entity_type: str, connection=None):
+        return RepositoryFactory.get_repository_class(entity_type)(connection)
+
+    @staticmethod
+    def get_scoped_repository(entity_type: str):
+        """Lazy, request-scoped repository for module-level use in controllers."""
+        from repositories.unit_of_work import ScopedRepository
+        if entity_type not in _REGISTRY:
+            raise ValueError(f"Unknown repository type: {entity_type}")
+        return ScopedRepository(entity_type)
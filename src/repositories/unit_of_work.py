@@ -0,0 +1,95 @@
+import logging
+from flask import g, has_app_context
+
+from database.db_singleton import DatabaseConnection
+from repositories.BaseRepository import BaseRepository
+from repositories.repositories_factory import RepositoryFactory
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWork:
+    """Repositories for one request, sharing one pooled connection.
+
+    The connection is checked out the first time a repository needs it and
+    the transaction is finished (commit, or rollback on error) when the app
+    context is torn down.
+    """
+
+    def __init__(self):
+        self._connection = None
+        self._repositories = {}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = DatabaseConnection().get_connection()
+        return self._connection
+
+    def get_repository(self, entity_type: str):
+        repo = self._repositories.get(entity_type)
+        if repo is None:
+            # Same one-argument call as everywhere else, so stubs of the factory keep working
+            repo = RepositoryFactory.get_repository(entity_type)
+            if isinstance(repo, BaseRepository):
+                repo.db = self.connection
+            self._repositories[entity_type] = repo
+        return repo
+
+    def finish(self, exc=None):
+        """Commit the request's transaction, or roll it back after an error."""
+        conn = self._connection
+        self._connection = None
+        self._repositories.clear()
+        if conn is None:
+            return
+        try:
+            if exc is None:
+                conn.commit()
+            else:
+                conn.rollback()
+        except Exception:
+            logger.exception("Error finishing unit of work")
+
+
+def current_unit_of_work() -> UnitOfWork:
+    uow = g.get('_unit_of_work')
+    if uow is None:
+        uow = UnitOfWork()
+        g._unit_of_work = uow
+    return uow
+
+
+def teardown_unit_of_work(exc=None):
+    uow = g.pop('_unit_of_work', None)
+    if uow is not None:
+        uow.finish(exc)
+    # Hand the connection back to the pool only after the transaction ended
+    DatabaseConnection().release_request_connection(exc)
+
+
+def init_app(app):
+    app.teardown_appcontext(teardown_unit_of_work)
+
+
+class ScopedRepository:
+    """Module-level stand-in for a repository.
+
+    Controllers keep a ``user_repo``-style global, but every attribute access
+    resolves the repository belonging to the current request. Outside a
+    request a fresh repository is created on each access.
+    """
+
+    def __init__(self, entity_type: str):
+        self._entity_type = entity_type
+
+    def _resolve(self):
+        if has_app_context():
+            return current_unit_of_work().get_repository(self._entity_type)
+        return RepositoryFactory.get_repository(self._entity_type)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self):
+        return f"<ScopedRepository {self._entity_type!r}>"
@@ -0,0 +1,166 @@
+"""Admin audit trail written off the request thread.
+
+Approvals, rejections and the other audited actions call :func:`record`
+(through ``AdminAuditRepository.create_entry``), which only puts an
+:class:`AuditEntry` on a bounded in-process queue. One background thread takes
+whatever has piled up -- up to ``AUDIT_BATCH_SIZE`` entries -- and writes it
+with a single multi-row INSERT and one commit, so a burst of approvals costs
+one round trip instead of one commit each.
+
+Nothing is dropped: when the queue is full, the writer is stopped or the app
+has none (scripts, ``AUDIT_QUEUE_SIZE=0``) the entry is written inline, and
+:meth:`AuditWriter.shutdown` drains the queue before the process exits.
+Entries carry the time the action happened, not the time they were flushed.
+"""
+import atexit
+import logging
+import queue
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 200
+
+AuditEntry = namedtuple("AuditEntry", "admin_user_id action target_user_id target_type details created_at")
+
+_STOP = object()
+
+
+def write_batch(entries):
+    """Insert ``entries`` on a pooled connection of their own."""
+    # Imported here: the repository feeds this module from create_entry
+    from database.db_singleton import DatabaseConnection
+    from repositories.AdminAuditRepository import AdminAuditRepository
+
+    with DatabaseConnection().connection() as conn:
+        return AdminAuditRepository(connection=conn).insert_many(entries)
+
+
+class AuditWriter:
+    """Bounded queue plus one thread writing batches with ``write(entries)``.
+
+    The thread is started on the first entry, so forked workers and scripts
+    that never audit anything do not start threads.
+    """
+
+    def __init__(self, write=write_batch, maxsize=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE):
+        self.write = write
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.reset_after_fork()
+
+    def submit(self, entry):
+        """Queue ``entry``; False when it has to be written by the caller instead."""
+        if self._stopping:
+            return False
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            logger.warning("Audit queue full (%d entries), writing inline", self.maxsize)
+            return False
+
+    def flush(self):
+        """Block until everything queued so far has been written (or given up on)."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def reset_after_fork(self):
+        """Start over with an empty queue; a parent's thread does not survive the fork."""
+        self._queue = queue.Queue(self.maxsize)
+        self._thread = None
+        self._stopping = False
+        self._lock = threading.Lock()
+
+    def shutdown(self, timeout=10.0):
+        """Write what is queued and stop the thread."""
+        with self._lock:
+            thread = self._thread
+            self._stopping = True
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+            thread.join(timeout)
+        except queue.Full:
+            pass
+        if thread.is_alive():
+            logger.error("Audit writer did not finish within %.0fs, %d entries pending",
+                         timeout, self._queue.qsize())
+            return
+        # Entries submitted while we were stopping
+        late = []
+        while True:
+            try:
+                late.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        late = [e for e in late if e is not _STOP]
+        if late:
+            self._write(late)
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                    thread.start()
+                    self._thread = thread
+                    atexit.register(self.shutdown)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Take whatever else is already waiting; never wait for more
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            entries = [e for e in batch if e is not _STOP]
+            if entries:
+                self._write(entries)
+            for _ in batch:
+                self._queue.task_done()
+            if len(entries) != len(batch):
+                return
+
+    def _write(self, entries):
+        for attempt in (1, 2):
+            try:
+                self.write(entries)
+                return
+            except Exception:
+                logger.exception("Writing %d audit entries failed (attempt %d)", len(entries), attempt)
+        # Keep the trail in the logs rather than losing it
+        for entry in entries:
+            logger.error("Unwritten audit entry: %s", dict(entry._asdict(), created_at=str(entry.created_at)))
+
+
+def record(admin_user_id, action, target_user_id=None, target_type=None, details=None, app=None):
+    """Add an entry to the audit trail; returns the AuditEntry."""
+    entry = AuditEntry(admin_user_id, action, target_user_id, target_type, details,
+                       datetime.now().replace(microsecond=0))
+    if app is None and has_app_context():
+        app = current_app._get_current_object()
+    writer = app.extensions.get("audit_log") if app is not None else None
+    if writer is None or not writer.submit(entry):
+        (writer.write if writer is not None else write_batch)([entry])
+    return entry
+
+
+def init_app(app):
+    """Attach an AuditWriter sized from ``AUDIT_QUEUE_SIZE`` (0 writes every entry inline)."""
+    size = int(app.config.get("AUDIT_QUEUE_SIZE", DEFAULT_QUEUE_SIZE))
+    if size > 0:
+        app.extensions["audit_log"] = AuditWriter(
+            maxsize=size, batch_size=int(app.config.get("AUDIT_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        )
+    else:
+        app.extensions.pop("audit_log", None)
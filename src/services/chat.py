@@ -0,0 +1,322 @@
+"""Patient chat assistant.
+
+:class:`ChatService` answers a message in this order:
+
+1. per-user token bucket (:class:`RateLimited` when exhausted)
+2. cached answer for the same normalized question
+3. the upstream inference API, unless the circuit breaker is open or too many
+   calls are already waiting on it
+4. the local keyword backend, instantly, whenever 3 is skipped or fails
+
+Upstream calls go through one pooled ``requests.Session`` with short timeouts,
+so a degraded API costs a request thread a few seconds at most and, once the
+breaker opens, nothing at all.
+
+Settings (see ``init_app``): ``CHAT_BACKEND`` (``huggingface`` or ``local``),
+``CHAT_API_URL``, ``CHAT_API_TOKEN``, ``CHAT_TIMEOUT``, ``CHAT_MAX_INFLIGHT``,
+``CHAT_CACHE_TTL``, ``CHAT_CACHE_SIZE``, ``CHAT_RATE_PER_MINUTE``,
+``CHAT_BURST``, ``CHAT_BREAKER_FAILURES``, ``CHAT_BREAKER_RESET``.
+"""
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-medium"
+
+# source: the backend's name, "cache" or "fallback"
+ChatReply = namedtuple("ChatReply", "text source note")
+
+PROMPT = """You are a helpful medical assistant chatbot for a clinic management system.
+You can help patients with:
+- Booking appointments
+- Understanding medical terms
+- General health information
+- Clinic hours and services
+
+Patient question: {message}
+
+Provide a helpful, concise response:"""
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limited, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class UpstreamError(Exception):
+    """The inference API failed or returned nothing usable."""
+
+    def __init__(self, message, note=None):
+        super().__init__(message)
+        self.note = note
+
+
+def normalize(message):
+    """Cache key for a question: case, spacing and trailing punctuation ignored."""
+    return re.sub(r"\s+", " ", message.lower()).strip().rstrip("?!. ")
+
+
+def get_fallback_response(message):
+    """Provide intelligent fallback responses when AI is unavailable"""
+    message_lower = message.lower()
+
+    # Appointment related
+    if any(word in message_lower for word in ["appointment", "book", "schedule"]):
+        return "To book an appointment, please click on 'Book Appointment' button above or visit the Appointments page. You can choose your preferred doctor and time slot."
+
+    # Hours and contact
+    elif any(word in message_lower for word in ["hour", "time", "open", "close", "contact"]):
+        return "Our clinic is open Monday-Friday: 8:00 AM - 8:00 PM. For urgent inquiries, call us at +123 456 7890 or email support@medicareclinic.com"
+
+    # Medical records
+    elif any(word in message_lower for word in ["record", "history", "document"]):
+        return "You can view your medical records and history by visiting the 'Medical History' section from the sidebar menu."
+
+    # Profile
+    elif any(word in message_lower for word in ["profile", "update", "information"]):
+        return "To update your profile information, please go to the 'Profile' section from the sidebar menu."
+
+    # Doctors
+    elif any(word in message_lower for word in ["doctor", "specialist", "physician"]):
+        return "You can view all available doctors and their specialties when booking an appointment. Each doctor's profile includes their specialization and available time slots."
+
+    # General greeting
+    elif any(word in message_lower for word in ["hello", "hi", "hey", "help"]):
+        return "Hello! I'm here to help you with appointments, medical records, and general clinic information. How can I assist you today?"
+
+    # Default response
+    else:
+        return "I'm here to help! You can ask me about booking appointments, clinic hours, medical records, or any general questions about our services. What would you like to know?"
+
+
+class LocalBackend:
+    """Keyword answers computed in-process; never fails, needs no network."""
+
+    name = "local"
+
+    def generate(self, message):
+        return get_fallback_response(message)
+
+
+class HuggingFaceBackend:
+    """Hugging Face Inference API over a shared, pooled HTTP session."""
+
+    name = "huggingface"
+
+    def __init__(self, api_url=DEFAULT_API_URL, token=None, timeout=(3.05, 8.0), pool_size=10):
+        self.api_url = api_url
+        self.token = token
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    # Imported on first use: only the chat talks to outside services
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    http = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    http.mount("https://", adapter)
+                    http.mount("http://", adapter)
+                    http.headers["Content-Type"] = "application/json"
+                    if self.token:
+                        http.headers["Authorization"] = f"Bearer {self.token}"
+                    self._session = http
+        return self._session
+
+    def generate(self, message):
+        payload = {
+            "inputs": PROMPT.format(message=message),
+            "parameters": {"max_length": 150, "temperature": 0.7, "return_full_text": False},
+        }
+        try:
+            response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+        except Exception as e:
+            raise UpstreamError(f"{type(e).__name__}: {e}") from e
+
+        if response.status_code == 503:
+            raise UpstreamError("model loading", note="AI model is loading, using fallback response")
+        if response.status_code != 200:
+            raise UpstreamError(f"HTTP {response.status_code}")
+
+        try:
+            result = response.json()
+        except ValueError as e:
+            raise UpstreamError("invalid JSON") from e
+        if isinstance(result, list):
+            result = result[0] if result else {}
+        text = (result.get("generated_text") or "").strip() if isinstance(result, dict) else ""
+        if len(text) < 5:
+            raise UpstreamError("empty answer")
+        return text
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class TokenBucket:
+    """Per-key token buckets: ``burst`` messages at once, refilled at ``rate_per_minute``.
+
+    Idle buckets are forgotten once they would have refilled anyway, so memory
+    stays bounded by the number of recently active users.
+    """
+
+    def __init__(self, rate_per_minute=10, burst=5, maxsize=10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._buckets = TTLCache(ttl=burst / self.rate if self.rate else 3600, maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """Take one token for ``key``; return 0, or the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets.set(key, (tokens - 1, now))
+                return 0
+            self._buckets.set(key, (tokens, now))
+            return (1 - tokens) / self.rate if self.rate else float("inf")
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for ``reset_timeout`` seconds.
+
+    Opens after ``failure_threshold`` consecutive failures; once the timeout has
+    passed, one trial call is let through (half-open) and its outcome closes or
+    re-opens the breaker.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Chat upstream circuit opened after %d failures", self._failures)
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class ChatService:
+    def __init__(self, backend, fallback=None, cache=None, limiter=None, breaker=None, max_inflight=4):
+        self.backend = backend
+        self.fallback = fallback or LocalBackend()
+        self.cache = cache if cache is not None else TTLCache(ttl=3600, maxsize=1024)
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+
+    def reply(self, user_key, message):
+        """Answer ``message`` for ``user_key``.
+
+        Raises:
+            RateLimited: The user sent too many messages; ``retry_after`` seconds
+        """
+        if self.limiter is not None:
+            retry_after = self.limiter.acquire(user_key)
+            if retry_after:
+                raise RateLimited(retry_after)
+
+        key = normalize(message)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return ChatReply(cached, "cache", None)
+
+        # Every upstream slot busy: answer locally rather than queue behind them
+        if not self._inflight.acquire(blocking=False):
+            return self._fallback(message, None)
+        try:
+            if not self.breaker.allow():
+                return self._fallback(message, None)
+            started = time.monotonic()
+            try:
+                text = self.backend.generate(message)
+            except UpstreamError as e:
+                self.breaker.record_failure()
+                logger.info("Chat upstream failed after %.0f ms: %s",
+                            (time.monotonic() - started) * 1000, e)
+                return self._fallback(message, e.note)
+        finally:
+            self._inflight.release()
+
+        self.breaker.record_success()
+        self.cache.set(key, text)
+        return ChatReply(text, self.backend.name, None)
+
+    def _fallback(self, message, note):
+        return ChatReply(self.fallback.generate(message), "fallback", note)
+
+
+def init_app(app):
+    """Build the app's ChatService from its ``CHAT_*`` settings."""
+    config = app.config
+    if config.get("CHAT_BACKEND", "huggingface") == "local":
+        backend = LocalBackend()
+    else:
+        backend = HuggingFaceBackend(
+            api_url=config.get("CHAT_API_URL") or DEFAULT_API_URL,
+            token=config.get("CHAT_API_TOKEN") or None,
+            timeout=config.get("CHAT_TIMEOUT", (3.05, 8.0)),
+            pool_size=config.get("CHAT_MAX_INFLIGHT", 4),
+        )
+    rate = config.get("CHAT_RATE_PER_MINUTE", 10)
+    app.extensions["chat"] = ChatService(
+        backend,
+        cache=TTLCache(ttl=config.get("CHAT_CACHE_TTL", 3600), maxsize=config.get("CHAT_CACHE_SIZE", 1024)),
+        limiter=TokenBucket(rate, config.get("CHAT_BURST", 5)) if rate > 0 else None,
+        breaker=CircuitBreaker(config.get("CHAT_BREAKER_FAILURES", 3), config.get("CHAT_BREAKER_RESET", 30.0)),
+        max_inflight=config.get("CHAT_MAX_INFLIGHT", 4),
+    )
+
+
+def get_service(app=None):
+    if app is None:
+        from flask import current_app
+        app = current_app
+    return app.extensions["chat"]
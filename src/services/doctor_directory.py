@@ -0,0 +1,95 @@
+"""In-process cache of the doctor directory.
+
+Doctors change a few times a month but are listed on most assistant, patient
+and admin pages. The whole table is loaded into an immutable
+:class:`DoctorDirectory` snapshot with id and specialization indexes, kept for
+``DOCTOR_CACHE_TTL`` seconds and dropped by ``DoctorRepository`` (and user
+deletion, which cascades to the doctor row) whenever a doctor changes.
+
+Invalidation is per process: other gunicorn workers pick a change up when
+their snapshot expires. The snapshot's ``version`` is a hash of its contents,
+so every worker reports the same version for the same data and templates can
+key cached fragments on it.
+"""
+import hashlib
+import os
+import threading
+import time
+
+DOCTOR_CACHE_TTL = float(os.getenv("DOCTOR_CACHE_TTL", "300"))
+
+_lock = threading.Lock()        # guards the module state below
+_load_lock = threading.Lock()   # only one thread reloads at a time
+_snapshot = None
+_expires_at = 0.0
+_generation = 0                 # bumped by invalidate(); stale loads are discarded
+
+
+class DoctorDirectory:
+    """Read-only view of every doctor; share it, never mutate the Doctor objects."""
+
+    def __init__(self, doctors):
+        self.doctors = tuple(doctors)   # in the loader's (ORDER BY lastName, firstName) order
+        self.by_id = {d.id: d for d in self.doctors}
+        by_specialization = {}
+        for doctor in self.doctors:
+            by_specialization.setdefault(doctor.specialization, []).append(doctor)
+        self.by_specialization = {k: tuple(v) for k, v in by_specialization.items()}
+        # Largest specialization first, like the GROUP BY ... ORDER BY count DESC it replaces
+        self.specialization_counts = dict(
+            sorted(((k, len(v)) for k, v in self.by_specialization.items()), key=lambda kv: -kv[1])
+        )
+        digest = hashlib.sha1()
+        for d in self.doctors:
+            digest.update(repr((d.id, d.firstName, d.lastName, d.phone, d.schedule,
+                                d.user_id, d.specialization)).encode())
+        self.version = digest.hexdigest()[:12]
+
+
+def _current():
+    with _lock:
+        if _snapshot is not None and _expires_at > time.monotonic():
+            return _snapshot
+    return None
+
+
+def get_directory(load):
+    """The cached directory, built from ``load()`` (a list of Doctors) when missing or expired."""
+    global _snapshot, _expires_at
+    directory = _current()
+    if directory is not None:
+        return directory
+    with _load_lock:
+        directory = _current()
+        if directory is not None:
+            return directory
+        with _lock:
+            generation = _generation
+        directory = DoctorDirectory(load())
+        with _lock:
+            # A doctor changed while we were loading: use the result once, don't keep it
+            if generation == _generation:
+                _snapshot = directory
+                _expires_at = time.monotonic() + DOCTOR_CACHE_TTL
+        return directory
+
+
+def current_version():
+    """Version of the loaded directory, or None; never triggers a load."""
+    directory = _current()
+    return directory.version if directory is not None else None
+
+
+def invalidate():
+    """Drop the snapshot; call after a doctor is created, changed or deleted."""
+    global _snapshot, _generation
+    with _lock:
+        _snapshot = None
+        _generation += 1
+
+
+def init_app(app):
+    """Expose ``doctor_directory_version`` to templates for fragment caching."""
+    @app.context_processor
+    def directory_version():
+        return {"doctor_directory_version": current_version()}
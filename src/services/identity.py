@@ -0,0 +1,68 @@
+"""The logged-in user's profile, cached in the session.
+
+Patients, doctors and assistants each have a profile row next to their user
+row. Pages only need its id (and an assistant's doctor) plus a display name,
+so those are stored in the session at login instead of being looked up with
+``get_by_user_id`` on every request. When a profile changes,
+:func:`invalidate_profile` drops the cached copy from every session of that
+user and the next request resolves it again.
+"""
+from collections import namedtuple
+
+from flask import current_app, session
+
+PROFILE_ROLES = ("patient", "doctor", "assistant")
+
+# Same attribute names as the model objects it stands in for
+Profile = namedtuple("Profile", "role id user_id firstName lastName doctor_id")
+
+SESSION_KEY = "profile"
+
+
+def _snapshot(role, user_id, profile):
+    return {
+        "role": role,
+        "id": profile.id,
+        "user_id": user_id,
+        "firstName": getattr(profile, "firstName", None),
+        "lastName": getattr(profile, "lastName", None),
+        "doctor_id": getattr(profile, "doctor_id", None) if role == "assistant" else None,
+    }
+
+
+def remember_profile(role, profile):
+    """Cache ``profile`` (a Patient/Doctor/Assistant) for the current session."""
+    if profile is None:
+        session.pop(SESSION_KEY, None)
+        return None
+    session[SESSION_KEY] = _snapshot(role, session.get("user_id"), profile)
+    return Profile(**session[SESSION_KEY])
+
+
+def current_profile(role, repo):
+    """Profile of the logged-in user if they have ``role``, else None.
+
+    ``repo`` is the role's repository; it is only queried when the session has
+    no cached profile yet (sessions from before the cache, or invalidated ones).
+    """
+    user_id = session.get("user_id")
+    if not user_id or session.get("role") != role:
+        return None
+    cached = session.get(SESSION_KEY)
+    if cached and cached.get("role") == role and cached.get("user_id") == user_id:
+        return Profile(**cached)
+    return remember_profile(role, repo.get_by_user_id(user_id))
+
+
+def invalidate_profile(user_id):
+    """Forget the cached profile in every session of ``user_id``.
+
+    Call after changing a profile (name, assigned doctor) or deleting a user.
+    With cookie sessions only the current session can be updated.
+    """
+    if session.get("user_id") == user_id:
+        session.pop(SESSION_KEY, None)
+
+    interface = current_app.session_interface
+    if hasattr(interface, "update_user_sessions"):
+        interface.update_user_sessions(user_id, lambda data: data.pop(SESSION_KEY, None) is not None)
@@ -0,0 +1,81 @@
+"""Dashboard counters from aggregate queries, memoized per user.
+
+Each role's numbers come from a few COUNT/SUM queries that the database answers
+from index ranges (one doctor-day, one patient's appointments, a doctor's
+index entries) instead of loading appointment rows to ``len()`` them. The
+result is kept for ``DASHBOARD_METRICS_TTL`` seconds per user, so reloading the
+dashboard is nearly free; the TTL is short enough that no invalidation is
+needed when appointments change.
+
+A doctor's "total appointments" covers the last ``DOCTOR_TOTALS_WINDOW_DAYS``
+days (plus everything booked ahead), not their whole history, so the count
+stays a bounded index range however long the doctor has been practising.
+"""
+import logging
+import os
+from datetime import date, timedelta
+
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_METRICS_TTL = float(os.getenv("DASHBOARD_METRICS_TTL", "5"))
+DOCTOR_TOTALS_WINDOW_DAYS = int(os.getenv("DOCTOR_TOTALS_WINDOW_DAYS", "365"))
+
+_cache = TTLCache(ttl=DASHBOARD_METRICS_TTL, maxsize=4096)
+
+
+def cached(user_id, role, compute, *args):
+    """``compute(*args)`` for this user's dashboard, reused for DASHBOARD_METRICS_TTL seconds."""
+    return _cache.get_or_set((role, user_id), lambda: compute(*args))
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def patient_metrics(patient_id, appointment_repo, patient_repo):
+    counts = appointment_repo.get_patient_counts(patient_id)
+    return {
+        'patient_appointments': counts['total'],
+        'upcoming_appointments': counts['upcoming'],
+        'medical_records': patient_repo.get_patient_records_count(patient_id),
+    }
+
+
+def doctor_metrics(doctor_id, appointment_repo, today=None):
+    today = today or date.today()
+    day = appointment_repo.get_day_counts(doctor_id, today.isoformat())
+    since = today - timedelta(days=DOCTOR_TOTALS_WINDOW_DAYS)
+    totals = appointment_repo.get_doctor_totals(doctor_id, since.isoformat())
+    return {
+        'doctor_patients': day['patients'],
+        'today_appointments': day['appointments'],
+        'total_appointments': totals['total'],
+        'pending_tasks': totals['pending'],
+    }
+
+
+def assistant_metrics(doctor_id, appointment_repo, patient_repo, doctor_repo, today=None):
+    today_appointments = 0
+    if doctor_id:
+        day = appointment_repo.get_day_counts(doctor_id, (today or date.today()).isoformat())
+        today_appointments = day['appointments']
+    return {
+        'total_patients': patient_repo.count_patients(),
+        'today_appointments': today_appointments,
+        'total_doctors': doctor_repo.get_total_count(),
+        'assigned_doctor': doctor_id,
+    }
+
+
+def admin_metrics(user_repo, audit_repo):
+    try:
+        recent = audit_repo.list_recent(5)
+    except Exception:
+        logger.exception("Error loading recent audit entries")
+        recent = []
+    return {
+        'pending_users': user_repo.count_pending_users(),
+        'recent_audits': recent,
+    }
@@ -0,0 +1,315 @@
+"""Server-side sessions.
+
+The session cookie only carries a random session id; the session data lives
+in a store on the server. That keeps profile details and flash messages out
+of the cookie, and lets the app change or drop every session of one user
+(see :mod:`services.identity`).
+
+Stores share a small Redis-like interface keyed by session id:
+
+``load(sid)``                      serialized data, or None when missing/expired
+``save(sid, data, ttl, user_id)``  store data for ``ttl`` seconds
+``touch(sid, ttl)``                extend the expiry without rewriting the data
+``delete(sid)``
+``sids_for_user(user_id)``         ids of the live sessions of a user
+
+Settings:
+
+``SESSION_BACKEND``      ``sqlite`` (default), ``memory``, ``redis`` or ``cookie``
+                         (Flask's signed-cookie sessions)
+``SESSION_SQLITE_PATH``  database file for the sqlite store
+``SESSION_REDIS_URL``    server for the redis store (needs the ``redis`` package)
+"""
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger(__name__)
+
+SESSION_ID_BYTES = 32
+
+
+class MemorySessionStore:
+    """Process-local store; for tests and single-process development servers."""
+
+    def __init__(self):
+        self._data = {}       # sid -> (expires_at, data, user_id)
+        self._by_user = {}    # user_id -> {sid}
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._drop(sid)
+                return None
+            return entry[1]
+
+    def save(self, sid, data, ttl, user_id=None):
+        with self._lock:
+            self._drop(sid)
+            self._data[sid] = (time.time() + ttl, data, user_id)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(sid)
+
+    def touch(self, sid, ttl):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is not None:
+                self._data[sid] = (time.time() + ttl,) + entry[1:]
+
+    def delete(self, sid):
+        with self._lock:
+            self._drop(sid)
+
+    def sids_for_user(self, user_id):
+        with self._lock:
+            return list(self._by_user.get(user_id, ()))
+
+    def _drop(self, sid):
+        entry = self._data.pop(sid, None)
+        if entry is not None and entry[2] is not None:
+            sids = self._by_user.get(entry[2])
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._by_user[entry[2]]
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file, shared by every worker on the host."""
+
+    # Expired rows are deleted after this many saves
+    PURGE_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._saves = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session ("
+                " sid TEXT PRIMARY KEY,"
+                " user_id INTEGER,"
+                " data TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_session_user ON session (user_id)")
+
+    def _connect(self):
+        # One connection per thread (and per process: forked workers must not
+        # share the parent's handle)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def load(self, sid):
+        row = self._connect().execute(
+            "SELECT data FROM session WHERE sid = ? AND expires_at > ?", (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def save(self, sid, data, ttl, user_id=None):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO session (sid, user_id, data, expires_at) VALUES (?, ?, ?, ?)",
+            (sid, user_id, data, time.time() + ttl),
+        )
+        self._saves += 1
+        if self._saves % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM session WHERE expires_at <= ?", (time.time(),))
+
+    def touch(self, sid, ttl):
+        self._connect().execute(
+            "UPDATE session SET expires_at = ? WHERE sid = ?", (time.time() + ttl, sid)
+        )
+
+    def delete(self, sid):
+        self._connect().execute("DELETE FROM session WHERE sid = ?", (sid,))
+
+    def sids_for_user(self, user_id):
+        rows = self._connect().execute(
+            "SELECT sid FROM session WHERE user_id = ? AND expires_at > ?", (user_id, time.time())
+        ).fetchall()
+        return [row[0] for row in rows]
+
+
+class RedisSessionStore:
+    """Sessions in Redis; each user's session ids are kept in a set."""
+
+    def __init__(self, client, prefix="session:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, sid):
+        return f"{self.prefix}{sid}"
+
+    def _user_key(self, user_id):
+        return f"{self.prefix}user:{user_id}"
+
+    def load(self, sid):
+        data = self.client.get(self._key(sid))
+        return data.decode() if isinstance(data, bytes) else data
+
+    def save(self, sid, data, ttl, user_id=None):
+        ttl = max(1, int(ttl))
+        pipe = self.client.pipeline()
+        pipe.setex(self._key(sid), ttl, data)
+        if user_id is not None:
+            pipe.sadd(self._user_key(user_id), sid)
+            pipe.expire(self._user_key(user_id), ttl)
+        pipe.execute()
+
+    def touch(self, sid, ttl):
+        self.client.expire(self._key(sid), max(1, int(ttl)))
+
+    def delete(self, sid):
+        self.client.delete(self._key(sid))
+
+    def sids_for_user(self, user_id):
+        sids = [s.decode() if isinstance(s, bytes) else s
+                for s in self.client.smembers(self._user_key(user_id))]
+        live = [sid for sid in sids if self.client.exists(self._key(sid))]
+        stale = set(sids) - set(live)
+        if stale:
+            self.client.srem(self._user_key(user_id), *stale)
+        return live
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self._previous_sid = None
+
+    def regenerate(self):
+        """Move the data to a fresh session id (call on login)."""
+        if self.sid is not None:
+            self._previous_sid = self.sid
+        self.sid = None
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSideSession
+
+    def __init__(self, store):
+        self.store = store
+
+    def _ttl(self, app):
+        return app.permanent_session_lifetime.total_seconds()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            try:
+                data = self.store.load(sid)
+            except Exception:
+                logger.exception("Could not load session")
+                data = None
+            if data is not None:
+                return self.session_class(self.serializer.loads(data), sid=sid)
+        return self.session_class(new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session._previous_sid is not None:
+            self.store.delete(session._previous_sid)
+            session._previous_sid = None
+
+        if not session:
+            if session.sid is not None and (session.modified or not session.new):
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       partitioned=self.get_cookie_partitioned(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+                response.vary.add("Cookie")
+            return
+
+        ttl = self._ttl(app)
+        if session.sid is None or session.modified:
+            session.sid = session.sid or secrets.token_urlsafe(SESSION_ID_BYTES)
+            self.store.save(session.sid, self.serializer.dumps(dict(session)), ttl,
+                            user_id=session.get("user_id"))
+        elif self.should_set_cookie(app, session):
+            self.store.touch(session.sid, ttl)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+        if session.modified or session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                partitioned=self.get_cookie_partitioned(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+            response.vary.add("Cookie")
+
+    def update_user_sessions(self, user_id, update):
+        """Apply ``update(data)`` to every stored session of ``user_id``.
+
+        ``update`` changes the session dict in place; a session is rewritten
+        only when it returns a truthy value.
+        """
+        ttl = self._ttl(current_app)
+        for sid in self.store.sids_for_user(user_id):
+            raw = self.store.load(sid)
+            if raw is None:
+                continue
+            data = self.serializer.loads(raw)
+            if update(data):
+                self.store.save(sid, self.serializer.dumps(data), ttl, user_id=user_id)
+
+
+def build_store(app):
+    backend = app.config["SESSION_BACKEND"]
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore(app.config["SESSION_SQLITE_PATH"])
+    if backend == "redis":
+        return RedisSessionStore.from_url(app.config["SESSION_REDIS_URL"])
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+
+def init_app(app):
+    """Install the server-side session interface unless ``SESSION_BACKEND`` is ``cookie``."""
+    if app.config["SESSION_BACKEND"] == "cookie":
+        return
+    app.session_interface = ServerSideSessionInterface(build_store(app))
@@ -0,0 +1,117 @@
+"""Appointment slot computation.
+
+Availability windows are merged into disjoint minute intervals, booked
+appointments are marked in a per-day minute bitmap and a slot is offered only
+when it fits entirely inside a window without touching a booked minute.
+Results are cached per (doctor, date) and invalidated by the repositories
+whenever an appointment or availability entry for that doctor-day changes.
+"""
+import datetime
+import os
+
+from utils.ttl_cache import TTLCache
+
+MINUTES_PER_DAY = 24 * 60
+
+SLOT_MINUTES = int(os.getenv("SLOT_MINUTES", "30"))
+SLOT_CACHE_TTL = float(os.getenv("SLOT_CACHE_TTL", "60"))
+
+_slot_cache = TTLCache(ttl=SLOT_CACHE_TTL, maxsize=4096)
+
+
+def to_minutes(value):
+    """Convert a TIME value (time, timedelta or 'HH:MM[:SS]') to minutes after midnight."""
+    if value is None:
+        return None
+    if isinstance(value, datetime.timedelta):
+        return int(value.total_seconds()) // 60
+    if hasattr(value, 'hour'):
+        return value.hour * 60 + value.minute
+    parts = str(value).split('.')[0].split(':')
+    try:
+        return int(parts[0]) * 60 + int(parts[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching [start, end) minute intervals."""
+    merged = []
+    for start, end in sorted(i for i in intervals if i[0] < i[1]):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def compute_free_slots(windows, booked_times, slot_minutes=None):
+    """Return the free 'HH:MM' slot starts for one doctor-day.
+
+    Args:
+        windows: Iterable of (start, end) availability TIME values
+        booked_times: Iterable of appointment start TIME values
+        slot_minutes: Slot length; each booking occupies one slot from its start
+
+    Returns:
+        Sorted list of slot start times that fit inside a window and overlap
+        no booking
+    """
+    slot_minutes = slot_minutes or SLOT_MINUTES
+    intervals = []
+    for start, end in windows:
+        start, end = to_minutes(start), to_minutes(end)
+        if start is not None and end is not None:
+            intervals.append((max(0, start), min(MINUTES_PER_DAY, end)))
+
+    booked = bytearray(MINUTES_PER_DAY)
+    for value in booked_times:
+        start = to_minutes(value)
+        if start is None:
+            continue
+        end = min(MINUTES_PER_DAY, start + slot_minutes)
+        booked[start:end] = b'\x01' * (end - start)
+
+    slots = []
+    for start, end in merge_intervals(intervals):
+        current = start
+        while current + slot_minutes <= end:
+            if not any(booked[current:current + slot_minutes]):
+                slots.append(format_minutes(current))
+            current += slot_minutes
+    return slots
+
+
+def _key(doctor_id, date):
+    return (int(doctor_id), str(date))
+
+
+def get_cached_slots(doctor_id, date):
+    slots = _slot_cache.get(_key(doctor_id, date))
+    return list(slots) if slots is not None else None
+
+
+def cache_slots(doctor_id, date, slots):
+    _slot_cache.set(_key(doctor_id, date), tuple(slots))
+
+
+def invalidate(doctor_id, date):
+    """Forget cached slots for one doctor-day."""
+    if doctor_id is None or date is None:
+        return
+    _slot_cache.invalidate(_key(doctor_id, date))
+
+
+def invalidate_doctor(doctor_id):
+    """Forget cached slots for every day of one doctor."""
+    doctor_id = int(doctor_id)
+    _slot_cache.invalidate_where(lambda key: key[0] == doctor_id)
+
+
+def clear_cache():
+    _slot_cache.clear()
@@ -0,0 +1,191 @@
+"""Background thumbnails and previews for uploaded images and PDFs.
+
+``UploadedFileRepository.save_file`` hands every new upload to a small thread
+pool. Each job renders a thumbnail (for file lists) and a larger preview (the
+first page of a PDF) as JPEGs next to the original, then records their paths
+on the UploadedFile row, so chart pages load kilobyte-sized images instead of
+full scans.
+
+Pillow is required to render anything; PyMuPDF (``fitz``) additionally enables
+PDF previews. Without them uploads are simply left without previews.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+
+from services import upload_storage
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (240, 240)
+PREVIEW_SIZE = (1024, 1024)
+THUMBNAIL_QUALITY = 70
+PREVIEW_QUALITY = 80
+DEFAULT_WORKERS = 2
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+PDF_EXTENSIONS = {".pdf"}
+
+_imaging = None   # (PIL.Image, PIL.ImageOps, fitz) once imported
+
+
+def imaging():
+    """Pillow and PyMuPDF, imported on first use; None for each one not installed."""
+    global _imaging
+    if _imaging is None:
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:  # pragma: no cover - optional dependency
+            Image = ImageOps = None
+        try:
+            import fitz
+        except ImportError:  # pragma: no cover - optional dependency
+            fitz = None
+        _imaging = (Image, ImageOps, fitz)
+    return _imaging
+
+
+def is_supported(file_path, mime_type=None):
+    """Whether a preview can be rendered for this file with the installed libraries."""
+    Image, _, fitz = imaging()
+    if Image is None:
+        return False
+    ext = os.path.splitext(file_path or "")[1].lower()
+    mime_type = (mime_type or "").lower()
+    if ext in IMAGE_EXTENSIONS or mime_type.startswith("image/"):
+        return True
+    return fitz is not None and (ext in PDF_EXTENSIONS or mime_type == "application/pdf")
+
+
+def derived_paths(file_path):
+    """Stored paths of the thumbnail and preview that belong to ``file_path``."""
+    base = os.path.splitext(file_path.replace("\\", "/"))[0]
+    return base + ".thumb.jpg", base + ".preview.jpg"
+
+
+def _open_first_page(source_path, mime_type):
+    Image, ImageOps, fitz = imaging()
+    ext = os.path.splitext(source_path)[1].lower()
+    if ext in PDF_EXTENSIONS or (mime_type or "").lower() == "application/pdf":
+        with fitz.open(source_path) as doc:
+            page = doc.load_page(0)
+            # Rasterize at just enough resolution for the preview box
+            scale = min(PREVIEW_SIZE[0] / page.rect.width, PREVIEW_SIZE[1] / page.rect.height, 2.0)
+            pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+            return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    img = Image.open(source_path)
+    # Let the JPEG decoder downscale while reading instead of decoding every pixel
+    img.draft("RGB", PREVIEW_SIZE)
+    return ImageOps.exif_transpose(img)
+
+
+def _save_jpeg(img, size, dest_path, quality):
+    copy = img.copy()
+    copy.thumbnail(size)
+    if copy.mode != "RGB":
+        copy = copy.convert("RGB")
+    tmp_path = dest_path + ".part"
+    copy.save(tmp_path, "JPEG", quality=quality, optimize=True)
+    os.replace(tmp_path, dest_path)
+
+
+def render(source_path, thumbnail_dest, preview_dest, mime_type=None):
+    """Write the thumbnail and preview JPEGs for ``source_path``.
+
+    Files are content-addressed, so existing outputs are reused as-is.
+    """
+    if os.path.exists(thumbnail_dest) and os.path.exists(preview_dest):
+        return
+    img = _open_first_page(source_path, mime_type)
+    try:
+        _save_jpeg(img, PREVIEW_SIZE, preview_dest, PREVIEW_QUALITY)
+        _save_jpeg(img, THUMBNAIL_SIZE, thumbnail_dest, THUMBNAIL_QUALITY)
+    finally:
+        img.close()
+
+
+class ThumbnailWorker:
+    """Runs preview jobs off the request thread.
+
+    The executor is created on first use so forked workers and scripts that
+    never upload anything do not start threads.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix="thumbnails")
+        return self._executor.submit(fn, *args)
+
+    def reset_after_fork(self):
+        """Drop an executor inherited from the parent; its threads are gone."""
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def process(file_id, source_path, file_path, mime_type):
+    """Job body: render the previews, then record them on the UploadedFile row."""
+    # Imported here: the repository feeds this module from save_file
+    from database.db_singleton import DatabaseConnection
+    from repositories.UploadedFileRepository import UploadedFileRepository
+
+    thumbnail_path, preview_path = derived_paths(file_path)
+    source_dir = os.path.dirname(source_path)
+    try:
+        render(
+            source_path,
+            os.path.join(source_dir, os.path.basename(thumbnail_path)),
+            os.path.join(source_dir, os.path.basename(preview_path)),
+            mime_type,
+        )
+    except Exception:
+        logger.exception("Error rendering preview for file %s", file_id)
+        return False
+
+    with DatabaseConnection().connection() as conn:
+        return UploadedFileRepository(connection=conn).set_previews(file_id, thumbnail_path, preview_path)
+
+
+def enqueue(uploaded, app=None):
+    """Schedule previews for a freshly saved UploadedFile.
+
+    Returns the job's future, or None when nothing will be rendered.
+    """
+    if app is None:
+        if not has_app_context():
+            return None
+        app = current_app._get_current_object()
+    worker = app.extensions.get("thumbnails")
+    if worker is None or not is_supported(uploaded.file_path, uploaded.file_type):
+        return None
+
+    storage = upload_storage.get_storage(app)
+    source_path = storage.locate(uploaded.file_path)
+    if not source_path:
+        return None
+    return worker.submit(process, uploaded.id, source_path, uploaded.file_path, uploaded.file_type)
+
+
+def init_app(app):
+    """Attach a ThumbnailWorker sized from ``THUMBNAIL_WORKERS`` (0 disables previews)."""
+    workers = int(app.config.get("THUMBNAIL_WORKERS", DEFAULT_WORKERS))
+    if workers > 0:
+        app.extensions["thumbnails"] = ThumbnailWorker(workers)
+    else:
+        app.extensions.pop("thumbnails", None)
@@ -0,0 +1,139 @@
+"""Content-addressed storage for uploaded medical files.
+
+Uploads are streamed to a temporary file in fixed-size chunks while being
+hashed, then moved to ``<root>/<aa>/<bb>/<sha256><ext>``. Identical content is
+stored once, differently named files never overwrite each other and a large
+scan never has to sit in memory.
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+StoredUpload = namedtuple("StoredUpload", "path sha256 size_bytes original_name mime_type deduplicated")
+
+
+class UploadError(ValueError):
+    """Raised when an upload cannot be stored."""
+
+
+class UploadTooLargeError(UploadError):
+    pass
+
+
+class EmptyUploadError(UploadError):
+    pass
+
+
+class UploadStorage:
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES, path_prefix="", chunk_size=CHUNK_SIZE,
+                 legacy_roots=()):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.path_prefix = path_prefix.strip("/")
+        self.chunk_size = chunk_size
+        # Older uploads were stored relative to these directories (e.g. the static folder)
+        self.legacy_roots = [os.path.abspath(r) for r in legacy_roots]
+
+    def save(self, stream, original_name, mime_type=None):
+        """Store the contents of a readable binary stream.
+
+        Returns:
+            StoredUpload; ``path`` is what gets recorded on UploadedFile
+            (relative to the storage root, behind ``path_prefix``)
+
+        Raises:
+            UploadTooLargeError: More than ``max_bytes`` were sent
+            EmptyUploadError: The stream was empty
+        """
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLargeError(
+                            f"File is larger than the {self.max_bytes // (1024 * 1024)} MB limit"
+                        )
+                    digest.update(chunk)
+                    out.write(chunk)
+            if size == 0:
+                raise EmptyUploadError("Uploaded file is empty")
+
+            sha256 = digest.hexdigest()
+            rel_path = self._relative_path(sha256, original_name)
+            final_path = os.path.join(self.root, rel_path)
+            deduplicated = os.path.exists(final_path)
+            if deduplicated:
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        path = f"{self.path_prefix}/{rel_path}" if self.path_prefix else rel_path
+        return StoredUpload(path, sha256, size, original_name, mime_type, deduplicated)
+
+    def path_for(self, stored_path):
+        """Absolute path of a stored file, refusing anything outside the root."""
+        rel_path = stored_path.replace("\\", "/")
+        if self.path_prefix and rel_path.startswith(self.path_prefix + "/"):
+            rel_path = rel_path[len(self.path_prefix) + 1:]
+        full_path = os.path.abspath(os.path.join(self.root, rel_path))
+        if os.path.commonpath([full_path, self.root]) != self.root:
+            raise UploadError("Path escapes the upload root")
+        return full_path
+
+    def locate(self, stored_path):
+        """Find a stored file on disk, including uploads from before the move
+        to private storage. Returns the absolute path or None."""
+        rel_path = (stored_path or "").replace("\\", "/").lstrip("/")
+        if not rel_path:
+            return None
+        # Legacy rows were recorded as "uploads/<name>" relative to the static folder
+        names = [rel_path]
+        if rel_path.startswith("uploads/"):
+            names.append(rel_path[len("uploads/"):])
+        for root in [self.root] + self.legacy_roots:
+            for name in names:
+                full_path = os.path.abspath(os.path.join(root, name))
+                if os.path.commonpath([full_path, root]) == root and os.path.isfile(full_path):
+                    return full_path
+        return None
+
+    @staticmethod
+    def _relative_path(sha256, original_name):
+        ext = os.path.splitext(secure_filename(original_name or ""))[1].lower()
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def init_app(app):
+    """Attach an UploadStorage built from the app config."""
+    app.extensions["upload_storage"] = UploadStorage(
+        app.config["UPLOAD_ROOT"],
+        max_bytes=app.config["UPLOAD_MAX_BYTES"],
+        path_prefix=app.config.get("UPLOAD_PATH_PREFIX", ""),
+        legacy_roots=app.config.get("UPLOAD_LEGACY_ROOTS", ()),
+    )
+
+
+def get_storage(app=None):
+    if app is None:
+        from flask import current_app
+        app = current_app
+    return app.extensions["upload_storage"]
@@ -0,0 +1,134 @@
+"""Application logging.
+
+Modules log through ``logging.getLogger(__name__)``. :func:`configure_logging`
+puts a :class:`logging.handlers.QueueHandler` on the root logger, so a log call
+on a request thread only enqueues the record; a background
+:class:`~logging.handlers.QueueListener` formats it and writes it to stderr.
+
+Settings:
+
+``LOG_LEVEL``   DEBUG, INFO (default), WARNING, ...
+``LOG_FORMAT``  ``json`` (default, one object per line) or ``text``
+"""
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+_settings = None   # (level, fmt, stream) of the last configure_logging() call
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any ``extra`` fields."""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc)
+                                  .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps ``extra`` fields and exceptions intact.
+
+    The stock handler merges args into the message and flattens exc_info to
+    text; this one only resolves the message and leaves the rest to the
+    formatter on the listener thread.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _build_formatter(fmt):
+    if fmt == "text":
+        return logging.Formatter(TEXT_FORMAT)
+    return JsonFormatter()
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """Route the root logger through a queue to a single stream handler.
+
+    Safe to call more than once; later calls replace the previous setup.
+    """
+    global _listener, _settings
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "json")).lower()
+    stream = stream or sys.stderr
+
+    with _lock:
+        root = logging.getLogger()
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(root.handlers):
+            if isinstance(handler, _QueueHandler):
+                root.removeHandler(handler)
+
+        output = logging.StreamHandler(stream)
+        output.setFormatter(_build_formatter(fmt))
+        log_queue = queue.SimpleQueue()
+        root.addHandler(_QueueHandler(log_queue))
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        _settings = (level, fmt, stream)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def reinit_after_fork():
+    """Restart the listener in a forked worker; the parent's thread did not survive the fork."""
+    global _listener, _lock
+    _lock = threading.Lock()
+    _listener = None
+    if _settings is not None:
+        configure_logging(*_settings)
+
+
+atexit.register(shutdown_logging)
+
+
+def init_app(app):
+    """Configure logging for a served app. Tests keep pytest's own capture."""
+    if app.testing:
+        return
+    configure_logging()
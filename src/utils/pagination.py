@@ -0,0 +1,44 @@
+"""Keyset ("seek") pagination on ``(create_at, id)``.
+
+Instead of ``LIMIT n OFFSET k`` -- which reads and throws away ``k`` rows --
+each page remembers the last row it showed and the next one starts right
+after it, so every page costs one index range read however deep it is. The
+position travels in the URL as an opaque ``cursor`` token.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+
+# next_cursor: token for the following page, None on the last one
+# total: number of matching rows, None when not asked for
+Page = namedtuple("Page", "items next_cursor total")
+
+
+def encode_cursor(created_at, id):
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat(sep=" ")
+    raw = json.dumps([str(created_at), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """``(created_at, id)`` from a token; None for a missing or tampered one."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+def seek_clause(position, descending):
+    """WHERE fragment and params selecting the rows after ``position``."""
+    if position is None:
+        return "", ()
+    created_at, id = position
+    op = "<" if descending else ">"
+    return f"(create_at {op} %s OR (create_at = %s AND id {op} %s))", (created_at, created_at, id)
@@ -0,0 +1,38 @@
+"""Production WSGI entry point.
+
+    gunicorn -c deployment/gunicorn.conf.py      # from the repository root
+
+``app`` is created once at import, so gunicorn's ``preload_app`` builds it in
+the master and forks it into every worker. Nothing here opens sockets or
+starts threads at import time; :func:`post_fork` gives each worker its own
+connection pool, log listener, thumbnail and audit threads, and :func:`on_exit`
+drains them when the worker stops.
+"""
+from create_app import create_app
+from database.db_singleton import DatabaseConnection
+from utils import logging_config
+
+app = create_app()
+
+
+def post_fork():
+    """Reset per-process state inherited from the preloading master."""
+    DatabaseConnection.reset_after_fork()
+    logging_config.reinit_after_fork()
+    for name in ("thumbnails", "audit_log"):
+        worker = app.extensions.get(name)
+        if worker is not None:
+            worker.reset_after_fork()
+
+
+def on_exit():
+    """Finish queued work and close this worker's connections."""
+    worker = app.extensions.get("thumbnails")
+    if worker is not None:
+        worker.shutdown(wait=True)
+    # Before the pool closes: the audit writer needs a connection for its last batch
+    audit = app.extensions.get("audit_log")
+    if audit is not None:
+        audit.shutdown()
+    DatabaseConnection().close()
+    logging_config.shutdown_logging()
@@ -26,4 +26,17 @@ def client(app):
 @pytest.fixture
 def runner(app):
     """Create CLI runner"""
-    return app.test_cli_runner()
\ No newline at end of file
+    return app.test_cli_runner()
+
+
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    """Keep cached slots, doctors and dashboard counters from leaking between tests"""
+    from services import doctor_directory, metrics, slot_engine
+    slot_engine.clear_cache()
+    doctor_directory.invalidate()
+    metrics.clear_cache()
+    yield
+    slot_engine.clear_cache()
+    doctor_directory.invalidate()
+    metrics.clear_cache()
@@ -0,0 +1,103 @@
+import datetime
+import threading
+
+from database import migrator
+from repositories.AdminAuditRepository import AdminAuditRepository
+from services import audit_log
+from tests.test_repositories import RecordingConnection, RecordingCursor
+
+
+def _entry(n):
+    return audit_log.AuditEntry(1, 'approve_user', n, 'doctor', None, datetime.datetime(2026, 10, 18, 9, 0))
+
+
+def test_writer_batches_what_piled_up_and_drains_on_shutdown():
+    batches = []
+    release = threading.Event()
+
+    def write(entries):
+        release.wait(5)          # hold the first batch while more entries queue up
+        batches.append([e.target_user_id for e in entries])
+
+    writer = audit_log.AuditWriter(write=write, batch_size=3)
+    for n in range(6):
+        assert writer.submit(_entry(n))
+    release.set()
+    writer.shutdown()
+
+    assert [n for batch in batches for n in batch] == list(range(6))
+    assert max(len(batch) for batch in batches) == 3 and len(batches) <= 4
+    assert writer.submit(_entry(7)) is False
+
+
+def test_record_writes_inline_when_the_queue_is_full_or_missing(app, monkeypatch):
+    written = []
+    writer = audit_log.AuditWriter(write=written.extend, maxsize=1)
+    monkeypatch.setattr(writer, '_ensure_thread', lambda: None)   # nothing drains the queue
+    app.extensions['audit_log'] = writer
+    assert writer.submit(_entry(0))
+
+    with app.app_context():
+        entry = audit_log.record(1, 'reject_user', 5, 'assistant')
+    assert written == [entry]
+
+    inline = []
+    monkeypatch.setattr(audit_log, 'write_batch', inline.extend)
+    del app.extensions['audit_log']                                # AUDIT_QUEUE_SIZE=0
+    with app.app_context():
+        entry = audit_log.record(1, 'approve_appointment', 9, 'appointment')
+    assert inline == [entry] and entry.created_at.microsecond == 0
+
+
+def test_failed_batches_are_retried_then_logged(caplog):
+    calls = []
+
+    def write(entries):
+        calls.append(len(entries))
+        raise RuntimeError('db down')
+
+    writer = audit_log.AuditWriter(write=write)
+    writer.submit(_entry(3))
+    writer.shutdown()
+    assert calls == [1, 1]
+    assert 'Unwritten audit entry' in caplog.text and "'target_user_id': 3" in caplog.text
+
+
+def test_insert_many_is_one_executemany_and_one_commit():
+    class BatchCursor(RecordingCursor):
+        def executemany(self, query, rows):
+            self.executed.append((' '.join(query.split()), rows))
+
+    class CountingConnection(RecordingConnection):
+        commits = 0
+        def commit(self):
+            self.commits += 1
+
+    cursor = BatchCursor()
+    conn = CountingConnection(cursor)
+    assert AdminAuditRepository(connection=conn).insert_many([_entry(1), _entry(2)]) == 2
+
+    query, rows = cursor.executed[0]
+    assert query.startswith('INSERT INTO admin_audit') and 'create_at' in query
+    assert [r[2] for r in rows] == [1, 2] and conn.commits == 1
+
+
+def test_audit_partitions_are_added_for_the_coming_months():
+    class PartitionCursor(RecordingCursor):
+        def fetchall(self):
+            return [('p202610',), ('p_future',)]
+
+    cursor = PartitionCursor()
+    added = migrator.ensure_audit_partitions(RecordingConnection(cursor), today=datetime.date(2026, 11, 20),
+                                             months_ahead=2)
+
+    assert added == ['p202611', 'p202612', 'p202701']
+    alter = cursor.executed[-1][0]
+    assert alter.startswith('ALTER TABLE admin_audit REORGANIZE PARTITION p_future INTO')
+    assert "PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00'))" in alter
+    assert alter.endswith('PARTITION p_future VALUES LESS THAN MAXVALUE)')
+
+    cursor = PartitionCursor()
+    assert migrator.ensure_audit_partitions(RecordingConnection(cursor), today=datetime.date(2026, 8, 1),
+                                             months_ahead=2) == []
+    assert len(cursor.executed) == 1
@@ -57,3 +57,96 @@ def test_get_available_slots_fallback_when_no_availability():
     assert '09:00' in slots
     assert '16:30' in slots
     assert '17:00' not in slots
+
+
+def test_get_available_slots_served_from_cache_until_booking():
+    from services import slot_engine
+    calls = []
+
+    class CountingCursor(FakeCursor):
+        def execute(self, query, params=None):
+            calls.append(query)
+            super().execute(query, params)
+
+    class CountingConn(FakeConnection):
+        def cursor(self):
+            return CountingCursor()
+
+    repo = AppointmentRepository(connection=CountingConn())
+    first = repo.get_available_slots(doctor_id=1, date='2025-12-20')
+    second = repo.get_available_slots(doctor_id=1, date='2025-12-20')
+    assert first == second
+    assert len(calls) == 2
+
+    slot_engine.invalidate(1, '2025-12-20')
+    repo.get_available_slots(doctor_id=1, date='2025-12-20')
+    assert len(calls) == 4
+
+
+def test_find_free_slots_uses_two_queries_for_all_doctor_days():
+    executed = []
+
+    class RangeCursor:
+        def execute(self, query, params=None):
+            executed.append(params)
+            if 'from doctor_availability' in query.lower():
+                self._data = [
+                    (1, datetime.date(2025, 12, 20), datetime.time(9, 0), datetime.time(10, 0)),
+                    (2, datetime.date(2025, 12, 20), datetime.time(9, 0), datetime.time(9, 30)),
+                    (1, datetime.date(2025, 12, 21), datetime.time(8, 0), datetime.time(8, 30)),
+                ]
+            else:
+                self._data = [(1, datetime.date(2025, 12, 20), datetime.time(9, 0))]
+        def fetchall(self):
+            return self._data
+        def close(self):
+            pass
+
+    class RangeConn:
+        def cursor(self):
+            return RangeCursor()
+
+    repo = AppointmentRepository(connection=RangeConn())
+    slots = repo.find_free_slots([2, 1], '2025-12-20', '2025-12-21')
+
+    assert len(executed) == 2
+    assert executed[0] == (1, 2, '2025-12-20', '2025-12-21')
+    assert slots == [
+        {'doctor_id': 2, 'date': '2025-12-20', 'time': '09:00'},
+        {'doctor_id': 1, 'date': '2025-12-20', 'time': '09:30'},
+        {'doctor_id': 1, 'date': '2025-12-21', 'time': '08:00'},
+    ]
+    assert repo.find_free_slots([1, 2], '2025-12-20', '2025-12-21', limit=1) == slots[:1]
+
+
+def test_slot_search_api_expands_specialization_and_caps_range(client, monkeypatch):
+    calls = {}
+
+    class FakeDoctor:
+        def __init__(self, id):
+            self.id = id
+
+    class FakeDoctorRepo:
+        def list_by_specialization(self, specialization):
+            return [FakeDoctor(4), FakeDoctor(5)]
+
+    class FakeAppointmentRepo:
+        def find_free_slots(self, doctor_ids, start, end, limit=None, not_before=None):
+            calls.update(doctor_ids=doctor_ids, start=start, end=end, limit=limit)
+            return [{'doctor_id': 4, 'date': start, 'time': '09:00'}]
+
+    monkeypatch.setattr('controllers.patient_controller.doctor_repo', FakeDoctorRepo())
+    monkeypatch.setattr('controllers.patient_controller.appointment_repo', FakeAppointmentRepo())
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['role'] = 'patient'
+
+    start = datetime.date.today() + datetime.timedelta(days=1)
+    res = client.get(f'/patient/api/slots/search?specialization=Cardiology&doctor_id=1'
+                     f'&start={start.isoformat()}&end=2999-01-01&limit=3')
+
+    assert res.status_code == 200
+    assert calls['doctor_ids'] == [1, 4, 5]
+    assert calls['limit'] == 3
+    assert calls['end'] == (start + datetime.timedelta(days=30)).isoformat()
+    assert res.get_json()['slots'][0]['time'] == '09:00'
@@ -0,0 +1,127 @@
+import pytest
+
+from services import chat
+from utils.ttl_cache import TTLCache
+
+
+class FakeBackend:
+    name = 'fake'
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def generate(self, message):
+        self.calls.append(message)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('services.chat.time.monotonic', lambda: now[0])
+    monkeypatch.setattr('utils.ttl_cache.time.monotonic', lambda: now[0])
+    return now
+
+
+def test_answers_are_cached_by_normalized_question():
+    backend = FakeBackend(['Open 8 to 8 on weekdays.'])
+    service = chat.ChatService(backend)
+
+    first = service.reply(1, 'What are your  hours?')
+    second = service.reply(2, 'what are your hours')
+
+    assert first == ('Open 8 to 8 on weekdays.', 'fake', None)
+    assert second.source == 'cache'
+    assert backend.calls == ['What are your  hours?']
+
+
+def test_token_bucket_limits_each_user_separately(clock):
+    limiter = chat.TokenBucket(rate_per_minute=6, burst=2)
+    service = chat.ChatService(chat.LocalBackend(), limiter=limiter)
+
+    service.reply(1, 'hello')
+    service.reply(1, 'hello')
+    with pytest.raises(chat.RateLimited) as exc:
+        service.reply(1, 'hello')
+    assert exc.value.retry_after == pytest.approx(10)
+    service.reply(2, 'hello')
+
+    clock[0] += 10
+    service.reply(1, 'hello')
+
+
+def test_breaker_serves_fallback_instantly_while_upstream_is_down(clock):
+    backend = FakeBackend([chat.UpstreamError('timeout')] * 2 + ['Back online answer'])
+    service = chat.ChatService(backend, cache=TTLCache(ttl=60),
+                               breaker=chat.CircuitBreaker(failure_threshold=2, reset_timeout=30))
+
+    for _ in range(2):
+        assert service.reply(1, 'book an appointment').source == 'fallback'
+    assert service.breaker.state == chat.CircuitBreaker.OPEN
+
+    reply = service.reply(1, 'book an appointment')
+    assert reply.source == 'fallback' and 'Book Appointment' in reply.text
+    assert len(backend.calls) == 2
+
+    # After the reset timeout one trial call goes through and closes the breaker
+    clock[0] += 30
+    assert service.reply(1, 'anything new').text == 'Back online answer'
+    assert service.breaker.state == chat.CircuitBreaker.CLOSED
+
+
+def test_model_loading_note_is_passed_through():
+    backend = FakeBackend([chat.UpstreamError('503', note='AI model is loading, using fallback response')])
+    reply = chat.ChatService(backend).reply(1, 'hi')
+    assert reply.source == 'fallback'
+    assert reply.note == 'AI model is loading, using fallback response'
+
+
+def test_huggingface_backend_parses_and_rejects_responses():
+    class Response:
+        def __init__(self, status_code, body):
+            self.status_code = status_code
+            self.body = body
+
+        def json(self):
+            return self.body
+
+    class Session:
+        def __init__(self, responses):
+            self.responses = responses
+            self.posts = []
+
+        def post(self, url, json, timeout):
+            self.posts.append((url, timeout))
+            return self.responses.pop(0)
+
+    backend = chat.HuggingFaceBackend('http://inference.test/model', timeout=(1, 2))
+    backend._session = Session([Response(200, [{'generated_text': ' Drink water. '}]),
+                                Response(503, {}), Response(200, [{'generated_text': ''}])])
+
+    assert backend.generate('thirsty') == 'Drink water.'
+    with pytest.raises(chat.UpstreamError) as exc:
+        backend.generate('thirsty')
+    assert exc.value.note
+    with pytest.raises(chat.UpstreamError):
+        backend.generate('thirsty')
+    assert backend._session.posts[0] == ('http://inference.test/model', (1, 2))
+
+
+def test_chat_endpoint_uses_local_backend_and_rate_limits(app, client):
+    with client.session_transaction() as sess:
+        sess['user_id'] = 12
+        sess['role'] = 'patient'
+
+    res = client.post('/patient/api/chat', json={'message': 'What are your hours?'})
+    assert res.status_code == 200
+    assert 'Monday-Friday' in res.get_json()['response']
+
+    assert client.post('/patient/api/chat', json={}).status_code == 400
+
+    statuses = [client.post('/patient/api/chat', json={'message': 'hi'}).status_code
+                for _ in range(app.config['CHAT_BURST'])]
+    assert statuses[-1] == 429
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from database.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.in_transaction = False
+        self.rolled_back = False
+    def is_connected(self):
+        return self.connected
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+    kwargs.setdefault('min_size', 0)
+    return ConnectionPool(connect, **kwargs), created
+
+
+def test_reuses_released_connection():
+    pool, created = make_pool(max_size=2)
+    conn = pool.acquire()
+    pool.release(conn)
+    assert pool.acquire() is conn
+    assert len(created) == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool, _ = make_pool(max_size=1, timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+
+def test_waiting_thread_gets_released_connection():
+    pool, created = make_pool(max_size=1, timeout=2)
+    conn = pool.acquire()
+    got = []
+    t = threading.Thread(target=lambda: got.append(pool.acquire()))
+    t.start()
+    time.sleep(0.05)
+    pool.release(conn)
+    t.join(1)
+    assert got == [conn]
+    assert len(created) == 1
+
+
+def test_broken_connection_replaced_on_borrow():
+    pool, created = make_pool(max_size=1)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.connected = False
+    fresh = pool.acquire()
+    assert fresh is not conn
+    assert conn.closed
+    assert len(created) == 2
+
+
+def test_expired_connection_recycled():
+    pool, created = make_pool(max_size=1, max_lifetime=0.01)
+    conn = pool.acquire()
+    time.sleep(0.02)
+    pool.release(conn)
+    assert conn.closed
+    assert pool.acquire() is not conn
+
+
+def test_release_rolls_back_open_transaction():
+    pool, _ = make_pool(max_size=1)
+    conn = pool.acquire()
+    conn.in_transaction = True
+    pool.release(conn)
+    assert conn.rolled_back
+
+
+def test_min_size_prewarms_pool():
+    pool, created = make_pool(min_size=2, max_size=4)
+    pool.acquire()
+    assert len(created) == 2
+    assert pool.stats()['idle'] == 1
+
+
+def test_create_admin_releases_its_thread_connection(monkeypatch):
+    import create_admin
+    from database.db_singleton import DatabaseConnection
+
+    released = []
+
+    class FakeUserRepo:
+        def get_by_username(self, username):
+            return None
+        def create_user(self, **kwargs):
+            return object()
+
+    monkeypatch.setattr(create_admin.RepositoryFactory, 'get_repository', lambda name: FakeUserRepo())
+    monkeypatch.setattr(DatabaseConnection, 'release_thread_connection', lambda self: released.append(True))
+
+    create_admin.create_admin_user()
+
+    assert released == [True]
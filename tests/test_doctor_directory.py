@@ -0,0 +1,88 @@
+import threading
+
+from repositories.DoctorRepository import DoctorRepository
+from services import doctor_directory
+from tests.test_repositories import RecordingConnection, RecordingCursor
+
+
+def _row(id, last, specialization):
+    # DoctorRepository.COLUMNS order
+    return (id, 'Dr', last, f'+20{id}', None, 100 + id, specialization, None)
+
+
+ROWS = [_row(1, 'Adams', 'Cardiology'), _row(2, 'Baker', 'General'), _row(3, 'Cole', 'Cardiology')]
+
+
+def test_directory_serves_lists_lookups_and_facets_from_one_query():
+    cursor = RecordingCursor(rows=ROWS)
+    repo = DoctorRepository(connection=RecordingConnection(cursor))
+
+    assert [d.lastName for d in repo.list_all()] == ['Adams', 'Baker', 'Cole']
+    assert repo.get_by_id(2).lastName == 'Baker'
+    assert [d.id for d in repo.list_by_specialization('Cardiology')] == [1, 3]
+    assert repo.list_by_specialization('Dermatology') == []
+    assert repo.get_counts_by_specialization() == {'Cardiology': 2, 'General': 1}
+    assert repo.get_total_count() == 3
+
+    assert len(cursor.executed) == 1
+
+
+def test_writes_invalidate_and_change_the_version():
+    cursor = RecordingCursor(rows=list(ROWS))
+    repo = DoctorRepository(connection=RecordingConnection(cursor))
+    repo.list_all()
+    version = doctor_directory.current_version()
+    assert version is not None
+
+    cursor._rows[1] = _row(2, 'Baker', 'Neurology')
+    repo.update_doctor(2, 'Dr', 'Baker', '+202', 'Neurology')
+    assert doctor_directory.current_version() is None
+
+    assert repo.get_counts_by_specialization() == {'Cardiology': 2, 'Neurology': 1}
+    assert doctor_directory.current_version() not in (None, version)
+
+
+def test_same_data_gives_the_same_version():
+    assert (doctor_directory.DoctorDirectory([]).version
+            == doctor_directory.DoctorDirectory([]).version)
+    repo = DoctorRepository(connection=RecordingConnection(RecordingCursor(rows=ROWS)))
+    first = repo.directory().version
+    doctor_directory.invalidate()
+    assert repo.directory().version == first
+
+
+def test_unknown_id_falls_back_to_the_database():
+    cursor = RecordingCursor(rows=ROWS)
+    repo = DoctorRepository(connection=RecordingConnection(cursor))
+    repo.list_all()
+
+    cursor._rows = []
+    assert repo.get_by_id(99) is None
+    assert 'WHERE id = %s' in cursor.executed[-1][0]
+
+
+def test_concurrent_misses_load_once(monkeypatch):
+    loads = []
+    release = threading.Event()
+
+    def load():
+        loads.append(1)
+        release.wait(5)
+        return []
+
+    threads = [threading.Thread(target=doctor_directory.get_directory, args=(load,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(loads) == 1
+
+
+def test_invalidation_during_a_load_is_not_lost():
+    def load():
+        doctor_directory.invalidate()   # a doctor changed mid-load
+        return []
+
+    doctor_directory.get_directory(load)
+    assert doctor_directory.current_version() is None
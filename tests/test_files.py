@@ -0,0 +1,95 @@
+import io
+
+import pytest
+
+from models.upload_model import UploadedFile
+from services import upload_storage
+
+
+@pytest.fixture
+def stored(app, tmp_path, monkeypatch):
+    app.config['UPLOAD_ROOT'] = str(tmp_path)
+    upload_storage.init_app(app)
+    upload = upload_storage.get_storage(app).save(io.BytesIO(b'0123456789' * 10), 'scan.pdf', 'application/pdf')
+    record = UploadedFile(7, upload.path, 'application/pdf', 1, None, 3, 9, None, None,
+                          sha256=upload.sha256, size_bytes=upload.size_bytes, original_name='scan.pdf')
+
+    class FakeUploadedRepo:
+        def get_by_id(self, file_id):
+            return record if file_id == 7 else None
+
+    class FakePatient:
+        def __init__(self, id):
+            self.id = id
+
+    class FakePatientRepo:
+        def get_by_user_id(self, user_id):
+            return FakePatient(9 if user_id == 50 else 10)
+
+    monkeypatch.setattr('controllers.files_controller.uploaded_repo', FakeUploadedRepo())
+    monkeypatch.setattr('controllers.files_controller.patient_repo', FakePatientRepo())
+    return upload
+
+
+def _login(client, user_id, role):
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+        sess['role'] = role
+
+
+def test_download_requires_login(client, stored):
+    assert client.get('/files/7').status_code == 302
+
+
+def test_staff_download_supports_etag_range_and_304(client, stored):
+    _login(client, 1, 'doctor')
+
+    res = client.get('/files/7')
+    assert res.status_code == 200
+    assert res.headers['ETag'] == f'"{stored.sha256}"'
+    assert 'private' in res.headers['Cache-Control']
+
+    res = client.get('/files/7', headers={'Range': 'bytes=10-19'})
+    assert res.status_code == 206
+    assert res.data == b'0123456789'
+
+    res = client.get('/files/7', headers={'If-None-Match': f'"{stored.sha256}"'})
+    assert res.status_code == 304
+
+
+def test_patients_only_see_their_own_files(client, stored):
+    _login(client, 50, 'patient')
+    assert client.get('/files/7').status_code == 200
+    _login(client, 51, 'patient')
+    assert client.get('/files/7').status_code == 404
+
+
+def test_x_accel_mode_offloads_to_proxy(app, client, stored):
+    app.config['FILES_OFFLOAD'] = 'x-accel'
+    _login(client, 1, 'assistant')
+
+    res = client.get('/files/7?download=1')
+
+    assert res.headers['X-Accel-Redirect'] == '/protected-uploads/' + stored.path
+    assert res.data == b''
+    assert res.headers['Content-Disposition'].startswith('attachment')
+
+
+def test_static_uploads_are_not_public(client):
+    assert client.get('/static/uploads/anything.pdf').status_code == 404
+
+
+def test_thumbnail_is_served_only_once_rendered(client, stored, tmp_path, monkeypatch):
+    from controllers import files_controller
+    _login(client, 1, 'doctor')
+    record = files_controller.uploaded_repo.get_by_id(7)
+
+    assert client.get('/files/7/thumbnail').status_code == 404
+
+    record.thumbnail_path = stored.path.rsplit('.', 1)[0] + '.thumb.jpg'
+    (tmp_path / record.thumbnail_path).write_bytes(b'jpeg')
+    res = client.get('/files/7/thumbnail')
+
+    assert res.status_code == 200
+    assert res.mimetype == 'image/jpeg'
+    assert res.headers['ETag'] == f'"{stored.sha256}-thumbnail"'
@@ -0,0 +1,82 @@
+import pytest
+from flask import g
+
+from database import instrumentation
+from tests.test_repositories import RecordingConnection, RecordingCursor
+
+
+def _run_queries(app, n):
+    cursor = RecordingCursor(rows=[{'id': 1}, {'id': 2}])
+    with app.test_request_context('/doctor/schedule'):
+        instrumentation.start_request()
+        conn = instrumentation.instrument(RecordingConnection(cursor))
+        for _ in range(n):
+            c = conn.cursor(dictionary=True)
+            c.execute("SELECT id FROM appointment WHERE doctor_id = %s", (1,))
+            c.fetchall()
+        stats = g._query_stats
+        response = instrumentation.finish_request(app.make_response('ok'))
+    return stats, response, cursor
+
+
+def test_cursor_proxy_counts_statements_and_rows(app):
+    stats, response, cursor = _run_queries(app, 3)
+
+    assert len(cursor.executed) == 3
+    assert stats.count == 3 and stats.rows == 6
+    assert stats.slowest(1)[0]['sql'].startswith('SELECT id FROM appointment')
+    timing = response.headers['Server-Timing']
+    assert timing.startswith('db;dur=') and '3 queries, 6 rows' in timing and 'app;dur=' in timing
+
+
+def test_instrument_is_a_no_op_outside_requests():
+    conn = RecordingConnection(RecordingCursor())
+    assert instrumentation.instrument(conn) is conn
+
+
+def test_registry_aggregates_per_endpoint(app):
+    _run_queries(app, 2)
+    _run_queries(app, 4)
+
+    (row,) = instrumentation.get_registry(app).endpoints()
+    assert row['endpoint'] == 'doctor.schedule'
+    assert row['requests'] == 2 and row['max_queries'] == 4 and row['avg_queries'] == 3
+
+
+def test_query_budget_fails_under_test(app):
+    app.config['QUERY_BUDGETS'] = {'doctor.schedule': 2}
+    _run_queries(app, 2)
+    with pytest.raises(instrumentation.QueryBudgetExceeded):
+        _run_queries(app, 3)
+
+    app.config['QUERY_BUDGET_STRICT'] = False
+    _run_queries(app, 3)
+    assert instrumentation.get_registry(app).endpoints()[0]['over_budget'] == 2
+
+
+def test_parse_budgets():
+    assert instrumentation.parse_budgets('doctor.schedule=8, patient.dashboard=6,bad') == {
+        'doctor.schedule': 8, 'patient.dashboard': 6,
+    }
+
+
+def test_perf_page_is_opt_in(app, client, monkeypatch):
+    class FakeUser:
+        status = 'active'
+
+    class FakeUserRepo:
+        def get_by_id(self, user_id):
+            return FakeUser()
+
+    monkeypatch.setattr('controllers.admin_controller.user_repo', FakeUserRepo())
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+        sess['role'] = 'admin'
+
+    assert client.get('/admin/perf').status_code == 404
+
+    app.config['PERF_PAGE_ENABLED'] = True
+    _run_queries(app, 2)
+    res = client.get('/admin/perf')
+    assert res.status_code == 200
+    assert b'doctor.schedule' in res.data
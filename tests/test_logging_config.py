@@ -0,0 +1,50 @@
+import io
+import json
+import logging
+
+import mysql.connector
+import pytest
+
+from repositories.PatientRepository import PatientRepository
+from tests.test_repositories import RecordingConnection, RecordingCursor
+from utils import logging_config
+
+
+def test_queue_listener_writes_json_with_extra_fields():
+    stream = io.StringIO()
+    logging_config.configure_logging(level='INFO', fmt='json', stream=stream)
+    try:
+        log = logging.getLogger('tests.logging')
+        log.debug('not written %s', 1)
+        log.info('booked %s', 42, extra={'perf': {'queries': 3}})
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            log.exception('failed')
+    finally:
+        logging_config.shutdown_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, logging_config._QueueHandler):
+                root.removeHandler(handler)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line['message'] for line in lines] == ['booked 42', 'failed']
+    assert lines[0]['level'] == 'INFO' and lines[0]['logger'] == 'tests.logging'
+    assert lines[0]['perf'] == {'queries': 3}
+    assert 'ValueError: boom' in lines[1]['exc_info']
+
+
+def test_create_patient_logs_no_personal_data(caplog):
+    class DuplicatePhoneCursor(RecordingCursor):
+        def execute(self, query, params=None):
+            raise mysql.connector.IntegrityError(
+                msg="Duplicate entry '+201001234567' for key 'phone'", errno=1062)
+
+    repo = PatientRepository(connection=RecordingConnection(DuplicatePhoneCursor()))
+
+    with caplog.at_level(logging.DEBUG), pytest.raises(mysql.connector.IntegrityError):
+        repo.create_patient('Jane', 'Doe', '01001234567', user_id=5)
+
+    assert 'errno=1062' in caplog.text
+    assert 'Jane' not in caplog.text and '1001234567' not in caplog.text
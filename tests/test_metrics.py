@@ -0,0 +1,72 @@
+import datetime
+
+from repositories.AppointmentRepository import AppointmentRepository
+from services import metrics
+from tests.test_repositories import RecordingConnection, RecordingCursor
+
+
+class FakeAppointmentRepo:
+    def __init__(self):
+        self.calls = []
+    def get_day_counts(self, doctor_id, day):
+        self.calls.append(('day', doctor_id, day))
+        return {'appointments': 4, 'patients': 3}
+    def get_doctor_totals(self, doctor_id, since):
+        self.calls.append(('totals', doctor_id, since))
+        return {'total': 900, 'pending': 2}
+
+
+def test_doctor_metrics_come_from_two_aggregates_and_are_memoized_per_user():
+    repo = FakeAppointmentRepo()
+
+    first = metrics.cached(42, 'doctor', metrics.doctor_metrics, 7, repo, datetime.date(2025, 12, 20))
+    again = metrics.cached(42, 'doctor', metrics.doctor_metrics, 7, repo, datetime.date(2025, 12, 20))
+
+    assert first == again == {'doctor_patients': 3, 'today_appointments': 4,
+                              'total_appointments': 900, 'pending_tasks': 2}
+    assert repo.calls == [('day', 7, '2025-12-20'), ('totals', 7, '2024-12-20')]
+
+    metrics.cached(43, 'doctor', metrics.doctor_metrics, 8, repo)
+    assert len(repo.calls) == 4
+
+
+def test_day_and_total_counts_are_single_indexed_aggregates():
+    cursor = RecordingCursor(rows=[{'appointments': 5, 'patients': None}])
+    repo = AppointmentRepository(connection=RecordingConnection(cursor))
+
+    assert repo.get_day_counts(3, '2025-12-20') == {'appointments': 5, 'patients': 0}
+    query, params = cursor.executed[0]
+    assert query.startswith('SELECT COUNT(*) AS appointments, COUNT(DISTINCT patient_id)')
+    assert 'WHERE doctor_id = %s AND date = %s' in query and params == (3, '2025-12-20')
+
+    cursor._rows = [{'total': 12, 'pending': 1}]
+    assert repo.get_doctor_totals(3, '2024-12-20') == {'total': 12, 'pending': 1}
+    query, params = cursor.executed[1]
+    # Bounded by the window and the pending index, never a scan of the whole history
+    assert 'WHERE doctor_id = %s AND date >= %s' in query
+    assert "WHERE doctor_id = %s AND status = 'PENDING'" in query
+    assert params == (3, '2024-12-20', 3)
+
+
+def test_doctor_dashboard_does_not_load_appointment_rows(client, monkeypatch):
+    repo = FakeAppointmentRepo()
+    repo.get_by_doctor_id = lambda *a: (_ for _ in ()).throw(AssertionError('loaded rows'))
+
+    class FakeDoctorRepo:
+        def get_by_user_id(self, user_id):
+            class D:
+                id, firstName, lastName = 7, 'Ann', 'Lee'
+            return D()
+
+    monkeypatch.setattr('controllers.authO_controller.doctor_repo', FakeDoctorRepo())
+    monkeypatch.setattr('controllers.authO_controller.RepositoryFactory.get_scoped_repository',
+                        lambda name: repo)
+    with client.session_transaction() as sess:
+        sess['user_id'] = 42
+        sess['role'] = 'doctor'
+
+    res = client.get('/auth/dashboard')
+    assert res.status_code == 200
+    assert b'900' in res.data
+    client.get('/auth/dashboard')
+    assert [c[0] for c in repo.calls] == ['day', 'totals']
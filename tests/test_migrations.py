@@ -0,0 +1,93 @@
+import os
+import re
+
+from database import migrator
+
+
+class FakeCursor:
+    def __init__(self, conn, dictionary=False):
+        self.conn = conn
+        self._rows = []
+    def execute(self, query, params=None):
+        self.conn.executed.append((' '.join(query.split()), params))
+        if query.startswith('SELECT version FROM schema_version'):
+            self._rows = [(v,) for v in sorted(self.conn.versions)]
+        elif query.startswith('INSERT INTO schema_version'):
+            self.conn.versions.add(params[0])
+        elif query.startswith('EXPLAIN'):
+            self._rows = self.conn.plans.pop(0)
+    def fetchall(self):
+        return self._rows
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, versions=(), plans=None):
+        self.versions = set(versions)
+        self.plans = list(plans or [])
+        self.executed = []
+    def cursor(self, dictionary=False):
+        return FakeCursor(self, dictionary)
+    def commit(self):
+        pass
+    def rollback(self):
+        pass
+
+
+def _write(tmp_path, name, sql):
+    (tmp_path / name).write_text(sql)
+
+
+def test_migrate_applies_only_pending_versions_in_order(tmp_path):
+    _write(tmp_path, '0002_second.sql', '-- comment\nCREATE INDEX b ON t (b);')
+    _write(tmp_path, '0001_first.sql', 'ALTER TABLE t ADD COLUMN a int;\nCREATE INDEX a ON t (a);')
+    _write(tmp_path, '0003_third.sql', 'CREATE INDEX c ON t (c);')
+    _write(tmp_path, 'notes.txt', 'ignored')
+    conn = FakeConnection(versions={1})
+
+    applied = migrator.migrate(conn, target=2, directory=str(tmp_path))
+
+    assert [m.version for m in applied] == [2]
+    statements = [q for q, _ in conn.executed if q.startswith('CREATE INDEX')]
+    assert statements == ['CREATE INDEX b ON t (b)']
+    assert conn.versions == {1, 2}
+    assert [m.version for m in migrator.pending(conn, str(tmp_path))] == [3]
+
+
+def test_check_hot_queries_flags_every_full_scan():
+    plans = [
+        [{'table': 'appointment', 'type': 'ref', 'possible_keys': 'idx_appointment_doctor_date', 'rows': 4}],
+        [{'table': 'user', 'type': 'ALL', 'possible_keys': None, 'rows': 5000}],
+        [{'table': 'tiny', 'type': 'ALL', 'possible_keys': 'PRIMARY', 'rows': 3}],
+    ]
+    queries = [('a', 'SELECT 1', ()), ('b', 'SELECT 2', ()), ('c', 'SELECT 3', ())]
+
+    # An index the optimizer skipped does not excuse the scan
+    problems = migrator.check_hot_queries(FakeConnection(plans=plans), queries)
+    assert problems == ['b: full scan of user (~5000 rows)', 'c: full scan of tiny (~3 rows)']
+
+    problems = migrator.check_hot_queries(FakeConnection(plans=plans), queries, max_scan_rows=10)
+    assert problems == ['b: full scan of user (~5000 rows)']
+
+
+def test_schema_sql_records_every_shipped_migration():
+    schema_path = os.path.join(os.path.dirname(migrator.MIGRATIONS_DIR), 'schema.sql')
+    with open(schema_path) as fh:
+        schema = fh.read()
+    recorded = {(int(v), n) for v, n in re.findall(r"\((\d+), '(\w+)'\)", schema)}
+    assert recorded == {(m.version, m.name) for m in migrator.discover()}
+    # Re-running schema.sql on an existing database must not mark migrations as applied
+    assert 'SELECT version, name FROM shipped_migrations WHERE @fresh_install' in schema
+    assert 'INSERT IGNORE INTO schema_version (version, name) VALUES' not in schema
+
+
+def test_audit_partition_migration_backfills_and_finds_the_foreign_key():
+    path = next(m.path for m in migrator.discover() if m.name == 'admin_audit_partitions')
+    with open(path) as fh:
+        statements = migrator.split_statements(fh.read())
+
+    assert not any('admin_audit_ibfk_1' in s for s in statements)
+    backfill = statements.index("UPDATE admin_audit SET create_at = '1970-01-02 00:00:00' WHERE create_at IS NULL")
+    not_null = next(i for i, s in enumerate(statements) if 'MODIFY create_at TIMESTAMP NOT NULL' in s)
+    assert backfill < not_null
@@ -84,4 +84,27 @@ def test_appointment_model():
     assert appointment.doctor_id == 1
     assert appointment.date == '2024-01-15'
     assert appointment.appointment_time == '10:30'
-    assert appointment.status == 'PENDING'
\ No newline at end of file
+    assert appointment.status == 'PENDING'
+
+
+def test_models_use_slots():
+    """Listing models carry no per-instance __dict__"""
+    appointment = Appointment(1, 1, 1, '2024-01-15', '10:30', 'PENDING')
+    assert not hasattr(appointment, '__dict__')
+    with pytest.raises(AttributeError):
+        appointment.unknown_field = 1
+
+
+def test_patient_age_is_computed_on_first_access():
+    """Test Patient.age is derived lazily from birth_date"""
+    from datetime import date
+    from models import patient_model
+    from models.patient_model import age_from_birthdate
+
+    patient = Patient(1, 'John', 'Doe', 'Male', '1990-06-15', '+1', None, 1, None)
+    assert patient._age is patient_model._UNSET
+    assert patient.age == age_from_birthdate('1990-06-15') == patient._age
+    assert age_from_birthdate(date(1990, 6, 15), today=date(2024, 6, 14)) == 33
+    assert age_from_birthdate(datetime(1990, 6, 15), today=date(2024, 6, 15)) == 34
+    assert age_from_birthdate('not a date') is None
+    assert Patient(2, 'A', 'B', 'Male', None, '+1', None, 1, None).age is None
@@ -0,0 +1,79 @@
+import datetime
+
+from repositories.AdminAuditRepository import AdminAuditRepository
+from repositories.UserRepository import UserRepository
+from tests.test_repositories import RecordingConnection, RecordingCursor
+from utils import pagination
+
+
+class PagingCursor(RecordingCursor):
+    """Answers COUNT(*) queries with ``count`` and everything else with ``rows``."""
+    def __init__(self, rows, count=0):
+        super().__init__(rows)
+        self.count = count
+    def fetchone(self):
+        if self.executed[-1][0].startswith('SELECT COUNT(*)'):
+            return (self.count,)
+        return super().fetchone()
+
+
+def _user_row(id, day):
+    return (id, f'user{id}@example.com', 'doctor', 'pending', None, datetime.datetime(2025, 12, day, 9, 0))
+
+
+def test_cursor_round_trip_and_tampering():
+    token = pagination.encode_cursor(datetime.datetime(2025, 12, 17, 9, 30), 42)
+    assert pagination.decode_cursor(token) == (datetime.datetime(2025, 12, 17, 9, 30), 42)
+    assert pagination.decode_cursor(None) is None
+    assert pagination.decode_cursor('not-a-cursor') is None
+    assert pagination.decode_cursor(pagination.encode_cursor('yesterday', 1)) is None
+
+
+def test_pending_page_seeks_past_the_cursor_and_never_selects_passwords():
+    cursor = PagingCursor(rows=[_user_row(1, 1), _user_row(2, 2), _user_row(3, 3)], count=30)
+    repo = UserRepository(connection=RecordingConnection(cursor))
+
+    page = repo.page_pending_users(limit=2)
+
+    query, params = cursor.executed[0]
+    assert 'password' not in query
+    assert "WHERE status = 'pending' ORDER BY create_at ASC, id ASC LIMIT %s" in query
+    assert params == (3,)
+    assert [u.id for u in page.items] == [1, 2] and page.items[0].password is None
+    assert page.total == 30
+    assert pagination.decode_cursor(page.next_cursor) == (datetime.datetime(2025, 12, 2, 9, 0), 2)
+
+    cursor.executed.clear()
+    cursor._rows = [_user_row(3, 3)]
+    last = repo.page_pending_users(cursor=page.next_cursor, limit=2)
+    query, params = cursor.executed[0]
+    assert '(create_at > %s OR (create_at = %s AND id > %s))' in query
+    assert params == (datetime.datetime(2025, 12, 2, 9, 0), datetime.datetime(2025, 12, 2, 9, 0), 2, 3)
+    assert last.next_cursor is None
+
+
+def test_audit_page_is_newest_first_without_a_count():
+    cursor = PagingCursor(rows=[(5, 1, 'approve_user', 3, 'doctor', None, datetime.datetime(2025, 12, 2))])
+    page = AdminAuditRepository(connection=RecordingConnection(cursor)).page_entries(limit=20)
+
+    assert len(cursor.executed) == 1
+    assert 'ORDER BY create_at DESC, id DESC LIMIT %s' in cursor.executed[0][0]
+    assert page.items[0].action == 'approve_user'
+    assert page.next_cursor is None and page.total is None
+
+
+def test_admin_page_links_keep_the_other_listing_position(app):
+    from flask import render_template
+
+    pending = UserRepository._listed_user(*_user_row(1, 1))
+    with app.test_request_context('/admin/'):
+        html = render_template('admin/index.html', pending=[pending], pending_count=9, next_cursor='PEND2',
+                               cursor='PEND', per_page=5, doctors=[], recent_audits=[],
+                               audits_cursor='AUD', audits_next_cursor=None)
+        assert 'href="?per_page=5&audits_cursor=AUD">First' in html
+        assert 'href="?cursor=PEND2&per_page=5&audits_cursor=AUD">Next' in html
+
+        html = render_template('admin/index.html', pending=[], pending_count=0, next_cursor=None,
+                               cursor='PEND', per_page=5, doctors=[], recent_audits=[{'action': 'approve_user'}],
+                               audits_cursor='AUD', audits_next_cursor='AUD2')
+        assert 'href="?audits_cursor=AUD2&per_page=5&cursor=PEND">Older actions' in html
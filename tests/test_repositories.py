@@ -0,0 +1,205 @@
+import datetime
+
+from repositories.AppointmentRepository import AppointmentRepository
+
+
+class RecordingCursor:
+    def __init__(self, rows=None):
+        self.executed = []
+        self._rows = rows or []
+    def execute(self, query, params=None):
+        self.executed.append((' '.join(query.split()), params))
+    def fetchall(self):
+        return self._rows
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+    def cursor(self, *args, **kwargs):
+        return self._cursor
+    def commit(self):
+        pass
+    def rollback(self):
+        pass
+
+
+def test_doctor_day_appointments_join_patient_in_one_query():
+    cursor = RecordingCursor(rows=[
+        {'id': 1, 'patient_id': 7, 'date': datetime.date(2025, 12, 20),
+         'appointment_time': datetime.timedelta(hours=9, minutes=30),
+         'status': 'BOOKED', 'patient_name': 'Jane Doe', 'patient_phone': '+20100'},
+    ])
+    repo = AppointmentRepository(connection=RecordingConnection(cursor))
+
+    rows = repo.get_doctor_day_appointments(3, '2025-12-20')
+
+    assert len(cursor.executed) == 1
+    assert 'LEFT JOIN patient' in cursor.executed[0][0]
+    assert rows[0]['appointment_time'] == '09:30'
+    assert rows[0]['patient_name'] == 'Jane Doe'
+
+
+def test_patient_stats_use_single_grouped_query():
+    from repositories.MedicalRecordRepository import MedicalRecordRepository
+    cursor = RecordingCursor(rows=[
+        {'patient_id': 1, 'records_count': 3, 'last_visit': datetime.date(2025, 11, 2)},
+    ])
+    repo = MedicalRecordRepository(connection=RecordingConnection(cursor))
+
+    stats = repo.get_stats_for_patients([1, 2])
+
+    assert len(cursor.executed) == 1
+    query, params = cursor.executed[0]
+    assert 'IN (%s, %s)' in query and 'GROUP BY patient_id' in query
+    assert params == (1, 2)
+    assert stats == {1: {'records_count': 3, 'last_visit': '2025-11-02'}}
+    assert repo.get_stats_for_patients([]) == {}
+    assert len(cursor.executed) == 1
+
+
+def test_patient_page_ignores_unknown_sort():
+    from repositories.PatientRepository import PatientRepository
+    cursor = RecordingCursor()
+    repo = PatientRepository(connection=RecordingConnection(cursor))
+
+    repo.list_patients_page(page=3, per_page=20, sort='password; DROP', direction='asc')
+
+    query, params = cursor.executed[0]
+    assert 'ORDER BY create_at ASC, id ASC' in query
+    assert params == (20, 40)
+
+
+def test_schedule_counts_come_from_one_aggregate_query():
+    cursor = RecordingCursor(rows=[{'today': 2, 'week': 5, 'pending': None}])
+    repo = AppointmentRepository(connection=RecordingConnection(cursor))
+
+    counts = repo.get_schedule_counts(3, '2025-12-20', '2025-12-20', '2025-12-26')
+
+    assert len(cursor.executed) == 1
+    query, params = cursor.executed[0]
+    assert params == (3, '2025-12-20', 3, '2025-12-20', '2025-12-26', 3)
+    # Every counter is bounded by an indexed predicate, never the doctor's whole history
+    assert 'WHERE doctor_id = %s AND date = %s' in query
+    assert 'WHERE doctor_id = %s AND date BETWEEN %s AND %s' in query
+    assert "WHERE doctor_id = %s AND status = 'PENDING'" in query
+    assert 'SUM(' not in query
+    assert counts == {'today': 2, 'week': 5, 'pending': 0}
+
+
+def test_create_appointment_is_single_insert_and_handles_duplicate_slot():
+    import mysql.connector
+    from mysql.connector import errorcode
+
+    class DuplicateCursor(RecordingCursor):
+        def execute(self, query, params=None):
+            super().execute(query, params)
+            raise mysql.connector.IntegrityError(msg="Duplicate entry", errno=errorcode.ER_DUP_ENTRY)
+
+    class TrackingConnection(RecordingConnection):
+        rolled_back = False
+        def rollback(self):
+            self.rolled_back = True
+
+    cursor = DuplicateCursor()
+    conn = TrackingConnection(cursor)
+    repo = AppointmentRepository(connection=conn)
+
+    result = repo.create_appointment(1, 2, '2025-12-20', '09:30', None, status='PENDING')
+
+    assert result is None
+    assert conn.rolled_back
+    assert len(cursor.executed) == 1
+    assert cursor.executed[0][0].startswith('INSERT INTO appointment')
+
+
+def test_patient_search_uses_indexed_branches_without_leading_wildcards():
+    from repositories.PatientRepository import PatientRepository
+    cursor = RecordingCursor()
+    repo = PatientRepository(connection=RecordingConnection(cursor))
+
+    repo.search_patients('PAT0123', limit=10, offset=20)
+    query, params = cursor.executed[0]
+    assert 'WHERE id = %s' in query
+    assert "LIKE '%" not in query and params[0] == 123
+    assert params[-2:] == (10, 20)
+
+    repo.search_patients('Jane Do')
+    query, params = cursor.executed[1]
+    assert 'MATCH(firstName, lastName) AGAINST (%s IN BOOLEAN MODE)' in query
+    assert 'WHERE id' not in query and 'phone_digits' not in query
+    assert params[0] == '+"Jane" +"Do"'
+
+    repo.search_patients('010 123')
+    query, params = cursor.executed[2]
+    assert query.count('phone_digits LIKE %s') == 2
+    assert '010123%' in params and '2010123%' in params
+    assert all('%' not in p[:-1] for p in params if isinstance(p, str))
+
+
+def test_patient_search_ignores_blank_terms():
+    from repositories.PatientRepository import PatientRepository
+    cursor = RecordingCursor()
+    repo = PatientRepository(connection=RecordingConnection(cursor))
+    assert repo.search_patients('   ') == []
+    assert cursor.executed == []
+
+
+def test_patient_chart_loads_records_and_files_in_two_queries():
+    from repositories.MedicalRecordRepository import MedicalRecordRepository
+
+    class ChartCursor(RecordingCursor):
+        def execute(self, query, params=None):
+            super().execute(query, params)
+            if 'FROM MedicalRecord r' in query and 'UploadedFile' not in query:
+                self._rows = [
+                    {'id': 2, 'patient_id': 9, 'doctor_id': 3, 'diagnosis': 'Flu', 'treatment': 'Rest',
+                     'upload_date': datetime.date(2025, 2, 1), 'follow_up_date': None, 'appointment_id': 5,
+                     'uploaded_by_user_id': 1, 'created_at': None, 'doctor_name': 'Ann Lee'},
+                    {'id': 1, 'patient_id': 9, 'doctor_id': None, 'diagnosis': 'Cold', 'treatment': '',
+                     'upload_date': datetime.date(2025, 1, 1), 'follow_up_date': None, 'appointment_id': 4,
+                     'uploaded_by_user_id': 1, 'created_at': None, 'doctor_name': None},
+                ]
+            else:
+                self._rows = [
+                    {'id': 7, 'file_path': 'uploads/a.pdf', 'file_type': 'application/pdf',
+                     'uploaded_by_user_id': 1, 'upload_date': None, 'record_id': 2,
+                     'patient_id': 9, 'appointment_id': 5, 'created_at': None},
+                ]
+
+    cursor = ChartCursor()
+    repo = MedicalRecordRepository(connection=RecordingConnection(cursor))
+
+    chart = repo.get_patient_chart(9)
+
+    assert len(cursor.executed) == 2
+    assert [r.id for r in chart] == [2, 1]
+    assert chart[0].doctor_name == 'Ann Lee'
+    assert [f.id for f in chart[0].files] == [7]
+    assert chart[1].files == []
+
+
+def test_listing_rows_are_built_positionally_from_a_tuple_cursor():
+    from repositories.PatientRepository import PatientRepository
+    cursor = RecordingCursor(rows=[
+        (7, 'Jane', 'Doe', 'female', datetime.date(1990, 1, 1), '+20100', None, 12, None),
+    ])
+    patients = PatientRepository(connection=RecordingConnection(cursor)).list_patients_page()
+
+    assert cursor.executed[0][0].startswith('SELECT ' + ' '.join(PatientRepository.COLUMNS.split()))
+    assert (patients[0].id, patients[0].birth_date, patients[0].phone) == (7, datetime.date(1990, 1, 1), '+20100')
+    assert patients[0].age >= 34
+
+    cursor._rows = [(1, 7, 3, datetime.date(2025, 12, 20), datetime.timedelta(hours=9, minutes=5),
+                     'PENDING', None, None, None)]
+    pending = AppointmentRepository(connection=RecordingConnection(cursor)).list_pending_by_doctor(3)
+    assert pending[0].appointment_time == '09:05'
+
+    cursor._rows = [(1, 7, 3, datetime.date(2025, 12, 20), datetime.time(14, 0),
+                     'COMPLETED', None, None, None, 'Ann', 'Lee')]
+    visits = AppointmentRepository(connection=RecordingConnection(cursor)).get_completed_appointments(7)
+    assert (visits[0].date, visits[0].appointment_time, visits[0].doctor_name) == ('2025-12-20', '14:00', 'Dr. Ann Lee')
@@ -0,0 +1,144 @@
+import io
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from models.upload_model import UploadedFile
+from services import identity, session_store, upload_storage
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return session_store.MemorySessionStore()
+    return session_store.SQLiteSessionStore(str(tmp_path / 'sessions.sqlite3'))
+
+
+def test_store_round_trip_expiry_and_user_index(store, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('services.session_store.time.time', lambda: now[0])
+
+    store.save('a', '{"x": 1}', ttl=60, user_id=5)
+    store.save('b', '{"x": 2}', ttl=10, user_id=5)
+    store.save('c', '{}', ttl=60)
+    assert store.load('a') == '{"x": 1}'
+    assert sorted(store.sids_for_user(5)) == ['a', 'b']
+
+    now[0] += 30
+    assert store.load('b') is None
+    assert store.sids_for_user(5) == ['a']
+
+    store.touch('a', 60)
+    now[0] += 45
+    assert store.load('a') == '{"x": 1}'
+
+    store.delete('a')
+    assert store.load('a') is None
+    assert store.sids_for_user(5) == []
+
+
+def test_cookie_carries_only_a_session_id(app, client):
+    assert isinstance(app.session_interface, session_store.ServerSideSessionInterface)
+    with client.session_transaction() as sess:
+        sess['user_id'] = 3
+        sess['name'] = 'Jane Doe'
+
+    cookie = client.get_cookie('session')
+    assert 'Jane' not in cookie.value
+    stored = app.session_interface.store.load(cookie.value)
+    assert 'Jane Doe' in stored
+    assert app.session_interface.store.sids_for_user(3) == [cookie.value]
+
+    client.get('/auth/logout')
+    assert app.session_interface.store.load(cookie.value) is None
+
+
+def test_login_rotates_session_and_caches_profile(app, client, monkeypatch):
+    class User:
+        id, username, role, status = 8, 'p@example.com', 'patient', 'active'
+        password = generate_password_hash('secret1')
+
+    class Patient:
+        id, firstName, lastName = 21, 'Pat', 'Ient'
+
+    class FakeUserRepo:
+        def get_by_username(self, username):
+            return User()
+
+    class FakePatientRepo:
+        def get_by_user_id(self, user_id):
+            return Patient()
+
+    monkeypatch.setattr('controllers.authO_controller.user_repo', FakeUserRepo())
+    monkeypatch.setattr('controllers.authO_controller.patient_repo', FakePatientRepo())
+    with client.session_transaction() as sess:
+        sess['csrf_token'] = 'anonymous'
+    before = client.get_cookie('session').value
+
+    res = client.post('/auth/login', data={'email': 'p@example.com', 'password': 'secret1'})
+    assert res.status_code == 302
+
+    after = client.get_cookie('session').value
+    assert after != before
+    assert app.session_interface.store.load(before) is None
+    with client.session_transaction() as sess:
+        assert sess['profile']['id'] == 21
+        assert sess['name'] == 'Pat Ient'
+
+
+@pytest.fixture
+def patient_file(app, tmp_path, monkeypatch):
+    app.config['UPLOAD_ROOT'] = str(tmp_path)
+    upload_storage.init_app(app)
+    upload = upload_storage.get_storage(app).save(io.BytesIO(b'scan'), 'scan.pdf', 'application/pdf')
+    record = UploadedFile(7, upload.path, 'application/pdf', 1, None, 3, 9, None, None,
+                          sha256=upload.sha256, size_bytes=upload.size_bytes, original_name='scan.pdf')
+    lookups = []
+
+    class FakeUploadedRepo:
+        def get_by_id(self, file_id):
+            return record
+
+    class FakePatientRepo:
+        def get_by_user_id(self, user_id):
+            lookups.append(user_id)
+
+            class Patient:
+                id, firstName, lastName = 9, 'Pat', 'Ient'
+            return Patient()
+
+    monkeypatch.setattr('controllers.files_controller.uploaded_repo', FakeUploadedRepo())
+    monkeypatch.setattr('controllers.files_controller.patient_repo', FakePatientRepo())
+    return lookups
+
+
+def test_profile_is_looked_up_once_until_invalidated(app, client, patient_file):
+    with client.session_transaction() as sess:
+        sess['user_id'] = 50
+        sess['role'] = 'patient'
+    other = app.test_client()
+    with other.session_transaction() as sess:
+        sess['user_id'] = 50
+        sess['role'] = 'patient'
+
+    for _ in range(3):
+        assert client.get('/files/7').status_code == 200
+    assert other.get('/files/7').status_code == 200
+    assert patient_file == [50, 50]
+
+    # e.g. an admin changed the profile: every session of user 50 resolves it again
+    with app.test_request_context():
+        identity.invalidate_profile(50)
+    assert client.get('/files/7').status_code == 200
+    assert other.get('/files/7').status_code == 200
+    assert patient_file == [50, 50, 50, 50]
+
+
+def test_cached_profile_is_ignored_for_another_role(app):
+    with app.test_request_context():
+        from flask import session
+        session['user_id'] = 4
+        session['role'] = 'doctor'
+        session['profile'] = {'role': 'patient', 'id': 1, 'user_id': 4,
+                              'firstName': None, 'lastName': None, 'doctor_id': None}
+        assert identity.current_profile('patient', None) is None
@@ -0,0 +1,49 @@
+import datetime
+
+from services import slot_engine
+from utils.ttl_cache import TTLCache
+
+
+def test_merge_intervals_joins_overlaps_and_touching_windows():
+    assert slot_engine.merge_intervals([(600, 660), (540, 600), (630, 700), (800, 900)]) == [
+        (540, 700), (800, 900)
+    ]
+
+
+def test_slots_must_fit_inside_window_and_skip_bookings():
+    windows = [(datetime.timedelta(hours=9), datetime.timedelta(hours=10, minutes=45))]
+    slots = slot_engine.compute_free_slots(windows, [datetime.time(9, 30)], slot_minutes=30)
+    assert slots == ['09:00', '10:00']
+
+
+def test_overlapping_windows_do_not_duplicate_slots():
+    windows = [('09:00:00', '10:00:00'), ('09:30', '10:30')]
+    assert slot_engine.compute_free_slots(windows, [], slot_minutes=30) == ['09:00', '09:30', '10:00']
+
+
+def test_off_grid_booking_blocks_every_overlapping_slot():
+    windows = [('09:00', '11:00')]
+    slots = slot_engine.compute_free_slots(windows, ['09:15'], slot_minutes=30)
+    assert slots == ['10:00', '10:30']
+
+
+def test_slot_cache_is_invalidated_per_doctor_day():
+    slot_engine.cache_slots(1, '2025-12-20', ['09:00'])
+    slot_engine.cache_slots(1, datetime.date(2025, 12, 21), ['10:00'])
+    slot_engine.invalidate(1, datetime.date(2025, 12, 20))
+    assert slot_engine.get_cached_slots(1, '2025-12-20') is None
+    assert slot_engine.get_cached_slots('1', '2025-12-21') == ['10:00']
+
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('utils.ttl_cache.time.monotonic', lambda: now[0])
+    cache = TTLCache(ttl=10, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    now[0] += 11
+    assert cache.get('a') is None
@@ -0,0 +1,51 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+from repositories.repositories_factory import RepositoryFactory
+
+SRC = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+# Cold start of the app factory; generous so slow CI machines pass, but an
+# accidental eager import of a heavy dependency still trips it.
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', '1500'))
+
+# Loaded on first use, never while the app starts
+LAZY_MODULES = ('requests', 'mysql.connector', 'PIL', 'fitz', 'repositories.AppointmentRepository',
+                'repositories.PatientRepository', 'repositories.UserRepository')
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def _importtime(code):
+    env = dict(os.environ, TESTING='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=SRC, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(2)), len(match.group(3)))
+    return modules
+
+
+def test_app_factory_cold_start_stays_within_budget():
+    modules = _importtime("from create_app import create_app; create_app('testing')")
+
+    loaded = [name for name in LAZY_MODULES if name in modules]
+    assert loaded == [], f'imported at startup: {loaded}'
+    # Top-level entries (indent 1) carry the cumulative time of everything below them
+    total_ms = sum(us for us, indent in modules.values() if indent == 1) / 1000
+    assert total_ms < IMPORT_BUDGET_MS, f'startup imports took {total_ms:.0f} ms'
+
+
+def test_repositories_resolve_lazily():
+    cls = RepositoryFactory.get_repository_class('appointment')
+    assert cls.__name__ == 'AppointmentRepository'
+    assert RepositoryFactory.get_repository('appointment', connection='conn').db == 'conn'
+    with pytest.raises(ValueError):
+        RepositoryFactory.get_scoped_repository('nope')
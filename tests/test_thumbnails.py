@@ -0,0 +1,104 @@
+import io
+from contextlib import contextmanager
+
+import fitz
+import pytest
+from PIL import Image
+
+from models.upload_model import UploadedFile
+from services import thumbnails, upload_storage
+from tests.test_repositories import RecordingConnection, RecordingCursor
+
+
+def _uploaded(path, file_type):
+    return UploadedFile(5, path, file_type, 1, None, 3, 9, None, None)
+
+
+def test_previews_sit_next_to_the_original():
+    assert thumbnails.derived_paths('ab/cd/abcd.png') == ('ab/cd/abcd.thumb.jpg', 'ab/cd/abcd.preview.jpg')
+
+
+def test_only_images_and_pdfs_are_supported(monkeypatch):
+    monkeypatch.setattr(thumbnails, '_imaging', (object(), object(), None))
+    assert thumbnails.is_supported('a/b/c.JPG')
+    assert not thumbnails.is_supported('a/b/c.pdf', 'application/pdf')
+    assert not thumbnails.is_supported('a/b/c.docx')
+
+    monkeypatch.setattr(thumbnails, '_imaging', (None, None, None))
+    assert not thumbnails.is_supported('a/b/c.png')
+
+
+def test_enqueue_hands_upload_to_worker(app, tmp_path, monkeypatch):
+    app.config['UPLOAD_ROOT'] = str(tmp_path)
+    upload_storage.init_app(app)
+    stored = upload_storage.get_storage(app).save(io.BytesIO(b'png-bytes'), 'xray.png', 'image/png')
+    monkeypatch.setattr(thumbnails, '_imaging', (object(), object(), None))
+
+    submitted = []
+
+    class FakeWorker:
+        def submit(self, fn, *args):
+            submitted.append((fn, args))
+            return 'future'
+
+    app.extensions['thumbnails'] = FakeWorker()
+    with app.app_context():
+        assert thumbnails.enqueue(_uploaded(stored.path, 'image/png')) == 'future'
+        assert thumbnails.enqueue(_uploaded(stored.path.replace('.png', '.docx'), 'application/msword')) is None
+
+    fn, args = submitted[0]
+    assert fn is thumbnails.process
+    assert args == (5, str(tmp_path / stored.path), stored.path, 'image/png')
+
+
+def test_enqueue_without_app_context_is_a_no_op():
+    assert thumbnails.enqueue(_uploaded('ab/cd/x.png', 'image/png')) is None
+
+
+def test_process_records_preview_paths(tmp_path, monkeypatch):
+    cursor = RecordingCursor()
+    rendered = []
+
+    @contextmanager
+    def fake_connection(self):
+        yield RecordingConnection(cursor)
+
+    monkeypatch.setattr('database.db_singleton.DatabaseConnection.connection', fake_connection)
+    monkeypatch.setattr(thumbnails, 'render', lambda *args: rendered.append(args))
+
+    assert thumbnails.process(5, str(tmp_path / 'abcd.png'), 'ab/cd/abcd.png', 'image/png')
+
+    assert rendered[0][1] == str(tmp_path / 'abcd.thumb.jpg')
+    query, params = cursor.executed[0]
+    assert query.startswith('UPDATE UploadedFile SET thumbnail_path')
+    assert params == ('ab/cd/abcd.thumb.jpg', 'ab/cd/abcd.preview.jpg', 5)
+
+
+def test_render_shrinks_images(tmp_path):
+    source = tmp_path / 'scan.png'
+    Image.new('RGB', (3000, 2000), 'white').save(source)
+    assert thumbnails.is_supported(str(source), 'image/png')
+
+    thumbnails.render(str(source), str(tmp_path / 't.jpg'), str(tmp_path / 'p.jpg'))
+
+    with Image.open(tmp_path / 't.jpg') as thumb, Image.open(tmp_path / 'p.jpg') as preview:
+        assert max(thumb.size) <= thumbnails.THUMBNAIL_SIZE[0]
+        assert max(preview.size) <= thumbnails.PREVIEW_SIZE[0]
+
+
+def test_render_previews_the_first_pdf_page(tmp_path):
+    source = tmp_path / 'report.pdf'
+    with fitz.open() as doc:
+        first = doc.new_page(width=595, height=842)                # A4 in points
+        first.draw_rect(first.rect, color=(0, 0, 0), fill=(0, 0, 0))
+        doc.new_page(width=595, height=842)
+        doc.save(str(source))
+    assert thumbnails.is_supported(str(source), 'application/pdf')
+
+    thumbnails.render(str(source), str(tmp_path / 't.jpg'), str(tmp_path / 'p.jpg'), 'application/pdf')
+
+    with Image.open(tmp_path / 't.jpg') as thumb, Image.open(tmp_path / 'p.jpg') as preview:
+        assert thumb.format == preview.format == 'JPEG'
+        assert max(thumb.size) <= thumbnails.THUMBNAIL_SIZE[0]
+        assert preview.size[1] == thumbnails.PREVIEW_SIZE[1]        # portrait page fills the box height
+        assert preview.convert('L').getpixel((preview.size[0] // 2, preview.size[1] // 2)) < 50  # page 1 is black
@@ -0,0 +1,56 @@
+from database.db_singleton import DatabaseConnection
+from repositories.repositories_factory import RepositoryFactory
+from repositories.UserRepository import UserRepository
+
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+    def commit(self):
+        self.commits += 1
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_scoped_repository_is_shared_within_request(app, monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(DatabaseConnection, 'get_connection', lambda self: conn)
+    user_repo = RepositoryFactory.get_scoped_repository('user')
+    patient_repo = RepositoryFactory.get_scoped_repository('patient')
+
+    with app.app_context():
+        first = user_repo._resolve()
+        assert isinstance(first, UserRepository)
+        assert user_repo._resolve() is first
+        # every repository in the request shares the same connection
+        assert user_repo.db is conn
+        assert patient_repo.db is conn
+
+    with app.app_context():
+        assert user_repo._resolve() is not first
+
+
+def test_teardown_commits_and_releases(app, monkeypatch):
+    conn = FakeConnection()
+    released = []
+    monkeypatch.setattr(DatabaseConnection, 'get_connection', lambda self: conn)
+    monkeypatch.setattr(DatabaseConnection, 'release_request_connection', lambda self, exc=None: released.append(exc))
+
+    with app.app_context():
+        RepositoryFactory.get_scoped_repository('user').db
+    assert conn.commits == 1
+    assert conn.rollbacks == 0
+    assert released == [None]
+
+
+def test_teardown_rolls_back_on_error(app, monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(DatabaseConnection, 'get_connection', lambda self: conn)
+
+    ctx = app.app_context()
+    ctx.push()
+    RepositoryFactory.get_scoped_repository('user').db
+    ctx.pop(RuntimeError('boom'))
+    assert conn.rollbacks == 1
+    assert conn.commits == 0
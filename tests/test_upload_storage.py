@@ -0,0 +1,46 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from services.upload_storage import EmptyUploadError, UploadError, UploadStorage, UploadTooLargeError
+
+
+def test_save_streams_hashes_and_shards(tmp_path):
+    storage = UploadStorage(tmp_path, max_bytes=1024, path_prefix='uploads', chunk_size=7)
+    data = b'scan-bytes' * 20
+
+    stored = storage.save(io.BytesIO(data), 'Chest X-Ray.PNG', 'image/png')
+
+    sha = hashlib.sha256(data).hexdigest()
+    assert stored.sha256 == sha and stored.size_bytes == len(data)
+    assert stored.path == f'uploads/{sha[:2]}/{sha[2:4]}/{sha}.png'
+    with open(storage.path_for(stored.path), 'rb') as fh:
+        assert fh.read() == data
+    assert os.listdir(tmp_path / 'tmp') == []
+
+
+def test_same_name_different_content_does_not_overwrite(tmp_path):
+    storage = UploadStorage(tmp_path)
+    first = storage.save(io.BytesIO(b'one'), 'scan.pdf')
+    second = storage.save(io.BytesIO(b'two'), 'scan.pdf')
+    again = storage.save(io.BytesIO(b'one'), 'other-name.pdf')
+
+    assert first.path != second.path
+    assert again.path == first.path and again.deduplicated
+
+
+def test_limits_are_enforced_and_partial_files_removed(tmp_path):
+    storage = UploadStorage(tmp_path, max_bytes=10, chunk_size=4)
+    with pytest.raises(UploadTooLargeError):
+        storage.save(io.BytesIO(b'x' * 11), 'big.bin')
+    with pytest.raises(EmptyUploadError):
+        storage.save(io.BytesIO(b''), 'empty.bin')
+    assert os.listdir(tmp_path / 'tmp') == []
+
+
+def test_path_for_refuses_traversal(tmp_path):
+    storage = UploadStorage(tmp_path)
+    with pytest.raises(UploadError):
+        storage.path_for('../../etc/passwd')
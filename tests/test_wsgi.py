@@ -0,0 +1,54 @@
+import os
+import runpy
+
+from database.db_singleton import DatabaseConnection
+from services.thumbnails import ThumbnailWorker
+
+CONF = os.path.join(os.path.dirname(__file__), '..', 'deployment', 'gunicorn.conf.py')
+
+
+def test_gunicorn_config_scales_with_cpus_and_env(monkeypatch):
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    monkeypatch.setenv('DB_POOL_MAX_SIZE', '10')
+    monkeypatch.setattr('multiprocessing.cpu_count', lambda: 3)
+    conf = runpy.run_path(CONF)
+    assert conf['workers'] == 7
+    assert conf['worker_class'] == 'gthread' and conf['preload_app'] is True
+    assert conf['wsgi_app'] == 'wsgi:app'
+    assert os.path.isfile(os.path.join(conf['chdir'], 'wsgi.py'))
+
+    monkeypatch.setenv('WEB_CONCURRENCY', '2')
+    monkeypatch.setenv('GUNICORN_THREADS', '8')
+    conf = runpy.run_path(CONF)
+    assert conf['workers'] == 2 and conf['threads'] == 8
+
+
+def test_reset_after_fork_forgets_inherited_pool_without_closing_it(monkeypatch):
+    class InheritedPool:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    inherited = InheritedPool()
+    DatabaseConnection()
+    monkeypatch.setattr(DatabaseConnection, '_pool', inherited)
+
+    DatabaseConnection.reset_after_fork()
+
+    assert DatabaseConnection._pool is None
+    assert not inherited.closed
+
+
+def test_thumbnail_worker_restarts_its_executor_after_fork():
+    worker = ThumbnailWorker(1)
+    assert worker.submit(lambda: 1).result() == 1
+    inherited = worker._executor
+
+    worker.reset_after_fork()
+    assert worker._executor is None
+    assert worker.submit(lambda: 2).result() == 2
+    assert worker._executor is not inherited
+
+    worker.shutdown()
+    inherited.shutdown()